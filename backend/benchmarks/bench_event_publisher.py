@@ -0,0 +1,107 @@
+"""
+Events/sec publishing job events to RabbitMQ, as in a bulk job import.
+
+Publishes --events job.updated events (job_to_dict-sized payloads) from --threads
+request threads and stops the clock when the broker has confirmed all of them:
+  legacy     one channel + exchange_declare per event on a BlockingConnection
+             (the previous RabbitMQService.publish_event, plus confirms for the same
+             guarantee, and one connection per thread since pika connections are
+             not thread-safe)
+  publisher  messaging.publisher.EventPublisher (I/O thread, long-lived confirm channel)
+
+Publishes to a throwaway exchange so the worker does not consume the events.
+Needs RABBITMQ_HOST/PORT/USER/PASSWORD (defaults: localhost:5672 guest/guest).
+Run from backend/: python benchmarks/bench_event_publisher.py [--events 20000] [--threads 8] [--max-in-flight 1000]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pika
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.messaging.publisher import EventPublisher, PERSISTENT, encode_event
+
+EXCHANGE = "bench_events"
+
+
+def connection_parameters():
+    return pika.ConnectionParameters(
+        host=os.getenv("RABBITMQ_HOST", "localhost"),
+        port=int(os.getenv("RABBITMQ_PORT", 5672)),
+        credentials=pika.PlainCredentials(os.getenv("RABBITMQ_USER", "guest"), os.getenv("RABBITMQ_PASSWORD", "guest")),
+        heartbeat=30,
+    )
+
+
+def job_event(i):
+    return {
+        "job_id": str(uuid.uuid4()),
+        "country_id": str(uuid.uuid4()),
+        "job_expiration": "2026-12-31T00:00:00",
+        "job_detail": f"Backend developer {i} " + "Python, FastAPI, PostgreSQL and RabbitMQ experience. " * 25,
+    }
+
+
+def run_legacy(events, threads):
+    local = threading.local()
+
+    def publish(data):
+        if getattr(local, "connection", None) is None:
+            local.connection = pika.BlockingConnection(connection_parameters())
+        channel = local.connection.channel()
+        channel.confirm_delivery()
+        channel.exchange_declare(exchange=EXCHANGE, exchange_type="topic", durable=True)
+        channel.basic_publish(exchange=EXCHANGE, routing_key="job.updated", body=encode_event("job.updated", data), properties=PERSISTENT)
+        channel.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(publish, events))
+    return time.perf_counter() - start
+
+
+def run_publisher(events, threads, max_in_flight):
+    publisher = EventPublisher(connection_parameters(), exchange=EXCHANGE, max_in_flight=max_in_flight)
+    publisher.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(lambda data: publisher.publish("job.updated", data), events))
+    confirmed = publisher.flush(timeout=300)
+    elapsed = time.perf_counter() - start
+    stats = publisher.stats()
+    publisher.stop()
+    if not confirmed:
+        print(f"⚠️ Not every event was confirmed: {stats}")
+    return elapsed, stats
+
+
+def main(args):
+    events = [job_event(i) for i in range(args.events)]
+    print(f"{args.events} events, {len(encode_event('job.updated', events[0]))} bytes each, {args.threads} threads")
+    print(f"{'mode':>10} | {'seconds':>8} | {'events/s':>10}")
+
+    if not args.skip_legacy:
+        elapsed = run_legacy(events, args.threads)
+        print(f"{'legacy':>10} | {elapsed:>8.2f} | {args.events / elapsed:>10.0f}")
+
+    elapsed, stats = run_publisher(events, args.threads, args.max_in_flight)
+    print(f"{'publisher':>10} | {elapsed:>8.2f} | {args.events / elapsed:>10.0f}")
+    print(f"publisher stats: {stats}")
+
+    channel = pika.BlockingConnection(connection_parameters()).channel()
+    channel.exchange_delete(EXCHANGE)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--skip-legacy", action="store_true")
+    main(parser.parse_args())
@@ -0,0 +1,102 @@
+"""
+Deep pagination benchmark for GET /jobs/search: OFFSET page vs keyset cursor.
+
+For each ordering, runs the query of page --page both ways through
+jobs.service.get_active_jobs and prints PostgreSQL's EXPLAIN ANALYZE for each:
+  offset   page=N: LIMIT/OFFSET, ranks and discards the (N-1) * page_size previous rows
+  cursor   the cursor returned with page N-1: WHERE (sort_key, id) < cursor
+
+The cursor comes from the page before, so both modes return the same rows (checked).
+
+Needs DATABASE_URL (PostgreSQL). Run from backend/:
+  python benchmarks/bench_job_pagination.py --country CO [--page 500] [--page-size 20] [--query ""]
+"""
+import argparse
+import json
+import os
+import sys
+
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.core import SessionLocal, engine
+from src.jobs import models, service
+
+
+class StatementCapture:
+    """Keeps the last SELECT sent to the database, with its bound parameters."""
+    def __init__(self):
+        self.statement = None
+        self.parameters = None
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.statement, self.parameters = statement, parameters
+
+
+def explain(db, statement, parameters):
+    cursor = db.connection().connection.cursor()
+    cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters)
+    plan = cursor.fetchone()[0]
+    cursor.close()
+    return plan[0] if isinstance(plan, list) else json.loads(plan)[0]
+
+
+def summary(plan):
+    root = plan["Plan"]
+    buffers = root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0)
+    return plan["Planning Time"], plan["Execution Time"], buffers
+
+
+def plan_nodes(node, depth=0):
+    rows = node.get("Actual Rows", 0) * node.get("Actual Loops", 1)
+    yield f"{'  ' * depth}{node['Node Type']} ({rows} rows)"
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child, depth + 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--country", required=True, help="country iso_code")
+    parser.add_argument("--page", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--query", default="")
+    parser.add_argument("--plans", action="store_true", help="print the plan trees")
+    args = parser.parse_args()
+
+    capture = StatementCapture()
+    event.listen(engine, "before_cursor_execute", capture)
+    db = SessionLocal()
+
+    print(f"📦 page {args.page} x {args.page_size} jobs, country {args.country}, query '{args.query}'\n")
+    print(f"{'sort_by':>9} | {'mode':>6} | {'plan ms':>8} | {'exec ms':>9} | {'buffers':>8}")
+    try:
+        for sort_by in ("relevance", "date", "salary"):
+            filters = models.JobFilters(country_code=args.country, query=args.query, sort_by=sort_by, page_size=args.page_size)
+
+            previous = service.get_active_jobs(None, db, filters.model_copy(update={"page": args.page - 1}))
+            if not previous.next_cursor:
+                print(f"{sort_by:>9} | fewer than {args.page - 1} pages, skipped")
+                continue
+
+            modes = {
+                "offset": filters.model_copy(update={"page": args.page}),
+                "cursor": filters.model_copy(update={"cursor": previous.next_cursor}),
+            }
+            pages = {}
+            for mode, mode_filters in modes.items():
+                pages[mode] = [job.id for job in service.get_active_jobs(None, db, mode_filters)]
+                plan = explain(db, capture.statement, capture.parameters)
+                planning, execution, buffers = summary(plan)
+                print(f"{sort_by:>9} | {mode:>6} | {planning:>8.2f} | {execution:>9.2f} | {buffers:>8}")
+                if args.plans:
+                    print("\n".join(plan_nodes(plan["Plan"])))
+
+            assert pages["offset"] == pages["cursor"], f"{sort_by}: offset and cursor pages differ"
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Related jobs latency: worker FAISS engine over HTTP vs pgvector in PostgreSQL.
+
+For --samples random live jobs with an embedding, times only the lookup of the
+related job ids (the job details query is the same for both):
+  http       RecommendationEngine.related_job_ids, the shared client of the API
+  pgvector   jobs.service.get_related_job_ids_pgvector (HNSW index on job_embeddings)
+
+Prints p50/p95/mean in ms and the overlap of both top-k lists (pgvector recall
+against FAISS, which is exact with the default flat index).
+
+Needs DATABASE_URL and, for http, the worker running at RECOMMENDATION_ENGINE_URL.
+Run from backend/: python benchmarks/bench_related_jobs.py [--samples 200] [--k 5] [--ef-search 100]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.core import SessionLocal
+from src.jobs import service
+from src.jobs.recommendation_engine import RecommendationEngine
+
+
+def report(label, seconds):
+    ms = sorted(s * 1000 for s in seconds)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    print(f"{label:>9} | {statistics.median(ms):>8.2f} | {p95:>8.2f} | {statistics.mean(ms):>8.2f}")
+
+
+async def run(args):
+    db = SessionLocal()
+    RecommendationEngine.open()
+    service.HNSW_EF_SEARCH = args.ef_search
+    try:
+        job_ids = [row[0] for row in db.execute(text("""
+            SELECT e.id FROM job_embeddings e JOIN job_entry j ON j.id = e.id
+            WHERE j.is_active = true ORDER BY random() LIMIT :samples
+        """), {"samples": args.samples}).fetchall()]
+        db.commit()
+        if not job_ids:
+            print("❌ No live jobs with embedding.")
+            return
+
+        timings = {"http": [], "pgvector": []}
+        results = {"http": [], "pgvector": []}
+        for job_id in job_ids:
+            start = time.perf_counter()
+            ids = await RecommendationEngine.related_job_ids(job_id)
+            timings["http"].append(time.perf_counter() - start)
+            results["http"].append([str(i) for i in ids or []][:args.k])
+
+            start = time.perf_counter()
+            ids = service.get_related_job_ids_pgvector(db, job_id, args.k)
+            db.commit()
+            timings["pgvector"].append(time.perf_counter() - start)
+            results["pgvector"].append([str(i) for i in ids])
+
+        print(f"📦 {len(job_ids)} jobs, k={args.k}, hnsw.ef_search={args.ef_search}\n")
+        print(f"{'engine':>9} | {'p50 ms':>8} | {'p95 ms':>8} | {'mean ms':>8}")
+        for engine, seconds in timings.items():
+            report(engine, seconds)
+
+        compared = [(set(h), set(p)) for h, p in zip(results["http"], results["pgvector"]) if h]
+        if compared:
+            overlap = sum(len(h & p) for h, p in compared) / sum(len(h) for h, _ in compared)
+            print(f"\npgvector overlap with FAISS top-{args.k}: {overlap:.1%} ({len(compared)} jobs answered by the engine)")
+        if RecommendationEngine.breaker.is_open:
+            print("⚠️ The engine circuit opened during the run; http timings include skipped calls.")
+    finally:
+        await RecommendationEngine.close()
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--ef-search", type=int, default=service.HNSW_EF_SEARCH)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Load test of the hot read endpoints, to compare the sync and async (asyncpg) routes.
+
+Keeps --concurrency requests in flight for --duration seconds against a running API,
+cycling through:
+  /jobs/search, /jobs/counts, /jobs/{id}, /jobs/{id}/related
+and, with --token (a CANDIDATE access token), /jobs/recommendations/.
+
+Prints requests/sec, p50/p95 latency in ms and errors per endpoint.
+
+Start the API twice and run this against each:
+  DATABASE_ASYNC=false uvicorn src.main:app --port 8000 --workers 1
+  DATABASE_ASYNC=true  uvicorn src.main:app --port 8001 --workers 1
+Run from backend/: python benchmarks/load_test_jobs.py --url http://localhost:8000 --country CO [--concurrency 200] [--duration 30]
+"""
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+
+import httpx
+
+
+def report(label, latencies, errors, elapsed):
+    ms = sorted(s * 1000 for s in latencies)
+    if not ms:
+        print(f"{label:>16} | {'-':>8} | {'-':>8} | {'-':>8} | {errors:>6}")
+        return
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    print(f"{label:>16} | {len(ms) / elapsed:>8.1f} | {statistics.median(ms):>8.2f} | {p95:>8.2f} | {errors:>6}")
+
+
+async def sample_job_ids(client, country):
+    response = await client.get("/jobs/search", params={"country_code": country, "page_size": 50})
+    response.raise_for_status()
+    return [job["id"] for job in response.json()]
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        job_ids = await sample_job_ids(client, args.country)
+        if not job_ids:
+            print(f"❌ No active jobs for country {args.country}.")
+            return
+
+        ids = itertools.cycle(job_ids)
+        requests = [
+            ("search", lambda: client.get("/jobs/search", params={"country_code": args.country, "query": args.query})),
+            ("counts", lambda: client.get("/jobs/counts", params={"country_code": args.country})),
+            ("detail", lambda: client.get(f"/jobs/{next(ids)}")),
+            ("related", lambda: client.get(f"/jobs/{next(ids)}/related")),
+        ]
+        if args.token:
+            headers = {"Authorization": f"Bearer {args.token}"}
+            requests.append(("recommendations", lambda: client.get("/jobs/recommendations/", headers=headers)))
+
+        latencies = {label: [] for label, _ in requests}
+        errors = {label: 0 for label, _ in requests}
+        schedule = itertools.cycle(requests)
+        deadline = time.perf_counter() + args.duration
+
+        async def user():
+            while time.perf_counter() < deadline:
+                label, request = next(schedule)
+                start = time.perf_counter()
+                try:
+                    response = await request()
+                    if response.status_code >= 400:
+                        errors[label] += 1
+                        continue
+                except httpx.HTTPError:
+                    errors[label] += 1
+                    continue
+                latencies[label].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    print(f"{args.url} | concurrency {args.concurrency} | {elapsed:.1f}s")
+    print(f"{'endpoint':>16} | {'req/s':>8} | {'p50 ms':>8} | {'p95 ms':>8} | {'errors':>6}")
+    for label, _ in requests:
+        report(label, latencies[label], errors[label], elapsed)
+    report("total", [s for values in latencies.values() for s in values], sum(errors.values()), elapsed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--country", default="CO")
+    parser.add_argument("--query", default="developer")
+    parser.add_argument("--token", default=None)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--timeout", type=float, default=30)
+    asyncio.run(run(parser.parse_args()))
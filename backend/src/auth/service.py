@@ -1,5 +1,6 @@
 from datetime import timedelta, datetime, timezone
 from functools import wraps
+import inspect
 from typing import Annotated, Optional
 from uuid import UUID, uuid4
 from fastapi import Depends
@@ -105,7 +106,10 @@ def require_any_role(allowed_roles: list[Role]):
         async def wrapper(*args, current_user: CurrentUser, **kwargs):
             if current_user and current_user.role not in [role.name for role in allowed_roles]:
                 raise AuthorizationError()
-            return func(*args, current_user=current_user, **kwargs)
+            result = func(*args, current_user=current_user, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
         return wrapper
     return decorator
 
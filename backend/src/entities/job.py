@@ -25,6 +25,8 @@ class JobEntry(Base):
     experience_min_years = Column(Integer, nullable=True)
     salary_min = Column(Integer, nullable=True)
     salary_max = Column(Integer, nullable=True)
+    # job_salary bucket of (salary_min, salary_max), set on every write
+    salary_range_id = Column(Integer, nullable=True)
 
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
     company_id = Column(UUID(as_uuid=True), ForeignKey("company.id"), nullable=False, index=True)
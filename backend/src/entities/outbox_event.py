@@ -0,0 +1,27 @@
+import uuid
+from sqlalchemy import JSON, UUID, BigInteger, Column, DateTime, Index, String, func, text
+
+from src.database.core import Base
+
+
+class OutboxEvent(Base):
+    """Event written in the same transaction as the change it describes.
+    The outbox relay publishes it to the events exchange after commit."""
+    __tablename__ = "outbox_event"
+
+    # Publishing order
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    # Sent as the AMQP message_id, the same on every redelivery
+    event_id = Column(UUID(as_uuid=True), nullable=False, unique=True, default=uuid.uuid4)
+    event_type = Column(String, nullable=False)
+    aggregate_id = Column(UUID(as_uuid=True), nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    published_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("idx_outbox_event_pending", "id", postgresql_where=text("published_at IS NULL")),
+    )
+
+    def __repr__(self):
+        return f"<OutboxEvent(id={self.id}, event_type='{self.event_type}', aggregate_id='{self.aggregate_id}')>"
@@ -40,6 +40,12 @@ class JobsRelatedError(JobError):
         message = "Error fetching related jobs" if job_id is None else f"Error fetching related jobs for job with id {job_id}"
         super().__init__(status_code=status_code, error_code=error_code, message=message)
 
+class InvalidCursorError(JobError):
+    def __init__(self, error: str = None):
+        error_code = "invalid_cursor"
+        message = "Invalid pagination cursor" if error is None else f"Invalid pagination cursor: {error}"
+        super().__init__(status_code=400, error_code=error_code, message=message)
+
 class ProfileError(BaseError):
     """Base exception for profile-related errors"""
     pass
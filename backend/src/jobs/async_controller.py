@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, Response
+from typing import List, Optional
+from uuid import UUID
+import logging
+
+from ..entities.user import Role
+from ..database.core import AsyncDbSession
+from . import models
+from . import async_service
+from .controller import with_next_cursor
+from ..auth.service import CurrentUser, OptionalCurrentUser, require_any_role
+
+# Hot read endpoints on the asyncpg engine. Registered before jobs.controller's router
+# when DATABASE_ASYNC=true, so these routes take precedence over the sync ones.
+router = APIRouter(
+    prefix="/jobs",
+    tags=["Jobs"]
+)
+
+
+@router.get("/search", response_model=List[models.JobResponse])
+async def get_active_jobs(db: AsyncDbSession, current_user: OptionalCurrentUser, response: Response, filters: models.JobFilters = Depends(models.get_job_filters)):
+    logging.info(f"Searching for active jobs with filters: {filters}")
+    return with_next_cursor(response, await async_service.get_active_jobs(current_user, db, filters))
+
+
+@router.get("/counts", response_model=List[models.JobCountsResponse])
+async def get_active_jobs_counts(db: AsyncDbSession, filters: models.JobFilters = Depends(models.get_job_filters)):
+    logging.info(f"Getting active jobs counts with filters: {filters}")
+    return await async_service.get_active_jobs_counts(db, filters)
+
+
+@router.get("/recommendations/", response_model=List[models.JobRecommendationResponse])
+@require_any_role([Role.CANDIDATE])
+async def get_job_recommendations(db: AsyncDbSession, current_user: CurrentUser, response: Response, query: Optional[str] = None, page: Optional[int] = None, cursor: Optional[str] = None):
+    return with_next_cursor(response, await async_service.get_job_recommendations(current_user, db, query, page, cursor=cursor))
+
+
+@router.get("/{job_id}", response_model=models.JobDetailResponse)
+async def get_job(db: AsyncDbSession, current_user: OptionalCurrentUser, job_id: UUID):
+    return await async_service.get_job_by_id(current_user, db, job_id)
+
+
+@router.get("/{job_id}/related", response_model=List[models.JobResponse])
+async def get_related_jobs(db: AsyncDbSession, current_user: OptionalCurrentUser, job_id: UUID):
+    return await async_service.get_related_jobs(current_user, db, job_id)
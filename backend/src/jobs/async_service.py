@@ -0,0 +1,97 @@
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth.models import TokenData
+from src.auth.service import OptionalCurrentUser
+from src.entities.user import User
+from src.exceptions import UserNotFoundError
+
+from . import models
+from . import service
+from .counts_cache import counts_cache
+from .pagination import CursorPage
+from .recommendation_engine import RecommendationEngine
+import logging
+
+
+# Async variants of the hot read services, for the asyncpg engine (DATABASE_ASYNC=true).
+# Statements and response mapping are shared with jobs.service; only the I/O differs.
+
+async def get_active_jobs(current_user: OptionalCurrentUser, db: AsyncSession, filters: models.JobFilters) -> CursorPage:
+    stmt, params = service.active_jobs_query(current_user, filters)
+    results = (await db.execute(stmt, params)).fetchall()
+    return service.active_jobs_page(results, current_user, filters)
+
+
+async def get_active_jobs_counts(db: AsyncSession, filters: models.JobFilters) -> list[models.JobCountsResponse]:
+    counts = counts_cache.get(filters)
+    if counts is not None:
+        logging.info(f"Job counts for country {filters.country_code} with query '{filters.query}' served from cache")
+        return counts
+
+    stmt, params = service.active_jobs_counts_query(filters)
+    results = (await db.execute(stmt, params)).fetchall()
+    return service.job_counts_response(results, filters)
+
+
+async def get_job_by_id(current_user: OptionalCurrentUser, db: AsyncSession, job_id: UUID) -> models.JobDetailResponse:
+    job = (await db.execute(service.JOB_BY_ID_QUERY, {
+        "job_id": job_id,
+        "user_id": current_user.get_uuid() if current_user else None
+    })).first()
+    return service.job_detail_response(job, job_id)
+
+
+async def get_related_jobs(current_user: OptionalCurrentUser, db: AsyncSession, job_id: UUID, k: int = 5) -> list[models.JobResponse]:
+    logging.info(f"Fetching related jobs for job {job_id} from {service.RELATED_JOBS_ENGINE}")
+
+    related_job_ids = None
+    if service.RELATED_JOBS_ENGINE != "pgvector":
+        related_job_ids = await RecommendationEngine.related_job_ids(job_id)
+    # Also covers jobs the engine has not indexed yet
+    if not related_job_ids:
+        related_job_ids = await get_related_job_ids_pgvector(db, job_id, k)
+    # Jobs without embedding yet
+    if not related_job_ids:
+        related_job_ids = await get_related_job_ids_fallback(db, job_id, k)
+        logging.info(f"Using {len(related_job_ids)} related jobs from full-text search for job {job_id}")
+
+    return await get_jobs_by_ids(current_user, db, related_job_ids)
+
+
+async def get_related_job_ids_pgvector(db: AsyncSession, job_id: UUID, k: int = 5) -> list[UUID]:
+    try:
+        await db.execute(service.HNSW_EF_SEARCH_QUERY, service.hnsw_params(k))
+        return [row[0] for row in (await db.execute(service.RELATED_JOBS_PGVECTOR_QUERY, service.related_jobs_pgvector_params(job_id, k))).fetchall()]
+    except Exception as e:
+        logging.error(f"Failed to load pgvector related jobs for job {job_id}. Error: {str(e)}")
+        await db.rollback()
+        return []
+
+
+async def get_related_job_ids_fallback(db: AsyncSession, job_id: UUID, k: int = 5) -> list[UUID]:
+    try:
+        return [row[0] for row in (await db.execute(service.RELATED_JOBS_FALLBACK_QUERY, {"job_id": job_id, "limit": k})).fetchall()]
+    except Exception as e:
+        logging.error(f"Failed to load fallback related jobs for job {job_id}. Error: {str(e)}")
+        await db.rollback()
+        return []
+
+
+async def get_jobs_by_ids(current_user: OptionalCurrentUser, db: AsyncSession, job_ids: list) -> list[models.JobResponse]:
+    if not job_ids:
+        return []
+    results = (await db.execute(service.JOBS_BY_IDS_QUERY, service.jobs_by_ids_params(current_user, job_ids))).fetchall()
+    return service.job_responses(results)
+
+
+async def get_job_recommendations(current_user: TokenData, db: AsyncSession, query: str, page: int = 1, page_size: int = 20, cursor: str = None) -> CursorPage:
+    user = await db.get(User, current_user.get_uuid())
+    if not user:
+        logging.warning(f"User {current_user.get_uuid()} not found")
+        raise UserNotFoundError(current_user.get_uuid())
+
+    stmt, params = service.job_recommendations_query(current_user, query, page, page_size, cursor)
+    results = (await db.execute(stmt, params)).fetchall()
+    return service.job_recommendations_page(results, page_size)
@@ -1,10 +1,10 @@
 import logging
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Response, status
 from typing import List, Optional, Union
 from uuid import UUID
 
 from ..entities.user import Role
-from ..database.core import DbSession
+from ..database.core import DATABASE_ASYNC, DbSession
 from . import  models
 from . import service
 from ..auth.service import CurrentUser, OptionalCurrentUser, require_any_role
@@ -14,6 +14,15 @@ router = APIRouter(
     tags=["Jobs"]
 )
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def with_next_cursor(response: Response, page):
+    """Send the cursor of the next page in a header so the body stays a plain list."""
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page
+
 @router.post("/", response_model=models.JobResponse, status_code=status.HTTP_201_CREATED)
 @require_any_role([Role.COMPANY_MANAGER])
 def create_job(db: DbSession, job: models.JobCreate, current_user: CurrentUser):
@@ -22,8 +31,8 @@ def create_job(db: DbSession, job: models.JobCreate, current_user: CurrentUser):
 
 @router.get("/companies/search", response_model=List[models.JobResponse])
 @require_any_role([Role.COMPANY_MANAGER])
-def get_company_jobs(db: DbSession, current_user: CurrentUser, query: Optional[str] = None, page: Optional[int] = None):
-    return service.get_company_jobs(current_user, db, query, page)
+def get_company_jobs(db: DbSession, current_user: CurrentUser, response: Response, query: Optional[str] = None, page: Optional[int] = None, cursor: Optional[str] = None):
+    return with_next_cursor(response, service.get_company_jobs(current_user, db, query, page, cursor=cursor))
 
 
 @router.put("/{job_id}", response_model=models.JobDetailResponse)
@@ -38,24 +47,24 @@ def delete_job(db: DbSession, job_id: UUID, current_user: CurrentUser):
     service.delete_job(current_user, db, job_id)
 
 
-@router.get("/search", response_model=List[models.JobResponse])
-def get_active_jobs(db: DbSession, current_user: OptionalCurrentUser, filters: models.JobFilters = Depends(models.get_job_filters)):
+@router.get("/search", response_model=List[models.JobResponse], include_in_schema=not DATABASE_ASYNC)
+def get_active_jobs(db: DbSession, current_user: OptionalCurrentUser, response: Response, filters: models.JobFilters = Depends(models.get_job_filters)):
     logging.info(f"Searching for active jobs with filters: {filters}")
-    return service.get_active_jobs(current_user, db, filters)
+    return with_next_cursor(response, service.get_active_jobs(current_user, db, filters))
 
 
-@router.get("/counts", response_model=List[models.JobCountsResponse])
+@router.get("/counts", response_model=List[models.JobCountsResponse], include_in_schema=not DATABASE_ASYNC)
 def get_active_jobs_counts(db: DbSession, filters: models.JobFilters = Depends(models.get_job_filters)):
     logging.info(f"Getting active jobs counts with filters: {filters}")
     return service.get_active_jobs_counts(db, filters)
 
     
-@router.get("/{job_id}", response_model=models.JobDetailResponse)
+@router.get("/{job_id}", response_model=models.JobDetailResponse, include_in_schema=not DATABASE_ASYNC)
 def get_job(db: DbSession, current_user: OptionalCurrentUser, job_id: UUID):
     return service.get_job_by_id(current_user, db, job_id)
 
 
-@router.get("/{job_id}/related", response_model=List[models.JobResponse])
+@router.get("/{job_id}/related", response_model=List[models.JobResponse], include_in_schema=not DATABASE_ASYNC)
 async def get_related_jobs(db: DbSession, current_user: OptionalCurrentUser, job_id: UUID):
     return await service.get_related_jobs(current_user, db, job_id)
 
@@ -68,18 +77,18 @@ def apply_to_job(db: DbSession, current_user: CurrentUser, job_id: UUID):
 
 @router.get("/{job_id}/applicants", response_model=List[models.JobApplicantResponse])
 @require_any_role([Role.COMPANY_MANAGER])
-def get_job_applicants(db: DbSession, current_user: CurrentUser, job_id: UUID, query: Optional[str] = None, page: Optional[int] = None):
-    return service.get_job_applicants(current_user, db, job_id, query, page)
+def get_job_applicants(db: DbSession, current_user: CurrentUser, response: Response, job_id: UUID, query: Optional[str] = None, page: Optional[int] = None, cursor: Optional[str] = None):
+    return with_next_cursor(response, service.get_job_applicants(current_user, db, job_id, query, page, cursor=cursor))
 
 
 @router.get("/applications/", response_model=List[models.JobApplicationResponse])
 @require_any_role([Role.CANDIDATE])
-def get_job_applications(db: DbSession, current_user: CurrentUser, query: Optional[str] = None, page: Optional[int] = None):
-    return service.get_job_applications(current_user, db, query, page)
+def get_job_applications(db: DbSession, current_user: CurrentUser, response: Response, query: Optional[str] = None, page: Optional[int] = None, cursor: Optional[str] = None):
+    return with_next_cursor(response, service.get_job_applications(current_user, db, query, page, cursor=cursor))
 
 
-@router.get("/recommendations/", response_model=List[models.JobRecommendationResponse])
+@router.get("/recommendations/", response_model=List[models.JobRecommendationResponse], include_in_schema=not DATABASE_ASYNC)
 @require_any_role([Role.CANDIDATE])
-def get_job_recommendations(db: DbSession, current_user: CurrentUser, query: Optional[str] = None, page: Optional[int] = None):
-    return service.get_job_recommendations(current_user, db, query, page)
+def get_job_recommendations(db: DbSession, current_user: CurrentUser, response: Response, query: Optional[str] = None, page: Optional[int] = None, cursor: Optional[str] = None):
+    return with_next_cursor(response, service.get_job_recommendations(current_user, db, query, page, cursor=cursor))
 
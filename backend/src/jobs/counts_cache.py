@@ -0,0 +1,117 @@
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import text
+
+from src.database.core import engine
+
+
+# Invalidation is per process: each API instance only sees the job.* events it sends itself,
+# so the TTL is how long another instance can keep serving counts from before a change
+JOB_COUNTS_CACHE_TTL = float(os.getenv("JOB_COUNTS_CACHE_TTL", 10))  # seconds
+JOB_COUNTS_CACHE_SIZE = int(os.getenv("JOB_COUNTS_CACHE_SIZE", 1024))
+# job.* events within this window share one refresh of job_facet_counts
+JOB_COUNTS_REFRESH_DELAY = float(os.getenv("JOB_COUNTS_REFRESH_DELAY", 30))  # seconds
+# The refresh is a write transaction: the outbox relay can't publish events committed after
+# it started until it ends, so it is cancelled past this
+JOB_COUNTS_REFRESH_TIMEOUT = int(os.getenv("JOB_COUNTS_REFRESH_TIMEOUT", 5000))  # milliseconds
+
+
+def cache_key(filters) -> tuple:
+    """Filters that produce the same counts map to the same key. Paging and sorting do not matter."""
+    query = filters.query
+    if query and query.strip():
+        # plainto_tsquery ignores case and extra spaces
+        query = " ".join(query.lower().split())
+    return (
+        filters.country_code,
+        query,
+        tuple(sorted({str(sector_id) for sector_id in filters.sector_ids or []})),
+        tuple(sorted(set(filters.salary_ranges or []))),
+    )
+
+
+class FacetCountsCache:
+    """In-process TTL cache of /jobs/counts responses, keyed by normalized JobFilters.
+
+    Entries expire after `ttl` seconds and are dropped on every job.* event sent by this
+    process. Events sent by other instances don't reach it (nothing here consumes the events
+    exchange), so with several instances the TTL alone bounds how stale their changes
+    can be; empty-query counts also wait for the next refresh of job_facet_counts.
+    """
+
+    def __init__(self, ttl: float = JOB_COUNTS_CACHE_TTL, max_size: int = JOB_COUNTS_CACHE_SIZE, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, filters):
+        key = cache_key(filters)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, counts = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                return None
+            return counts
+
+    def put(self, filters, counts):
+        if self.ttl <= 0:
+            return
+        key = cache_key(filters)
+        with self._lock:
+            self._entries.pop(key, None)
+            while len(self._entries) >= self.max_size:
+                # Oldest entry first (dicts keep insertion order)
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (self.clock() + self.ttl, counts)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+counts_cache = FacetCountsCache()
+
+_refresh_timer = None
+_refresh_lock = threading.Lock()
+
+
+def refresh_facet_counts():
+    """Recompute job_facet_counts, used for the counts of empty-query searches."""
+    global _refresh_timer
+    with _refresh_lock:
+        _refresh_timer = None
+    try:
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(text("SELECT set_config('statement_timeout', :timeout, true)"),
+                         {"timeout": str(JOB_COUNTS_REFRESH_TIMEOUT)})
+            conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY job_facet_counts"))
+        logging.info(f"Refreshed job_facet_counts in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        logging.error(f"Failed to refresh job_facet_counts. Error: {str(e)}")
+    # Counts cached while the view was stale
+    counts_cache.invalidate()
+
+
+def on_job_event(event_type: str):
+    """Drop the cached counts and schedule one refresh of job_facet_counts per burst of events.
+    Only this process's cache is dropped, see FacetCountsCache."""
+    global _refresh_timer
+    counts_cache.invalidate()
+    with _refresh_lock:
+        if _refresh_timer is None:
+            _refresh_timer = threading.Timer(JOB_COUNTS_REFRESH_DELAY, refresh_facet_counts)
+            _refresh_timer.daemon = True
+            _refresh_timer.start()
+    logging.debug(f"Job counts invalidated by {event_type}")
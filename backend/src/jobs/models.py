@@ -17,6 +17,8 @@ class JobFilters(BaseModel):
     sort_by: str = "relevance"
     page: int = 1
     page_size: int = 20
+    # Opaque keyset cursor from the X-Next-Cursor header; takes precedence over page
+    cursor: Optional[str] = None
 
     @field_validator("salary_ranges", mode="before")
     def parse_salary_ranges(cls, v):
@@ -151,7 +153,8 @@ def get_job_filters(
     salary_ranges: Optional[str] = Query(None),
     sort_by: str = Query("relevance"),
     page: int = Query(1),
-    page_size: int = Query(20)
+    page_size: int = Query(20),
+    cursor: Optional[str] = Query(None)
 
 ) -> JobFilters:
     return JobFilters(
@@ -161,5 +164,6 @@ def get_job_filters(
         salary_ranges=salary_ranges,
         sort_by=sort_by,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        cursor=cursor
     )
\ No newline at end of file
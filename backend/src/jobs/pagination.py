@@ -0,0 +1,81 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from src.exceptions import InvalidCursorError
+
+
+# Type of the sort key stored in the cursor of each ordering
+SORT_KEY_TYPES = {
+    "relevance": float,
+    "date": datetime,
+    "salary": int,
+    "similarity": float,
+    "applied": datetime,
+}
+
+# Lists are sorted by (sort key DESC, id DESC), so the rows after the cursor
+# are the ones strictly lower in that tuple order
+KEYSET_FILTER = "AND ({sort_key}, {sort_id}) < (:cursor_key, :cursor_id)"
+
+
+class CursorPage(list):
+    """Results of one page, plus the cursor of the next one (None on the last page)."""
+    def __init__(self, items, next_cursor: Optional[str] = None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+
+
+def encode_cursor(sort_by: str, sort_key, last_id) -> str:
+    if isinstance(sort_key, datetime):
+        sort_key = sort_key.isoformat()
+    payload = json.dumps([sort_by, sort_key, str(last_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str) -> tuple:
+    """Returns (sort_key, last_id). The cursor must come from a list with the same ordering."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort_by, sort_key, last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if cursor_sort_by != sort_by:
+            raise ValueError(f"cursor was created for '{cursor_sort_by}' ordering")
+
+        key_type = SORT_KEY_TYPES[sort_by]
+        if key_type is datetime:
+            sort_key = datetime.fromisoformat(sort_key)
+        elif key_type is int:
+            sort_key = int(sort_key)
+        else:
+            sort_key = float(sort_key)
+        return sort_key, UUID(last_id)
+    except (binascii.Error, UnicodeDecodeError, KeyError, TypeError, ValueError) as e:
+        raise InvalidCursorError(str(e))
+
+
+def keyset_filter(sort_key: str, sort_id: str, cursor: Optional[str]) -> str:
+    """SQL condition that skips the rows up to the cursor; empty in page mode."""
+    if not cursor:
+        return ""
+    return KEYSET_FILTER.format(sort_key=sort_key, sort_id=sort_id)
+
+
+def page_params(sort_by: str, cursor: Optional[str], page: Optional[int], page_size: int) -> dict:
+    """LIMIT/OFFSET and cursor parameters. One extra row is fetched to know if there is a next page."""
+    if cursor:
+        sort_key, last_id = decode_cursor(cursor, sort_by)
+        return {"cursor_key": sort_key, "cursor_id": last_id, "limit": page_size + 1, "offset": 0}
+    return {"limit": page_size + 1, "offset": (max(page or 1, 1) - 1) * page_size}
+
+
+def next_page(results, sort_by: str, page_size: int) -> tuple:
+    """Trim the extra row and build the next cursor from the last row's trailing
+    (sort_key, sort_id) columns. Returns (rows, next_cursor)."""
+    rows = results[:page_size]
+    if len(results) <= page_size:
+        return rows, None
+    *_, sort_key, sort_id = rows[-1]
+    return rows, encode_cursor(sort_by, sort_key, sort_id)
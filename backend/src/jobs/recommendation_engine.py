@@ -0,0 +1,127 @@
+import logging
+import os
+import threading
+import time
+from typing import Optional
+from uuid import UUID
+
+import httpx
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+RECOMMENDATION_ENGINE_URL = os.getenv("RECOMMENDATION_ENGINE_URL", "http://localhost:5000")
+# The engine answers from memory; anything slower is treated as a failure
+RECOMMENDATION_ENGINE_TIMEOUT = float(os.getenv("RECOMMENDATION_ENGINE_TIMEOUT", 1.0))  # seconds
+RECOMMENDATION_ENGINE_CONNECT_TIMEOUT = float(os.getenv("RECOMMENDATION_ENGINE_CONNECT_TIMEOUT", 0.5))  # seconds
+RECOMMENDATION_ENGINE_MAX_CONNECTIONS = int(os.getenv("RECOMMENDATION_ENGINE_MAX_CONNECTIONS", 20))
+RECOMMENDATION_ENGINE_KEEPALIVE = int(os.getenv("RECOMMENDATION_ENGINE_KEEPALIVE", 10))
+# Consecutive failures that open the circuit, and seconds before trying again
+RECOMMENDATION_ENGINE_FAILURES = int(os.getenv("RECOMMENDATION_ENGINE_FAILURES", 5))
+RECOMMENDATION_ENGINE_RESET = float(os.getenv("RECOMMENDATION_ENGINE_RESET", 30))
+
+
+class CircuitBreaker:
+    """Stops calling a failing service for `reset_timeout` seconds after `max_failures`
+    consecutive failures, then lets one trial call through (half-open)."""
+
+    def __init__(self, max_failures: int, reset_timeout: float, clock=time.monotonic):
+        self.max_failures = max_failures
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._trial_running or self.clock() - self.opened_at < self.reset_timeout:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.max_failures:
+                self.opened_at = self.clock()
+            self._trial_running = False
+
+    def release_trial(self):
+        """Free the half-open slot of a call that ended without an outcome (e.g. cancelled),
+        so the next call can try again instead of the circuit staying open for good."""
+        with self._lock:
+            self._trial_running = False
+
+
+class RecommendationEngine:
+    """HTTP client of the worker's recommendation engine, shared for the app lifetime."""
+    _client: Optional[httpx.AsyncClient] = None
+    breaker = CircuitBreaker(RECOMMENDATION_ENGINE_FAILURES, RECOMMENDATION_ENGINE_RESET)
+
+    @classmethod
+    def open(cls, transport: httpx.AsyncBaseTransport = None):
+        cls._client = httpx.AsyncClient(
+            base_url=RECOMMENDATION_ENGINE_URL,
+            timeout=httpx.Timeout(RECOMMENDATION_ENGINE_TIMEOUT, connect=RECOMMENDATION_ENGINE_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=RECOMMENDATION_ENGINE_MAX_CONNECTIONS,
+                max_keepalive_connections=RECOMMENDATION_ENGINE_MAX_CONNECTIONS,
+                keepalive_expiry=RECOMMENDATION_ENGINE_KEEPALIVE,
+            ),
+            transport=transport,
+        )
+        print(f"🔌 Recommendation engine client ready: {RECOMMENDATION_ENGINE_URL}.")
+
+    @classmethod
+    async def close(cls):
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+
+    @classmethod
+    async def related_job_ids(cls, job_id: UUID) -> Optional[list[str]]:
+        """Ids of the jobs related to job_id, most similar first.
+        Returns None when the engine is unavailable, slow or the circuit is open."""
+        if not cls.breaker.allow():
+            logging.warning(f"Recommendation engine circuit open, skipping related jobs call for job {job_id}")
+            return None
+        if cls._client is None:
+            cls.open()
+
+        try:
+            response = await cls._client.get(f"/jobs/{job_id}/related")
+            response.raise_for_status()
+            related = [str(item[0]) for item in response.json()]
+        except httpx.HTTPStatusError as e:
+            # A rejected request says nothing about the engine's health
+            if e.response.status_code >= 500:
+                cls.breaker.record_failure()
+            else:
+                cls.breaker.record_success()
+            logging.error(f"Recommendation engine call failed for job {job_id}. Error: {str(e)}")
+            return None
+        except (httpx.HTTPError, ValueError, TypeError, KeyError, IndexError) as e:
+            # Transport errors and malformed bodies
+            cls.breaker.record_failure()
+            logging.error(f"Recommendation engine call failed for job {job_id}. Error: {type(e).__name__}: {str(e)}")
+            return None
+        else:
+            cls.breaker.record_success()
+            return related
+        finally:
+            cls.breaker.release_trial()
@@ -2,30 +2,52 @@ from datetime import datetime, timezone
 from uuid import uuid4, UUID
 
 import os
-import httpx
 from sqlalchemy import text
 from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
 
 from src.auth.service import OptionalCurrentUser
 from src.entities.company_user import CompanyUser
-from src.entities.currency import Currency
 from src.entities.job_application import JobApplication, JobApplicationStatus
 from src.entities.user import User
-from src.messaging.rabbitmq_service import RabbitMQService
+from src.messaging import outbox
+from src.messaging.outbox import OutboxRelay
 
 from . import models
+from .counts_cache import counts_cache, on_job_event
+from .pagination import CursorPage, keyset_filter, next_page, page_params
+from .recommendation_engine import RecommendationEngine
 from src.auth.models import TokenData
-from src.entities.job import  JobEntry, JobDetail
+from src.entities.job import  EmploymentType, JobEntry, JobDetail
 from src.entities.company import Company
 from src.entities.country import Country
 from src.exceptions import JobAccessError, JobAlreadyAppliedError, JobCreationError, JobNotFoundError, JobsRelatedError, UserNotFoundError
-from dotenv import load_dotenv
 import logging
+from dotenv import load_dotenv
 
 
 load_dotenv()
 
-RECOMMENDATION_ENGINE_URL = os.getenv("RECOMMENDATION_ENGINE_URL", "http://localhost:5000")
+# Related jobs source: "faiss" (worker HTTP engine, pgvector when it is unavailable) or "pgvector"
+RELATED_JOBS_ENGINE = os.getenv("RELATED_JOBS_ENGINE", "faiss")
+# HNSW candidate list size; larger values trade latency for recall
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", 100))
+# Nearest neighbours fetched per related job asked for, before dropping inactive,
+# expired and other-country jobs
+RELATED_JOBS_OVERFETCH = int(os.getenv("RELATED_JOBS_OVERFETCH", 20))
+
+# ts_rank_cd returns real. Selected, sorted and compared with the cursor as float8, so the
+# cursor holds the exact value: a real compared with a bound double is widened and the
+# decimal text of the real (0.1) no longer equals it, skipping or repeating tied rows
+RANK_SORT_KEY = "ts_rank_cd(search_vector, plainto_tsquery('english', :query))::float8"
+
+# Every list is sorted by (sort key DESC, id DESC), the id making the order total so
+# both page numbers and cursors are stable
+JOB_SORT_KEYS = {
+    'relevance': RANK_SORT_KEY,
+    'date': "j.created_at",
+    'salary': "COALESCE(j.salary_min, -1)"
+}
 
 def create_job(current_user: TokenData, db: Session, job: models.JobCreate) -> models.JobResponse:
     try:
@@ -40,16 +62,19 @@ def create_job(current_user: TokenData, db: Session, job: models.JobCreate) -> m
         new_job_entry.company_id = company.id
         new_job_entry.country_id = country.id
         new_job_entry.currency_id = country.currency_id
+        new_job_entry.salary_range_id = get_salary_range_id(db, new_job_entry.salary_min, new_job_entry.salary_max)
         new_job_entry.id = job_uuid
         new_job_detail.id = job_uuid
         new_job_entry.job_short_description = new_job_detail.job_description[:100]
+        new_job_entry.detail = new_job_detail
         db.add(new_job_entry)
         db.add(new_job_detail)
+        send_job_changed_event(db, new_job_entry, "job.created")
         db.commit()
         db.refresh(new_job_entry)
         
         logging.info(f"Created new job for user: {current_user.get_uuid()}")
-        send_job_changed_event(new_job_entry, "job.created")
+        job_events_committed("job.created")
 
         return models.JobResponse(
             id = new_job_entry.id,
@@ -74,24 +99,25 @@ def create_job(current_user: TokenData, db: Session, job: models.JobCreate) -> m
         raise JobCreationError(str(e))
 
 
-def get_company_jobs(current_user: TokenData, db: Session, query: str, page: int = 1, page_size: int = 20) -> list[models.JobResponse]:
-    stmt = text("""
-        SELECT j.id, j.job_title, j.job_short_description, j.remote, j.employment_type, j.tags, j.salary_min, j.salary_max, j.experience_min_years, cu.code, j.expires_at, j.created_at, c.name AS company_name, j.location, co.iso_code AS country_code, c.image_url
+def get_company_jobs(current_user: TokenData, db: Session, query: str, page: int = 1, page_size: int = 20, cursor: str = None) -> CursorPage:
+    stmt = text(f"""
+        SELECT j.id, j.job_title, j.job_short_description, j.remote, j.employment_type, j.tags, j.salary_min, j.salary_max, j.experience_min_years, cu.code, j.expires_at, j.created_at, c.name AS company_name, j.location, co.iso_code AS country_code, c.image_url, {RANK_SORT_KEY} AS sort_key, j.id AS sort_id
         FROM job_entry j
         JOIN company c ON c.id = j.company_id
         JOIN country co ON co.id = j.country_id
         LEFT JOIN currency cu ON cu.id = j.currency_id
         WHERE j.company_id = :company_id
         AND (:query = '' OR search_vector @@ plainto_tsquery('english', :query))
-        ORDER BY ts_rank_cd(search_vector, plainto_tsquery('english', :query)) DESC
+        {keyset_filter(RANK_SORT_KEY, "j.id", cursor)}
+        ORDER BY {RANK_SORT_KEY} DESC, j.id DESC
         LIMIT :limit OFFSET :offset
     """)
     results = db.execute(stmt, {
         "company_id": current_user.get_company_uuid(),
         "query": query,
-        "limit": page_size,
-        "offset": (page - 1) * page_size
+        **page_params("relevance", cursor, page, page_size)
     }).fetchall()
+    results, next_cursor = next_page(results, "relevance", page_size)
 
     # Convert to list of Pydantic models
     jobs = [
@@ -114,15 +140,20 @@ def get_company_jobs(current_user: TokenData, db: Session, query: str, page: int
             company_image_url = image_url or "",
             has_applied = False  # Company jobs view does not track applications
         )
-        for id, job_title, job_short_description, remote, employment_type, tags, salary_min, salary_max, experience_min_years, currency_code, expires_at, created_at, company_name, location, country_code, image_url in results
+        for id, job_title, job_short_description, remote, employment_type, tags, salary_min, salary_max, experience_min_years, currency_code, expires_at, created_at, company_name, location, country_code, image_url, _, _ in results
     ]
 
     logging.info(f"Retrieved {len(jobs)} jobs for company: {current_user.get_company_uuid()}")
-    return jobs
+    return CursorPage(jobs, next_cursor)
+
 
+def get_active_jobs(current_user: OptionalCurrentUser, db: Session, filters: models.JobFilters) -> CursorPage:
+    stmt, params = active_jobs_query(current_user, filters)
+    return active_jobs_page(db.execute(stmt, params).fetchall(), current_user, filters)
 
-def get_active_jobs(current_user: OptionalCurrentUser, db: Session, filters: models.JobFilters) -> list[models.JobResponse]:
 
+def active_jobs_query(current_user: OptionalCurrentUser, filters: models.JobFilters) -> tuple:
+    """Statement and parameters of /jobs/search, shared by the sync and async services."""
     if filters.sort_by not in ['relevance', 'date', 'salary']:
         filters.sort_by = 'relevance'
 
@@ -132,18 +163,14 @@ def get_active_jobs(current_user: OptionalCurrentUser, db: Session, filters: mod
         sector_filter = ""
 
     if filters.salary_ranges:
-        salary_filter = "AND EXISTS (SELECT 1 FROM job_salary js WHERE (j.salary_min >= js.min_salary AND j.salary_max < js.max_salary) AND js.id = ANY(:salary_ranges))"
+        salary_filter = "AND j.salary_range_id = ANY(:salary_ranges)"
     else:
         salary_filter = ""
 
-    order_by_clause = {
-        'relevance': "ORDER BY ts_rank_cd(search_vector, plainto_tsquery('english', :query)) DESC",
-        'date': "ORDER BY j.created_at DESC",
-        'salary': "ORDER BY j.salary_min DESC"
-    }.get(filters.sort_by)
+    sort_key = JOB_SORT_KEYS[filters.sort_by]
 
     stmt = text(f"""
-        SELECT j.id, j.job_title, j.job_short_description, j.remote, j.employment_type, j.tags, (j.salary_min / cu.divisor), (j.salary_max / cu.divisor), j.experience_min_years, cu.code, j.expires_at, j.created_at, c.name AS company_name, j.location, co.iso_code AS country_code, c.image_url, (ja.job_id IS NOT NULL) AS has_applied
+        SELECT j.id, j.job_title, j.job_short_description, j.remote, j.employment_type, j.tags, (j.salary_min / cu.divisor), (j.salary_max / cu.divisor), j.experience_min_years, cu.code, j.expires_at, j.created_at, c.name AS company_name, j.location, co.iso_code AS country_code, c.image_url, (ja.job_id IS NOT NULL) AS has_applied, {sort_key} AS sort_key, j.id AS sort_id
         FROM job_entry j
         JOIN company c ON c.id = j.company_id
         JOIN country co ON co.id = j.country_id
@@ -154,20 +181,24 @@ def get_active_jobs(current_user: OptionalCurrentUser, db: Session, filters: mod
         AND (:query = '' OR search_vector @@ plainto_tsquery('english', :query))
         {sector_filter}
         {salary_filter}
-        {order_by_clause}
+        {keyset_filter(sort_key, "j.id", filters.cursor)}
+        ORDER BY {sort_key} DESC, j.id DESC
         LIMIT :limit OFFSET :offset
     """)
-    results = db.execute(stmt, {
+    return stmt, {
         "country_code": filters.country_code,
         "query": filters.query,
         "user_id": current_user.get_uuid() if current_user else None,
-        "limit": filters.page_size,
-        "offset": (filters.page - 1) * filters.page_size,
         "sector_ids": filters.sector_ids,
-        "salary_ranges": filters.salary_ranges
-    }).fetchall()
+        "salary_ranges": filters.salary_ranges,
+        **page_params(filters.sort_by, filters.cursor, filters.page, filters.page_size)
+    }
+
+
+def active_jobs_page(results, current_user: OptionalCurrentUser, filters: models.JobFilters) -> CursorPage:
+    results, next_cursor = next_page(results, filters.sort_by, filters.page_size)
 
-    logging.info(f"User {current_user.get_uuid() if current_user else None} retrieved active jobs with query '{filters.query}' on page {filters.page}")
+    logging.info(f"User {current_user.get_uuid() if current_user else None} retrieved active jobs with query '{filters.query}' on {'cursor' if filters.cursor else f'page {filters.page}'}")
 
     # Convert to list of Pydantic models
     jobs = [
@@ -190,39 +221,63 @@ def get_active_jobs(current_user: OptionalCurrentUser, db: Session, filters: mod
             company_image_url = image_url or "",
             has_applied = has_applied
         )
-        for id, job_title, job_short_description, remote, employment_type, tags, salary_min, salary_max, experience_min_years, currency_code, expires_at, created_at, company_name, location, country_code, image_url, has_applied in results
+        for id, job_title, job_short_description, remote, employment_type, tags, salary_min, salary_max, experience_min_years, currency_code, expires_at, created_at, company_name, location, country_code, image_url, has_applied, _, _ in results
     ]
 
     logging.info(f"Retrieved {len(jobs)} jobs")
-    return jobs
+    return CursorPage(jobs, next_cursor)
 
 
 def get_active_jobs_counts(db: Session, filters: models.JobFilters) -> list[models.JobCountsResponse]:
+    counts = counts_cache.get(filters)
+    if counts is not None:
+        logging.info(f"Job counts for country {filters.country_code} with query '{filters.query}' served from cache")
+        return counts
+
+    stmt, params = active_jobs_counts_query(filters)
+    return job_counts_response(db.execute(stmt, params).fetchall(), filters)
+
+
+def active_jobs_counts_query(filters: models.JobFilters) -> tuple:
+    # Empty-query counts come from the precomputed job_facet_counts view, refreshed after job events
+    query = (filters.query or "").strip()
+    from_facet_counts = not query
 
     if filters.sector_ids:
-        sector_filter = "AND c.sector_id = ANY(:sector_ids)"
+        sector_filter = f"AND {'fc' if from_facet_counts else 'c'}.sector_id = ANY(:sector_ids)"
     else:
         sector_filter = ""
 
     if filters.salary_ranges:
-        salary_filter = "AND EXISTS (SELECT 1 FROM job_salary js WHERE (j.salary_min >= js.min_salary AND j.salary_max < js.max_salary) AND js.id = ANY(:salary_ranges))"
+        salary_filter = f"AND {'fc' if from_facet_counts else 'j'}.salary_range_id = ANY(:salary_ranges)"
     else:
         salary_filter = ""
 
-    stmt = text(f"""
-        WITH job_counts AS (
-            SELECT c.sector_id, js.id, count(1) AS job_count
+    if from_facet_counts:
+        job_counts = f"""
+            SELECT fc.sector_id, fc.salary_range_id AS id, fc.job_count
+            FROM job_facet_counts fc
+            JOIN country co ON co.id = fc.country_id
+            WHERE co.iso_code = :country_code
+            {sector_filter}
+            {salary_filter}
+        """
+    else:
+        job_counts = f"""
+            SELECT c.sector_id, j.salary_range_id AS id, count(1) AS job_count
             FROM job_entry j
             JOIN company c ON c.id = j.company_id
             JOIN country co ON co.id = j.country_id
-            LEFT JOIN job_salary js ON COALESCE(j.salary_min, 0) >= js.min_salary AND COALESCE(j.salary_max, 0) < js.max_salary 
             WHERE is_active = true
             AND co.iso_code = :country_code
             AND (:query = '' OR search_vector @@ plainto_tsquery('english', :query))
             {sector_filter}
             {salary_filter}
-            GROUP BY c.sector_id, js.id
-        )
+            GROUP BY c.sector_id, j.salary_range_id
+        """
+
+    stmt = text(f"""
+        WITH job_counts AS ({job_counts})
         SELECT 'SECTOR' as type, s.id::text as id, s."name" as name, SUM(COALESCE(job_count, 0)) as job_count
         FROM sector s
         LEFT JOIN job_counts j ON j.sector_id = s.id 
@@ -241,13 +296,15 @@ def get_active_jobs_counts(db: Session, filters: models.JobFilters) -> list[mode
         FROM job_counts j
         ORDER BY 1, 2
     """)
-    results = db.execute(stmt, {
+    return stmt, {
         "country_code": filters.country_code,
-        "query": filters.query,
+        "query": query,
         "sector_ids": filters.sector_ids,
         "salary_ranges": filters.salary_ranges
-    }).fetchall()
+    }
+
 
+def job_counts_response(results, filters: models.JobFilters) -> list[models.JobCountsResponse]:
     sectors = [
         models.JobCountsResponse(
             type = type,
@@ -257,35 +314,50 @@ def get_active_jobs_counts(db: Session, filters: models.JobFilters) -> list[mode
         )
         for type, id, name, job_count in results
     ]
+    counts_cache.put(filters, sectors)
 
     logging.info(f"Retrieved {len(sectors)} job sectors for country {filters.country_code} with query '{filters.query}'")
     return sectors
 
 
+JOB_BY_ID_QUERY = text("""
+    SELECT j.id, j.job_title, d.job_description, d.responsibilities, d.skills, d.benefits, j.employment_type, j.remote, j.salary_min, j.salary_max, cu.code, j.experience_min_years, j.tags, j.created_at, j.updated_at, j.expires_at, j.is_active, j.location, co.iso_code AS country_code, c.name AS company_name, c.image_url,
+        EXISTS (SELECT 1 FROM job_application ja WHERE ja.job_id = j.id AND ja.user_id = :user_id) AS has_applied
+    FROM job_entry j
+    JOIN job_detail d ON d.id = j.id
+    JOIN company c ON c.id = j.company_id
+    JOIN country co ON co.id = j.country_id
+    LEFT JOIN currency cu ON cu.id = j.currency_id
+    WHERE j.id = :job_id
+""")
+
+
 def get_job_by_id(current_user: OptionalCurrentUser, db: Session, job_id: UUID) -> models.JobDetailResponse:
-    job = db.query(JobEntry).filter(JobEntry.id == job_id).first()
+    job = db.execute(JOB_BY_ID_QUERY, {
+        "job_id": job_id,
+        "user_id": current_user.get_uuid() if current_user else None
+    }).first()
+    return job_detail_response(job, job_id)
+
+
+def job_detail_response(job, job_id: UUID) -> models.JobDetailResponse:
     if not job:
         logging.warning(f"Job {job_id} not found")
         raise JobNotFoundError(job_id)
-    
-    company = db.query(Company).filter(Company.id == job.company_id).first()
-    country = db.query(Country).filter(Country.id == job.country_id).first()
-    currency = db.query(Currency).filter(Currency.id == job.currency_id).first()
-    has_applied = db.query(JobApplication).filter(JobApplication.job_id == job_id).filter(JobApplication.user_id == current_user.get_uuid() if current_user else None).first() is not None
 
     logging.info(f"Retrieved Job with ID {job_id}")
     return models.JobDetailResponse(
         id = job.id,
         job_title = job.job_title,
-        job_description = job.detail.job_description,
-        responsibilities = job.detail.responsibilities,
-        skills = job.detail.skills,
-        benefits = job.detail.benefits,
-        employment_type = job.employment_type,
+        job_description = job.job_description,
+        responsibilities = job.responsibilities,
+        skills = job.skills,
+        benefits = job.benefits,
+        employment_type = EmploymentType[job.employment_type],
         remote = job.remote,
         salary_min = job.salary_min,
         salary_max = job.salary_max,
-        currency_code = currency.code if currency else None,
+        currency_code = job.code,
         experience_min_years = job.experience_min_years,
         tags = job.tags or [],
         created_at = job.created_at,
@@ -293,64 +365,159 @@ def get_job_by_id(current_user: OptionalCurrentUser, db: Session, job_id: UUID)
         expires_at = job.expires_at,
         is_active = job.is_active,
         location = job.location,
-        country_code = country.iso_code,
-        company_name = company.name,
-        company_image_url = company.image_url or "",
-        has_applied = has_applied
+        country_code = job.country_code,
+        company_name = job.company_name,
+        company_image_url = job.image_url or "",
+        has_applied = job.has_applied
+    )
+
+
+async def get_related_jobs(current_user: OptionalCurrentUser, db: Session, job_id: UUID, k: int = 5) -> list[models.JobResponse]:
+    logging.info(f"Fetching related jobs for job {job_id} from {RELATED_JOBS_ENGINE}")
+
+    # Database work runs in the threadpool so the event loop only waits on the engine call
+    related_job_ids = None
+    if RELATED_JOBS_ENGINE != "pgvector":
+        related_job_ids = await RecommendationEngine.related_job_ids(job_id)
+    # Also covers jobs the engine has not indexed yet
+    if not related_job_ids:
+        related_job_ids = await run_in_threadpool(get_related_job_ids_pgvector, db, job_id, k)
+    # Jobs without embedding yet
+    if not related_job_ids:
+        related_job_ids = await run_in_threadpool(get_related_job_ids_fallback, db, job_id, k)
+        logging.info(f"Using {len(related_job_ids)} related jobs from full-text search for job {job_id}")
+
+    # load related jobs details from database
+    return await run_in_threadpool(get_jobs_by_ids, current_user, db, related_job_ids)
+
+
+# Nearest live jobs of the same country by inner product of the stored embeddings
+# (normalized, so the same order as FAISS). The HNSW index on job_embeddings applies
+# filters only after its scan, so the inner query asks it for :candidates neighbours
+# without filters, and the live ones of the same country are kept afterwards.
+RELATED_JOBS_PGVECTOR_QUERY = text("""
+    SELECT c.id
+    FROM (
+        SELECT e.id, e.expires_at, e.embedding <#> (SELECT embedding FROM job_embeddings WHERE id = :job_id) AS distance
+        FROM job_embeddings e
+        ORDER BY e.embedding <#> (SELECT embedding FROM job_embeddings WHERE id = :job_id)
+        LIMIT :candidates
+    ) c
+    JOIN job_entry j ON j.id = c.id
+    WHERE j.is_active = true
+    AND (c.expires_at IS NULL OR c.expires_at > NOW())
+    AND j.country_id = (SELECT country_id FROM job_entry WHERE id = :job_id)
+    AND c.id <> :job_id
+    ORDER BY c.distance
+    LIMIT :limit
+""")
+HNSW_EF_SEARCH_QUERY = text("SELECT set_config('hnsw.ef_search', :ef_search, true)")
+
+# Related jobs without the recommendation engine: active jobs of the same country and
+# sector or company, ranked by full-text similarity to the job's most frequent terms
+RELATED_JOBS_FALLBACK_QUERY = text("""
+    WITH source AS (
+        SELECT j.id, j.company_id, j.country_id, c.sector_id,
+            (SELECT to_tsquery('simple', string_agg(quote_literal(t.lexeme), ' | '))
+             FROM (SELECT lexeme FROM unnest(j.search_vector) ORDER BY COALESCE(array_length(positions, 1), 0) DESC LIMIT 32) t) AS terms
+        FROM job_entry j
+        JOIN company c ON c.id = j.company_id
+        WHERE j.id = :job_id
     )
+    SELECT j.id
+    FROM source s
+    JOIN job_entry j ON j.country_id = s.country_id AND j.id <> s.id
+    JOIN company c ON c.id = j.company_id
+    WHERE j.is_active = true
+    AND (c.sector_id = s.sector_id OR j.company_id = s.company_id)
+    ORDER BY COALESCE(ts_rank_cd(j.search_vector, s.terms), 0) DESC, j.created_at DESC
+    LIMIT :limit
+""")
 
 
-async def get_related_jobs(current_user: OptionalCurrentUser, db: Session, job_id: UUID) -> list[models.JobResponse]:
-    # Invoke the recommendation engine via HTTP to get related job IDs
-    external_url = RECOMMENDATION_ENGINE_URL + f"/jobs/{job_id}/related"
+def related_candidates(k: int) -> int:
+    return max(k * RELATED_JOBS_OVERFETCH, k + 1)
 
-    logging.info(f"Fetching related jobs for job {job_id} from recommendation engine at {external_url}")
 
+def hnsw_params(k: int) -> dict:
+    # An HNSW scan returns at most ef_search rows, so it must cover every candidate
+    return {"ef_search": str(max(HNSW_EF_SEARCH, related_candidates(k)))}
+
+
+def related_jobs_pgvector_params(job_id: UUID, k: int) -> dict:
+    return {"job_id": job_id, "limit": k, "candidates": related_candidates(k)}
+
+
+def get_related_job_ids_pgvector(db: Session, job_id: UUID, k: int = 5) -> list[UUID]:
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(external_url)
-            response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
-            data = response.json()
-
-        # load related jobs details from database
-
-        related_job_ids = [str(item[0]) for item in data]
-        jobs = db.query(JobEntry).filter(JobEntry.id.in_(related_job_ids)).all()
-        job_responses = []
-        for job in jobs:
-            company = db.query(Company).filter(Company.id == job.company_id).first()
-            country = db.query(Country).filter(Country.id == job.country_id).first()
-            currency = db.query(Currency).filter(Currency.id == job.currency_id).first()
-            has_applied = db.query(JobApplication).filter(JobApplication.job_id == job.id).filter(JobApplication.user_id == current_user.get_uuid() if current_user else None).first() is not None
-
-            job_responses.append(
-                models.JobResponse(
-                    id = job.id,
-                    job_title = job.job_title,
-                    job_short_description = job.job_short_description,
-                    remote = job.remote,
-                    employment_type = job.employment_type,
-                    location = job.location,
-                    tags = job.tags or [],
-                    salary_min = job.salary_min,
-                    salary_max = job.salary_max,
-                    experience_min_years = job.experience_min_years,
-                    currency_code = currency.code if currency else None,
-                    expires_at = job.expires_at,
-                    created_at = job.created_at,
-                    country_code = country.iso_code,
-                    company_name = company.name,
-                    company_image_url = company.image_url or "",
-                    has_applied = has_applied
-                )
-            )
-        return job_responses
+        db.execute(HNSW_EF_SEARCH_QUERY, hnsw_params(k))
+        return [row[0] for row in db.execute(RELATED_JOBS_PGVECTOR_QUERY, related_jobs_pgvector_params(job_id, k)).fetchall()]
+    except Exception as e:
+        logging.error(f"Failed to load pgvector related jobs for job {job_id}. Error: {str(e)}")
+        db.rollback()
+        return []
 
+
+def get_related_job_ids_fallback(db: Session, job_id: UUID, k: int = 5) -> list[UUID]:
+    try:
+        return [row[0] for row in db.execute(RELATED_JOBS_FALLBACK_QUERY, {"job_id": job_id, "limit": k}).fetchall()]
     except Exception as e:
-        logging.error(f"Failed to fetch related jobs for job {job_id}. Error: {str(e)}")
+        logging.error(f"Failed to load fallback related jobs for job {job_id}. Error: {str(e)}")
+        db.rollback()
         return []
 
 
+JOBS_BY_IDS_QUERY = text("""
+    SELECT j.id, j.job_title, j.job_short_description, j.remote, j.employment_type, j.tags, j.salary_min, j.salary_max, j.experience_min_years, cu.code, j.expires_at, j.created_at, c.name AS company_name, j.location, co.iso_code AS country_code, c.image_url,
+        EXISTS (SELECT 1 FROM job_application ja WHERE ja.job_id = j.id AND ja.user_id = :user_id) AS has_applied
+    FROM unnest(CAST(:job_ids AS uuid[])) WITH ORDINALITY AS r(job_id, position)
+    JOIN job_entry j ON j.id = r.job_id
+    JOIN company c ON c.id = j.company_id
+    JOIN country co ON co.id = j.country_id
+    LEFT JOIN currency cu ON cu.id = j.currency_id
+    ORDER BY r.position
+""")
+
+
+def get_jobs_by_ids(current_user: OptionalCurrentUser, db: Session, job_ids: list) -> list[models.JobResponse]:
+    """Jobs in the order of job_ids, loaded with one query. Unknown ids are skipped."""
+    if not job_ids:
+        return []
+    return job_responses(db.execute(JOBS_BY_IDS_QUERY, jobs_by_ids_params(current_user, job_ids)).fetchall())
+
+
+def jobs_by_ids_params(current_user: OptionalCurrentUser, job_ids: list) -> dict:
+    return {
+        "job_ids": [job_id if isinstance(job_id, UUID) else UUID(str(job_id)) for job_id in job_ids],
+        "user_id": current_user.get_uuid() if current_user else None
+    }
+
+
+def job_responses(results) -> list[models.JobResponse]:
+    return [
+        models.JobResponse(
+            id = id,
+            job_title = job_title,
+            job_short_description = job_short_description,
+            remote = remote,
+            employment_type = employment_type,
+            tags = tags or [],
+            salary_min = salary_min,
+            salary_max = salary_max,
+            experience_min_years = experience_min_years,
+            currency_code = currency_code,
+            expires_at = expires_at,
+            created_at = created_at,
+            location = location,
+            country_code = country_code,
+            company_name = company_name,
+            company_image_url = image_url or "",
+            has_applied = has_applied
+        )
+        for id, job_title, job_short_description, remote, employment_type, tags, salary_min, salary_max, experience_min_years, currency_code, expires_at, created_at, company_name, location, country_code, image_url, has_applied in results
+    ]
+
+
 def update_job(current_user: TokenData, db: Session, job_id: UUID, job_update: models.JobUpdate) -> models.JobDetailResponse:
     # TODO Check user permission to update job
     country = db.query(Country).filter(Country.iso_code == job_update.country_code).first()
@@ -368,6 +535,7 @@ def update_job(current_user: TokenData, db: Session, job_id: UUID, job_update: m
     job_entry.employment_type = job_update.employment_type
     job_entry.salary_min = job_update.salary_min
     job_entry.salary_max = job_update.salary_max
+    job_entry.salary_range_id = get_salary_range_id(db, job_update.salary_min, job_update.salary_max)
     job_entry.experience_min_years = job_update.experience_min_years
     job_entry.tags = job_update.tags
     job_entry.expires_at = job_update.expires_at
@@ -380,10 +548,11 @@ def update_job(current_user: TokenData, db: Session, job_id: UUID, job_update: m
     job_detail.skills = job_update.skills
     job_detail.benefits = job_update.benefits
 
+    send_job_changed_event(db, job_entry, "job.updated")
     db.commit()
     logging.info(f"Successfully updated job {job_id} for user {current_user.get_uuid()}")
 
-    send_job_changed_event(job_entry, "job.updated")
+    job_events_committed("job.updated")
     return get_job_by_id(current_user, db, job_id)
 
 
@@ -395,9 +564,12 @@ def delete_job(current_user: TokenData, db: Session, job_id: UUID) -> None:
         raise JobNotFoundError(job_id)
     
     db.delete(job)
+    send_job_deleted_event(db, job_id)
     db.commit()
     logging.info(f"Job {job_id} deleted by user {current_user.get_uuid()}")
 
+    job_events_committed("job.deleted")
+
 
 def apply_to_job(current_user: TokenData, db: Session, job_id: UUID) -> None:
     job = db.query(JobEntry).filter(JobEntry.id == job_id, JobEntry.is_active == True).first()
@@ -422,7 +594,7 @@ def apply_to_job(current_user: TokenData, db: Session, job_id: UUID) -> None:
     return
     
 
-def get_job_applicants(current_user: TokenData, db: Session, job_id: UUID, query: str, page: int = 1, page_size: int = 20) -> list[models.JobApplicantResponse]:
+def get_job_applicants(current_user: TokenData, db: Session, job_id: UUID, query: str, page: int = 1, page_size: int = 20, cursor: str = None) -> CursorPage:
     # Check user permission to view job applications
     job = db.query(JobEntry).filter(JobEntry.id == job_id).first()
     company_user = db.query(CompanyUser).filter(CompanyUser.user_id == current_user.get_uuid()).first()
@@ -431,22 +603,23 @@ def get_job_applicants(current_user: TokenData, db: Session, job_id: UUID, query
         logging.warning(f"User {current_user.get_uuid()} does not have permission to view applications for job {job_id}")
         raise JobAccessError(job_id)
 
-    stmt = text("""
-        SELECT ja.job_id, ja.user_id, u.first_name, u.last_name, up.title, up.description, up.skills, up.location, ja.status, ja.applied_at
+    stmt = text(f"""
+        SELECT ja.job_id, ja.user_id, u.first_name, u.last_name, up.title, up.description, up.skills, up.location, ja.status, ja.applied_at, ja.applied_at AS sort_key, ja.user_id AS sort_id
         FROM job_application ja
         JOIN users u ON u.id = ja.user_id
         JOIN user_profile up ON up.id = u.id
         WHERE ja.job_id = :job_id
         AND (:query = '' OR (u.first_name || ' ' || u.last_name || ' ' || up.title || ' ' || up.description || ' ' || up.skills) ILIKE '%' || :query || '%')
-        ORDER BY ja.applied_at DESC
+        {keyset_filter("ja.applied_at", "ja.user_id", cursor)}
+        ORDER BY ja.applied_at DESC, ja.user_id DESC
         LIMIT :limit OFFSET :offset
     """)
     results = db.execute(stmt, {
         "query": query,
-        "limit": page_size,
-        "offset": (page - 1) * page_size,
-        "job_id": job_id
+        "job_id": job_id,
+        **page_params("applied", cursor, page, page_size)
     }).fetchall()
+    results, next_cursor = next_page(results, "applied", page_size)
 
     applications = [
         models.JobApplicantResponse(
@@ -461,21 +634,21 @@ def get_job_applicants(current_user: TokenData, db: Session, job_id: UUID, query
             status = status,
             applied_at = applied_at
         )
-        for job_id, user_id, first_name, last_name, title, description, skills, location, status, applied_at in results
+        for job_id, user_id, first_name, last_name, title, description, skills, location, status, applied_at, _, _ in results
     ]
 
-    return applications
+    return CursorPage(applications, next_cursor)
 
 
 
-def get_job_applications(current_user: TokenData, db: Session, query: str, page: int = 1, page_size: int = 20) -> list[models.JobApplicantResponse]:
+def get_job_applications(current_user: TokenData, db: Session, query: str, page: int = 1, page_size: int = 20, cursor: str = None) -> CursorPage:
     user = db.query(User).filter(User.id == current_user.get_uuid()).first()
     if not user:
         logging.warning(f"User {current_user.get_uuid()} not found")
         raise UserNotFoundError(current_user.get_uuid())
 
-    stmt = text("""
-        SELECT j.id, j.job_title, j.job_short_description, j.remote, j.employment_type, j.tags, (j.salary_min / cu.divisor), (j.salary_max / cu.divisor), cu.code, j.expires_at, j.created_at, c.name AS company_name, j.location, co.iso_code AS country_code, c.image_url, (ja.job_id IS NOT NULL) AS has_applied
+    stmt = text(f"""
+        SELECT j.id, j.job_title, j.job_short_description, j.remote, j.employment_type, j.tags, (j.salary_min / cu.divisor), (j.salary_max / cu.divisor), cu.code, j.expires_at, j.created_at, c.name AS company_name, j.location, co.iso_code AS country_code, c.image_url, (ja.job_id IS NOT NULL) AS has_applied, {RANK_SORT_KEY} AS sort_key, j.id AS sort_id
         FROM job_entry j
         JOIN company c ON c.id = j.company_id
         JOIN country co ON co.id = j.country_id
@@ -484,15 +657,16 @@ def get_job_applications(current_user: TokenData, db: Session, query: str, page:
         WHERE j.is_active = true
         AND ja.user_id = :user_id
         AND (:query = '' OR search_vector @@ plainto_tsquery('english', :query))
-        ORDER BY ts_rank_cd(search_vector, plainto_tsquery('english', :query)) DESC
+        {keyset_filter(RANK_SORT_KEY, "j.id", cursor)}
+        ORDER BY {RANK_SORT_KEY} DESC, j.id DESC
         LIMIT :limit OFFSET :offset
     """)
     results = db.execute(stmt, {
         "query": query,
-        "limit": page_size,
-        "offset": (page - 1) * page_size,
-        "user_id": current_user.get_uuid()
+        "user_id": current_user.get_uuid(),
+        **page_params("relevance", cursor, page, page_size)
     }).fetchall()
+    results, next_cursor = next_page(results, "relevance", page_size)
 
     applications = [
         models.JobApplicationResponse(
@@ -513,20 +687,25 @@ def get_job_applications(current_user: TokenData, db: Session, query: str, page:
             company_image_url = image_url or "",
             has_applied = has_applied
         )
-        for id, job_title, job_short_description, remote, employment_type, tags, salary_min, salary_max, currency_code, expires_at, created_at, company_name, location, country_code, image_url, has_applied in results
+        for id, job_title, job_short_description, remote, employment_type, tags, salary_min, salary_max, currency_code, expires_at, created_at, company_name, location, country_code, image_url, has_applied, _, _ in results
     ]
 
-    return applications
+    return CursorPage(applications, next_cursor)
 
 
-def get_job_recommendations(current_user: TokenData, db: Session, query: str, page: int = 1, page_size: int = 20) -> list[models.JobRecommendationResponse]:
+def get_job_recommendations(current_user: TokenData, db: Session, query: str, page: int = 1, page_size: int = 20, cursor: str = None) -> CursorPage:
     user = db.query(User).filter(User.id == current_user.get_uuid()).first()
     if not user:
         logging.warning(f"User {current_user.get_uuid()} not found")
         raise UserNotFoundError(current_user.get_uuid())
 
-    stmt = text("""
-        SELECT j.id, j.job_title, j.job_short_description, j.remote, j.employment_type, j.tags, (j.salary_min / cu.divisor), (j.salary_max / cu.divisor), cu.code, j.expires_at, j.created_at, c.name AS company_name, j.location, co.iso_code AS country_code, c.image_url, (ja.job_id IS NOT NULL) AS has_applied, jr.similarity_score
+    stmt, params = job_recommendations_query(current_user, query, page, page_size, cursor)
+    return job_recommendations_page(db.execute(stmt, params).fetchall(), page_size)
+
+
+def job_recommendations_query(current_user: TokenData, query: str, page: int, page_size: int, cursor: str) -> tuple:
+    stmt = text(f"""
+        SELECT j.id, j.job_title, j.job_short_description, j.remote, j.employment_type, j.tags, (j.salary_min / cu.divisor), (j.salary_max / cu.divisor), cu.code, j.expires_at, j.created_at, c.name AS company_name, j.location, co.iso_code AS country_code, c.image_url, (ja.job_id IS NOT NULL) AS has_applied, jr.similarity_score, jr.similarity_score AS sort_key, jr.job_id AS sort_id
         FROM job_entry j
         JOIN company c ON c.id = j.company_id
         JOIN country co ON co.id = j.country_id
@@ -535,15 +714,19 @@ def get_job_recommendations(current_user: TokenData, db: Session, query: str, pa
         LEFT JOIN job_application ja ON ja.job_id = j.id AND ja.user_id = :user_id
         WHERE j.is_active = true
         AND (:query = '' OR search_vector @@ plainto_tsquery('english', :query))
-        ORDER BY jr.similarity_score DESC
+        {keyset_filter("jr.similarity_score", "jr.job_id", cursor)}
+        ORDER BY jr.similarity_score DESC, jr.job_id DESC
         LIMIT :limit OFFSET :offset
     """)
-    results = db.execute(stmt, {
+    return stmt, {
         "query": query,
-        "limit": page_size,
-        "offset": (page - 1) * page_size,
-        "user_id": current_user.get_uuid()
-    }).fetchall()
+        "user_id": current_user.get_uuid(),
+        **page_params("similarity", cursor, page, page_size)
+    }
+
+
+def job_recommendations_page(results, page_size: int) -> CursorPage:
+    results, next_cursor = next_page(results, "similarity", page_size)
 
     recommendations = [
         models.JobRecommendationResponse(
@@ -565,11 +748,22 @@ def get_job_recommendations(current_user: TokenData, db: Session, query: str, pa
             has_applied = has_applied,
             similarity_score = similarity_score
         )
-        for id, job_title, job_short_description, remote, employment_type, tags, salary_min, salary_max, currency_code, expires_at, created_at, company_name, location, country_code, image_url, has_applied, similarity_score in results
+        for id, job_title, job_short_description, remote, employment_type, tags, salary_min, salary_max, currency_code, expires_at, created_at, company_name, location, country_code, image_url, has_applied, similarity_score, _, _ in results
     ]
 
-    return recommendations
+    return CursorPage(recommendations, next_cursor)
+
+
 
+def get_salary_range_id(db: Session, salary_min: int, salary_max: int) -> int:
+    """job_salary bucket containing the salary; a missing salary counts as 0."""
+    return db.execute(text("""
+        SELECT js.id
+        FROM job_salary js
+        WHERE COALESCE(:salary_min, 0) >= js.min_salary AND COALESCE(:salary_max, 0) < js.max_salary
+        ORDER BY js.min_salary DESC
+        LIMIT 1
+    """), {"salary_min": salary_min, "salary_max": salary_max}).scalar()
 
 
 def model_from_dto(dto, model_cls):
@@ -581,6 +775,9 @@ def model_from_dto(dto, model_cls):
 def job_to_dict(job_entry):
     return {
         "job_id": str(job_entry.id),
+        "country_id": str(job_entry.country_id) if job_entry.country_id else None,
+        # The worker drops inactive jobs from the index; unset before the first flush means active
+        "is_active": job_entry.is_active is not False,
         "job_expiration": job_entry.expires_at.isoformat() if job_entry.expires_at else None,
         "job_detail": "{} {} {} {}".format(
             job_entry.job_title,
@@ -590,10 +787,17 @@ def job_to_dict(job_entry):
         )
     }
 
-def send_job_changed_event(job_entry, queue):
-    data = job_to_dict(job_entry)
-    try:
-        RabbitMQService.publish_event_async(queue, data)
-        
-    except Exception as e:
-        logging.error(f"Failed to send {queue} event for job {job_entry.id}. Error: {str(e)}")
\ No newline at end of file
+# Events go through the transactional outbox: they are written with the change and
+# published by the OutboxRelay once the transaction commits.
+
+def send_job_changed_event(db: Session, job_entry, queue):
+    outbox.add_event(db, queue, job_entry.id, job_to_dict(job_entry))
+
+
+def send_job_deleted_event(db: Session, job_id):
+    outbox.add_event(db, "job.deleted", job_id, {"job_id": str(job_id)})
+
+
+def job_events_committed(queue):
+    on_job_event(queue)
+    OutboxRelay.notify()
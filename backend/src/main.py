@@ -5,9 +5,10 @@ from dotenv import load_dotenv
 import os
 
 from .messaging.rabbitmq_service import RabbitMQService
-from concurrent.futures import ThreadPoolExecutor
+from .messaging.outbox import OutboxRelay
+from .jobs.recommendation_engine import RecommendationEngine
 
-from .database.core import engine, Base
+from .database.core import engine, Base, SessionLocal
 from .entities.sector import Sector  # Import models to register them
 from .entities.currency import Currency  # Import models to register them
 from .entities.country import Country  # Import models to register them
@@ -18,12 +19,11 @@ from .entities.job import JobEntry, JobDetail  # Import models to register them
 from .entities.educational_institution import EducationalInstitution  # Import models to register them
 from .entities.job_application import JobApplication  # Import models to register them
 from .entities.job_recommendation import JobRecommendation  # Import models to register them
+from .entities.outbox_event import OutboxEvent  # Import models to register them
 
 from .api import register_routes
 from .logging import configure_logging, LogLevels
 
-executor = ThreadPoolExecutor()
-
 load_dotenv()
 
 @asynccontextmanager
@@ -33,9 +33,12 @@ async def lifespan(app: FastAPI):
         user=os.getenv("RABBITMQ_USER", "guest"),
         password=os.getenv("RABBITMQ_PASSWORD", "guest"),
         port=int(os.getenv("RABBITMQ_PORT", 5672)),
-        executor=executor
     )
+    OutboxRelay.start(SessionLocal)
+    RecommendationEngine.open()
     yield
+    await RecommendationEngine.close()
+    OutboxRelay.stop()
     RabbitMQService.close()
 
 
@@ -54,6 +57,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["Authorization", "Content-Type", "Set-Cookie"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 """ Only uncomment below to create new tables, 
@@ -0,0 +1,211 @@
+import logging
+import os
+import threading
+import time
+from uuid import UUID
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.entities.outbox_event import OutboxEvent
+from .rabbitmq_service import RabbitMQService
+
+
+load_dotenv()
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 500))
+# The relay also wakes up right after this process commits an event
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", 1.0))  # seconds
+OUTBOX_CONFIRM_TIMEOUT = float(os.getenv("OUTBOX_CONFIRM_TIMEOUT", 10))  # seconds
+OUTBOX_RETENTION = float(os.getenv("OUTBOX_RETENTION", 86400))  # seconds kept after publishing
+OUTBOX_LAG_WARNING = float(os.getenv("OUTBOX_LAG_WARNING", 30))  # seconds
+# pg advisory lock held while draining, so a single relay publishes at a time (in order)
+OUTBOX_LOCK_ID = 7262001
+# Namespace of the per-aggregate advisory locks taken by add_event
+OUTBOX_AGGREGATE_LOCK_ID = 7262002
+
+AGGREGATE_LOCK_QUERY = text("SELECT pg_advisory_xact_lock(:namespace, hashtext(:aggregate_id))")
+
+# Only rows written by transactions older than every transaction still running: a row
+# whose transaction has not committed yet can't be overtaken by rows after it.
+# age() compares the row's xmin with the 32-bit part of the snapshot xmin, wraparound-safe.
+# So a write transaction left open (on any table) holds back every event committed after
+# it started until it ends: keep them short (idle_in_transaction_session_timeout, and the
+# statement_timeout of refresh_facet_counts).
+PENDING_EVENTS_QUERY = text("""
+    SELECT id, event_id, event_type, aggregate_id, payload, created_at
+    FROM outbox_event
+    WHERE published_at IS NULL
+      AND age(xmin) > age((pg_snapshot_xmin(pg_current_snapshot())::text::numeric % 4294967296)::text::xid)
+    ORDER BY id
+    LIMIT :limit
+""")
+
+# Without the xmin filter, so it also counts the events held back by an open transaction
+OLDEST_PENDING_QUERY = text("""
+    SELECT EXTRACT(EPOCH FROM clock_timestamp() - min(created_at))
+    FROM outbox_event
+    WHERE published_at IS NULL
+""")
+
+MARK_PUBLISHED_QUERY = text("""
+    UPDATE outbox_event SET published_at = clock_timestamp() WHERE id = ANY(:ids)
+""")
+
+DELETE_PUBLISHED_QUERY = text("""
+    DELETE FROM outbox_event
+    WHERE published_at < clock_timestamp() - make_interval(secs => :retention)
+""")
+
+
+def add_event(db: Session, event_type: str, aggregate_id: UUID, data: dict):
+    """Stage an event in the caller's transaction. It is published only if the transaction commits.
+
+    The aggregate's changes are flushed and a lock on the aggregate is taken first, so the
+    event gets its id only after any other transaction on the same aggregate committed:
+    ids, and so publishing order, follow commit order for each aggregate.
+    """
+    db.flush()
+    db.execute(AGGREGATE_LOCK_QUERY, {"namespace": OUTBOX_AGGREGATE_LOCK_ID, "aggregate_id": str(aggregate_id)})
+    db.add(OutboxEvent(event_type=event_type, aggregate_id=aggregate_id, payload=data))
+
+
+def latest_events(rows) -> list:
+    """Rows to publish, in outbox order. Payloads carry the full state, so an event followed
+    by another of the same type for the same aggregate in the batch is skipped."""
+    last_position = {(row.event_type, row.aggregate_id): position for position, row in enumerate(rows)}
+    return [row for position, row in enumerate(rows) if last_position[(row.event_type, row.aggregate_id)] == position]
+
+
+class OutboxRelay:
+    """Background thread that drains outbox_event to the events exchange in batches.
+
+    Events are published in id order and marked published only after the broker confirms
+    them, so a crash in between publishes them again with the same event_id (message_id),
+    which consumers use to skip the copies they already processed.
+
+    Events committed after a still-running write transaction started wait for it to end
+    (see PENDING_EVENTS_QUERY); lag_seconds includes them.
+    """
+    _session_factory = None
+    _thread = None
+    _wake = threading.Event()
+    _stopping = threading.Event()
+    _last_cleanup = 0.0
+
+    # Metrics
+    published = 0
+    skipped = 0
+    batches = 0
+    failures = 0
+    lag_seconds = 0.0  # age of the oldest unpublished event at the last batch
+    last_batch_at = None
+
+    @classmethod
+    def start(cls, session_factory):
+        cls._session_factory = session_factory
+        cls._stopping.clear()
+        cls._thread = threading.Thread(target=cls._run, name="outbox-relay", daemon=True)
+        cls._thread.start()
+        print("📤 Outbox relay started.")
+
+    @classmethod
+    def notify(cls):
+        """Called after committing outbox events, to publish them without waiting for the next poll."""
+        cls._wake.set()
+
+    @classmethod
+    def stop(cls, timeout: float = 10):
+        cls._stopping.set()
+        cls._wake.set()
+        if cls._thread is not None:
+            cls._thread.join(timeout)
+            cls._thread = None
+        print("📤 Outbox relay stopped.")
+
+    @classmethod
+    def stats(cls) -> dict:
+        return {
+            "published": cls.published,
+            "skipped": cls.skipped,
+            "batches": cls.batches,
+            "failures": cls.failures,
+            "lag_seconds": cls.lag_seconds,
+            "last_batch_at": cls.last_batch_at,
+        }
+
+    @classmethod
+    def _run(cls):
+        while not cls._stopping.is_set():
+            try:
+                relayed = cls.relay_batch()
+            except Exception as e:
+                cls.failures += 1
+                logging.error(f"Outbox relay failed. Error: {str(e)}")
+                relayed = 0
+
+            # A full batch means there is more waiting
+            if relayed < OUTBOX_BATCH_SIZE:
+                cls._wake.wait(OUTBOX_POLL_INTERVAL)
+                cls._wake.clear()
+
+    @classmethod
+    def relay_batch(cls, batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+        """Publish the oldest pending events. Returns the number of outbox rows handled."""
+        db = cls._session_factory()
+        try:
+            if not db.execute(text("SELECT pg_try_advisory_xact_lock(:lock_id)"), {"lock_id": OUTBOX_LOCK_ID}).scalar():
+                db.rollback()
+                return 0  # Another instance is relaying
+
+            rows = db.execute(PENDING_EVENTS_QUERY, {"limit": batch_size}).fetchall()
+            cls._record_lag(db, len(rows))
+            if not rows:
+                cls._cleanup(db)
+                db.commit()
+                return 0
+
+            events = latest_events(rows)
+            published = RabbitMQService.publish_batch(
+                [(row.event_type, row.payload, row.event_id, row.created_at) for row in events],
+                timeout=OUTBOX_CONFIRM_TIMEOUT,
+            )
+            if not published:
+                db.rollback()
+                cls.failures += 1
+                logging.warning(f"Outbox batch of {len(events)} events not confirmed, retrying")
+                return 0
+
+            db.execute(MARK_PUBLISHED_QUERY, {"ids": [row.id for row in rows]})
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        cls.published += len(events)
+        cls.skipped += len(rows) - len(events)
+        cls.batches += 1
+        cls.last_batch_at = time.time()
+        logging.debug(f"Outbox relayed {len(events)} events ({len(rows) - len(events)} superseded), lag {cls.lag_seconds:.2f}s")
+        return len(rows)
+
+    @classmethod
+    def _record_lag(cls, db: Session, ready: int):
+        cls.lag_seconds = float(db.execute(OLDEST_PENDING_QUERY).scalar() or 0.0)
+        if cls.lag_seconds > OUTBOX_LAG_WARNING:
+            if ready:
+                logging.warning(f"Outbox relay lag {cls.lag_seconds:.1f}s ({ready} events in batch)")
+            else:
+                logging.warning(f"Outbox relay lag {cls.lag_seconds:.1f}s, events held back by an open transaction")
+
+    @classmethod
+    def _cleanup(cls, db: Session):
+        if time.monotonic() - cls._last_cleanup < 3600:
+            return
+        cls._last_cleanup = time.monotonic()
+        deleted = db.execute(DELETE_PUBLISHED_QUERY, {"retention": OUTBOX_RETENTION}).rowcount
+        if deleted:
+            logging.info(f"Deleted {deleted} published outbox events")
@@ -0,0 +1,289 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import pika
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+RABBITMQ_EXCHANGE = os.getenv("RABBITMQ_EXCHANGE", "events")
+# Events waiting for the I/O thread; publishers wait this long for room before dropping
+RABBITMQ_PUBLISH_BUFFER = int(os.getenv("RABBITMQ_PUBLISH_BUFFER", 10000))
+RABBITMQ_PUBLISH_BLOCK_TIMEOUT = float(os.getenv("RABBITMQ_PUBLISH_BLOCK_TIMEOUT", 0.5))  # seconds
+# Published messages not confirmed by the broker yet
+RABBITMQ_MAX_IN_FLIGHT = int(os.getenv("RABBITMQ_MAX_IN_FLIGHT", 1000))
+RABBITMQ_RECONNECT_DELAY = float(os.getenv("RABBITMQ_RECONNECT_DELAY", 3))  # seconds
+
+PERSISTENT = pika.BasicProperties(delivery_mode=2, content_type="application/json")
+
+
+def encode_event(event_type: str, data: dict, event_id=None, timestamp: datetime = None) -> bytes:
+    event = {
+        "event_type": event_type,
+        "timestamp": (timestamp or datetime.utcnow()).isoformat(),
+        "data": data,
+    }
+    if event_id is not None:
+        event["event_id"] = str(event_id)
+    return json.dumps(event).encode()
+
+
+def message_properties(event_id=None) -> pika.BasicProperties:
+    if event_id is None:
+        return PERSISTENT
+    return pika.BasicProperties(delivery_mode=2, content_type="application/json", message_id=str(event_id))
+
+
+class PendingConfirms:
+    """Messages published on the current channel and not confirmed yet, by delivery tag."""
+
+    def __init__(self):
+        self._messages = {}
+        self.last_tag = 0
+
+    def add(self, message) -> int:
+        self.last_tag += 1
+        self._messages[self.last_tag] = message
+        return self.last_tag
+
+    def settle(self, delivery_tag: int, multiple: bool) -> list:
+        """Remove and return the messages covered by one ack/nack.
+        With `multiple` the broker confirms every tag up to delivery_tag at once."""
+        if not multiple:
+            message = self._messages.pop(delivery_tag, None)
+            return [] if message is None else [message]
+
+        settled = []
+        # Tags are inserted in increasing order
+        for tag in list(self._messages):
+            if tag > delivery_tag:
+                break
+            settled.append(self._messages.pop(tag))
+        return settled
+
+    def reset(self) -> list:
+        """Unconfirmed messages of a lost channel, oldest first. Tags restart with the next channel."""
+        messages = list(self._messages.values())
+        self._messages.clear()
+        self.last_tag = 0
+        return messages
+
+    def __len__(self):
+        return len(self._messages)
+
+
+class EventPublisher:
+    """Publishes events to the topic exchange from one dedicated I/O thread.
+
+    pika connections are not thread-safe, so only the I/O thread touches the connection:
+    request threads put encoded events in a bounded buffer and wake it up. The thread keeps
+    one long-lived channel in confirm mode, declares the exchange once per channel and
+    publishes up to `max_in_flight` messages before waiting for the broker's (multiple) acks.
+
+    Delivery is at least once: nacked messages, and unconfirmed ones when the connection is
+    lost, are published again after reconnecting.
+    """
+
+    def __init__(self, parameters: pika.ConnectionParameters, exchange: str = RABBITMQ_EXCHANGE,
+                 buffer_size: int = RABBITMQ_PUBLISH_BUFFER, max_in_flight: int = RABBITMQ_MAX_IN_FLIGHT,
+                 block_timeout: float = RABBITMQ_PUBLISH_BLOCK_TIMEOUT, reconnect_delay: float = RABBITMQ_RECONNECT_DELAY):
+        self.parameters = parameters
+        self.exchange = exchange
+        self.max_in_flight = max_in_flight
+        self.block_timeout = block_timeout
+        self.reconnect_delay = reconnect_delay
+
+        # Unfinished tasks of the buffer count events until the broker confirms them
+        self.buffer = queue.Queue(maxsize=buffer_size)
+        self.pending = PendingConfirms()
+        self.retry = deque()
+
+        self.published = 0
+        self.confirmed = 0
+        self.nacked = 0
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+        self._connection = None
+        self._channel = None
+        self._stopping = False
+        self._wake_pending = threading.Event()
+        self._thread = None
+
+    # Any thread
+
+    def start(self):
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="rabbitmq-publisher", daemon=True)
+        self._thread.start()
+
+    def publish(self, event_type: str, data: dict, event_id=None, timestamp: datetime = None) -> bool:
+        """Queue an event for publishing. Returns False when the buffer stays full.
+        `event_id` is sent as message_id so consumers can discard redeliveries."""
+        message = (event_type, encode_event(event_type, data, event_id, timestamp), message_properties(event_id))
+        try:
+            self.buffer.put(message, timeout=self.block_timeout)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+            logging.error(f"RabbitMQ publish buffer full, dropping {event_type} event")
+            return False
+        self._wake()
+        return True
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until every queued event is confirmed by the broker."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.buffer.all_tasks_done:
+            while self.buffer.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.buffer.all_tasks_done.wait(remaining)
+        return True
+
+    def stop(self, timeout: float = 5):
+        flushed = self.flush(timeout)
+        self._stopping = True
+        connection = self._connection
+        if connection is not None:
+            try:
+                connection.ioloop.add_callback_threadsafe(self._close_connection)
+            except Exception:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if not flushed:
+            print(f"⚠️ {self.buffer.unfinished_tasks} RabbitMQ events not confirmed on shutdown.")
+
+    def stats(self) -> dict:
+        return {
+            "buffered": self.buffer.qsize(),
+            "in_flight": len(self.pending),
+            "published": self.published,
+            "confirmed": self.confirmed,
+            "nacked": self.nacked,
+            "dropped": self.dropped,
+        }
+
+    def _wake(self):
+        # One scheduled drain serves every event queued before it runs
+        if self._wake_pending.is_set():
+            return
+        self._wake_pending.set()
+        connection = self._connection
+        if connection is None:
+            return  # Reconnecting, drained once the channel is ready
+        try:
+            connection.ioloop.add_callback_threadsafe(self._drain)
+        except Exception:
+            pass
+
+    # I/O thread
+
+    def _run(self):
+        while not self._stopping:
+            self._connection = pika.SelectConnection(
+                self.parameters,
+                on_open_callback=self._on_connection_open,
+                on_open_error_callback=self._on_connection_open_error,
+                on_close_callback=self._on_connection_closed,
+            )
+            self._connection.ioloop.start()
+            self._connection = None
+            if not self._stopping:
+                time.sleep(self.reconnect_delay)
+
+    def _on_connection_open(self, connection):
+        connection.channel(on_open_callback=self._on_channel_open)
+
+    def _on_connection_open_error(self, connection, error):
+        print(f"⚠️ RabbitMQ connection failed: {error}. Retrying in {self.reconnect_delay}s...")
+        connection.ioloop.stop()
+
+    def _on_connection_closed(self, connection, reason):
+        self._channel = None
+        self._requeue_unconfirmed()
+        if not self._stopping:
+            print(f"⚠️ RabbitMQ connection lost: {reason}. Reconnecting in {self.reconnect_delay}s...")
+        connection.ioloop.stop()
+
+    def _on_channel_open(self, channel):
+        channel.add_on_close_callback(self._on_channel_closed)
+        channel.exchange_declare(
+            exchange=self.exchange,
+            exchange_type="topic",
+            durable=True,
+            callback=lambda frame: channel.confirm_delivery(
+                ack_nack_callback=self._on_delivery_confirmation,
+                callback=lambda frame: self._on_channel_ready(channel),
+            ),
+        )
+
+    def _on_channel_ready(self, channel):
+        self._channel = channel
+        print(f"✅ RabbitMQ publisher ready on exchange '{self.exchange}'.")
+        self._drain()
+
+    def _on_channel_closed(self, channel, reason):
+        self._channel = None
+        self._requeue_unconfirmed()
+        # A channel closed by the broker (e.g. a failed declare) is reopened with a new connection
+        connection = self._connection
+        if connection is not None and connection.is_open:
+            connection.close()
+
+    def _close_connection(self):
+        if self._connection is not None and self._connection.is_open:
+            self._connection.close()
+
+    def _requeue_unconfirmed(self):
+        unconfirmed = self.pending.reset()
+        if unconfirmed:
+            self.retry.extendleft(reversed(unconfirmed))
+
+    def _drain(self):
+        self._wake_pending.clear()
+        channel = self._channel
+        if channel is None or not channel.is_open:
+            return
+
+        while len(self.pending) < self.max_in_flight:
+            if self.retry:
+                message = self.retry.popleft()
+            else:
+                try:
+                    message = self.buffer.get_nowait()
+                except queue.Empty:
+                    break
+
+            event_type, body, properties = message
+            channel.basic_publish(
+                exchange=self.exchange,
+                routing_key=event_type,
+                body=body,
+                properties=properties,
+            )
+            self.pending.add(message)
+            self.published += 1
+
+    def _on_delivery_confirmation(self, frame):
+        method = frame.method
+        messages = self.pending.settle(method.delivery_tag, method.multiple)
+        if isinstance(method, pika.spec.Basic.Ack):
+            self.confirmed += len(messages)
+            for _ in messages:
+                self.buffer.task_done()
+        else:
+            self.nacked += len(messages)
+            # Ahead of newer events waiting for a retry, in their original order
+            self.retry.extendleft(reversed(messages))
+            logging.warning(f"RabbitMQ nacked {len(messages)} events, publishing them again")
+        self._drain()
@@ -1,32 +1,31 @@
 import pika
-import json
-import time
-from datetime import datetime
+
+from .publisher import EventPublisher
 
 
 class RabbitMQService:
-    _connection = None
     _config = {}
-    _executor = None
+    _publisher = None
 
     @classmethod
-    def load_config(cls, host, user, password, port=5672, executor=None):
+    def load_config(cls, host, user, password, port=5672):
         cls._config = {
             "host": host,
             "user": user,
             "password": password,
             "port": port,
         }
-        cls._executor = executor
+        cls._publisher = EventPublisher(cls._connection_parameters())
+        cls._publisher.start()
         print(f"🔌 RabbitMQ configuration loaded: {host}:{port} as {user}.")
 
     @classmethod
-    def _create_connection(cls):
-        """create connection with safe defaults."""
+    def _connection_parameters(cls):
+        """connection parameters with safe defaults."""
         credentials = pika.PlainCredentials(
             cls._config["user"], cls._config["password"]
         )
-        params = pika.ConnectionParameters(
+        return pika.ConnectionParameters(
             host=cls._config["host"],
             port=cls._config["port"],
             credentials=credentials,
@@ -35,83 +34,40 @@ class RabbitMQService:
             connection_attempts=3,
             retry_delay=3,
         )
-        cls._connection = pika.BlockingConnection(params)
-        return cls._connection
 
     @classmethod
-    def _get_connection(cls):
-        """Return an active connection, recreate if needed."""
-        if cls._connection is None or cls._connection.is_closed:
-            cls._connection = cls._create_connection()
-        return cls._connection
+    def publish_event(cls, event_type: str, data: dict, timeout: float = 10):
+        """Publish an event and wait until the broker confirms it (and the ones queued before)."""
+        if cls.publish_event_async(event_type, data) and not cls._publisher.flush(timeout):
+            print(f"❌ Event not confirmed after {timeout}s: {event_type}")
 
     @classmethod
-    def publish_event(cls, event_type: str, data: dict, retries: int = 3):
-        """Publish an event with reconnection + retry logic."""
-        for attempt in range(1, retries + 1):
-            try:
-                connection = cls._get_connection()
-                channel = connection.channel()
-
-                # Ensure exchange exists
-                channel.exchange_declare(
-                    exchange="events",
-                    exchange_type="topic",
-                    durable=True,
-                )
-
-                event = {
-                    "event_type": event_type,
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "data": data,
-                }
-
-                channel.basic_publish(
-                    exchange="events",
-                    routing_key=event_type,
-                    body=json.dumps(event),
-                    properties=pika.BasicProperties(delivery_mode=2),
-                )
-
-                channel.close()
-                print(f"✅ Event sent: {event_type}")
-                return
+    def publish_event_async(cls, event_type: str, data: dict) -> bool:
+        """Queue an event for the publisher thread. Returns False if it was dropped."""
+        if cls._publisher is None:
+            print(f"❌ RabbitMQ is not configured, event not sent: {event_type}")
+            return False
+        return cls._publisher.publish(event_type, data)
 
-            except (
-                pika.exceptions.StreamLostError,
-                pika.exceptions.ConnectionClosedByBroker,
-                pika.exceptions.AMQPConnectionError,
-            ) as e:
-                print(f"⚠️ Connection lost: {e}. Retrying ({attempt}/{retries})...")
-                cls._safe_close()
-                time.sleep(2**attempt)  # exponential backoff
-
-            except Exception as e:
-                print(f"❌ Error sending event: {e}")
-                cls._safe_close()
-                break
-
-        print(f"❌ Failed to send event after {retries} attempts: {event_type}")
-
-    
     @classmethod
-    def publish_event_async(cls, event_type: str, data: dict):
-        if cls._executor:
-            cls._executor.submit(cls.publish_event, event_type, data)
-        else:
-            cls.publish_event(event_type, data)
+    def publish_batch(cls, events: list, timeout: float = 10) -> bool:
+        """Publish (event_type, data, event_id, timestamp) tuples in order and wait for the
+        broker's confirms. Returns False if any was dropped or not confirmed in time."""
+        if cls._publisher is None:
+            print(f"❌ RabbitMQ is not configured, {len(events)} events not sent.")
+            return False
+        for event_type, data, event_id, timestamp in events:
+            if not cls._publisher.publish(event_type, data, event_id, timestamp):
+                return False
+        return cls._publisher.flush(timeout)
 
     @classmethod
-    def _safe_close(cls):
-        try:
-            if cls._connection and not cls._connection.is_closed:
-                cls._connection.close()
-        except Exception:
-            pass
-        cls._connection = None
+    def stats(cls) -> dict:
+        return cls._publisher.stats() if cls._publisher else {}
 
     @classmethod
     def close(cls):
-        cls._safe_close()
+        if cls._publisher is not None:
+            cls._publisher.stop()
+            cls._publisher = None
         print("🔌 RabbitMQ connection closed.")
-
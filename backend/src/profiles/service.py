@@ -7,7 +7,8 @@ from sqlalchemy.orm import Session
 from src.entities.company import Company, CompanyType
 from src.entities.educational_institution import EducationalInstitution
 from src.entities.user import User
-from src.messaging.rabbitmq_service import RabbitMQService
+from src.messaging import outbox
+from src.messaging.outbox import OutboxRelay
 
 from . import models
 from src.auth.models import TokenData
@@ -108,11 +109,11 @@ def update_profile(current_user: TokenData, db: Session, profile_id: UUID, profi
     if profile_update.skills is not None:
         profile.skills = profile_update.skills
     
+    send_profile_changed_event(db, profile, "profile.updated")
     db.commit()
     db.refresh(profile)
 
-    send_profile_changed_event(profile, "profile.updated")
-    
+    OutboxRelay.notify()
 
     logging.info(f"Profile {profile_id} updated by user {current_user.get_uuid()}")
     return ProfileResponse(
@@ -380,10 +381,6 @@ def profile_to_dict(profile: UserProfile):
     }
 
 
-def send_profile_changed_event(profile, queue):
-    data = profile_to_dict(profile)
-    try:
-        RabbitMQService.publish_event_async(queue, data)
-        
-    except Exception as e:
-        logging.error(f"Failed to send {queue} event for profile {profile.id}. Error: {str(e)}")
\ No newline at end of file
+def send_profile_changed_event(db: Session, profile, queue):
+    """Stage the event in the current transaction; the OutboxRelay publishes it after commit."""
+    outbox.add_event(db, queue, profile.id, profile_to_dict(profile))
\ No newline at end of file
@@ -0,0 +1,109 @@
+import json
+from types import SimpleNamespace
+import pika
+from src.messaging.publisher import EventPublisher, PendingConfirms, encode_event
+
+
+class FakeChannel:
+    is_open = True
+
+    def __init__(self):
+        self.published = []
+
+    def basic_publish(self, exchange, routing_key, body, properties=None):
+        self.published.append(routing_key)
+
+
+def confirm(method_class, delivery_tag, multiple=False):
+    return SimpleNamespace(method=method_class(delivery_tag=delivery_tag, multiple=multiple))
+
+
+def publisher(**kwargs):
+    # Not started: events stay in the buffer until the test drains them
+    return EventPublisher(pika.ConnectionParameters(), **kwargs)
+
+
+class TestPendingConfirms:
+    def test_multiple_ack_settles_every_tag_up_to_it(self):
+        pending = PendingConfirms()
+        for message in "abcd":
+            pending.add(message)
+
+        assert pending.settle(3, multiple=True) == ["a", "b", "c"]
+        assert pending.settle(4, multiple=False) == ["d"]
+        assert len(pending) == 0
+
+    def test_reset_returns_unconfirmed_and_restarts_tags(self):
+        pending = PendingConfirms()
+        pending.add("a")
+        pending.add("b")
+
+        assert pending.reset() == ["a", "b"]
+        assert pending.add("c") == 1
+
+
+class TestEventPublisher:
+    def test_encode_event(self):
+        event = json.loads(encode_event("job.created", {"job_id": "1"}))
+        assert event["event_type"] == "job.created"
+        assert event["data"] == {"job_id": "1"}
+
+    def test_full_buffer_drops_events(self):
+        events = publisher(buffer_size=2, block_timeout=0)
+
+        assert events.publish("job.created", {})
+        assert events.publish("job.created", {})
+        assert not events.publish("job.created", {})
+        assert events.stats()["dropped"] == 1
+
+    def test_in_flight_limit_and_batched_acks(self):
+        events = publisher(max_in_flight=2)
+        channel = events._channel = FakeChannel()
+        for i in range(3):
+            events.publish(f"job.{i}", {})
+
+        events._drain()
+        assert channel.published == ["job.0", "job.1"]
+
+        # One ack for both messages frees the window for the third
+        events._on_delivery_confirmation(confirm(pika.spec.Basic.Ack, 2, multiple=True))
+        assert channel.published == ["job.0", "job.1", "job.2"]
+
+        events._on_delivery_confirmation(confirm(pika.spec.Basic.Ack, 3))
+        assert events.flush(timeout=0)
+        assert events.stats()["confirmed"] == 3
+
+    def test_nacked_and_unconfirmed_events_are_published_again(self):
+        events = publisher()
+        channel = events._channel = FakeChannel()
+        events.publish("job.created", {})
+        events.publish("job.updated", {})
+        events._drain()
+
+        events._on_delivery_confirmation(confirm(pika.spec.Basic.Nack, 1))
+        assert channel.published == ["job.created", "job.updated", "job.created"]
+
+        # Channel lost before the remaining confirms: both go out again on the next channel
+        events._requeue_unconfirmed()
+        channel = events._channel = FakeChannel()
+        events._drain()
+        assert channel.published == ["job.updated", "job.created"]
+        assert not events.flush(timeout=0)
+
+    def test_nacked_events_go_before_newer_retries(self):
+        events = publisher(max_in_flight=2)
+        events._channel = FakeChannel()
+        for i in range(3):
+            events.publish(f"job.{i}", {})
+        events._drain()
+        events._requeue_unconfirmed()
+
+        # Reconnected with room for one: job.0 is in flight, job.1 waits in retry
+        events.max_in_flight = 1
+        channel = events._channel = FakeChannel()
+        events._drain()
+        events._on_delivery_confirmation(confirm(pika.spec.Basic.Nack, 1))
+        events._on_delivery_confirmation(confirm(pika.spec.Basic.Ack, 2))
+        events._on_delivery_confirmation(confirm(pika.spec.Basic.Ack, 3))
+
+        assert channel.published == ["job.0", "job.0", "job.1", "job.2"]
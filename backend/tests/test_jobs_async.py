@@ -0,0 +1,105 @@
+from datetime import datetime
+from uuid import uuid4
+import pytest
+from src.auth.models import TokenData
+from src.auth.service import require_any_role
+from src.entities.user import Role
+from src.exceptions import AuthorizationError, JobNotFoundError, UserNotFoundError
+from src.jobs import async_service
+from src.jobs import service as jobs_service
+
+
+class Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchall(self):
+        return self.rows
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+
+class AsyncCountingSession:
+    """Stands in for an AsyncSession: counts the statements sent and returns canned rows."""
+    def __init__(self, rows, user=None):
+        self.rows = rows
+        self.user = user
+        self.statements = []
+
+    async def execute(self, stmt, params=None):
+        self.statements.append((str(stmt), params))
+        return Result(self.rows)
+
+    async def get(self, entity, ident):
+        return self.user
+
+    async def rollback(self):
+        pass
+
+
+def job_row(job_id):
+    return (job_id, "Backend developer", "Python APIs", True, "FullTime", None, 1000, 2000, 2, "USD",
+            None, datetime(2025, 1, 1), "ACME", "Remote", "CO", None, False)
+
+
+class TestJobsAsync:
+    async def test_get_jobs_by_ids_runs_the_sync_query(self):
+        job_ids = [uuid4() for _ in range(3)]
+        db = AsyncCountingSession([job_row(job_id) for job_id in job_ids])
+
+        jobs = await async_service.get_jobs_by_ids(None, db, job_ids)
+
+        assert db.statements == [(str(jobs_service.JOBS_BY_IDS_QUERY), {"job_ids": job_ids, "user_id": None})]
+        assert [job.id for job in jobs] == job_ids
+
+    async def test_get_job_by_id_not_found(self):
+        with pytest.raises(JobNotFoundError):
+            await async_service.get_job_by_id(None, AsyncCountingSession([]), uuid4())
+
+    async def test_related_jobs_fall_back_in_order(self, monkeypatch):
+        job_id, related_id = uuid4(), uuid4()
+        calls = []
+
+        async def related_job_ids(job_id):
+            calls.append("engine")
+            return None
+
+        async def pgvector(db, job_id, k=5):
+            calls.append("pgvector")
+            return []
+
+        async def fallback(db, job_id, k=5):
+            calls.append("fallback")
+            return [related_id]
+
+        monkeypatch.setattr(jobs_service, "RELATED_JOBS_ENGINE", "faiss")
+        monkeypatch.setattr(async_service.RecommendationEngine, "related_job_ids", related_job_ids)
+        monkeypatch.setattr(async_service, "get_related_job_ids_pgvector", pgvector)
+        monkeypatch.setattr(async_service, "get_related_job_ids_fallback", fallback)
+
+        jobs = await async_service.get_related_jobs(None, AsyncCountingSession([job_row(related_id)]), job_id)
+
+        assert calls == ["engine", "pgvector", "fallback"]
+        assert [job.id for job in jobs] == [related_id]
+
+    async def test_recommendations_for_unknown_user(self):
+        with pytest.raises(UserNotFoundError):
+            await async_service.get_job_recommendations(TokenData(user_id=str(uuid4())), AsyncCountingSession([]), None)
+
+
+class TestRequireAnyRole:
+    async def test_awaits_async_endpoints(self):
+        @require_any_role([Role.CANDIDATE])
+        async def endpoint(current_user):
+            return "ok"
+
+        assert await endpoint(current_user=TokenData(user_id=str(uuid4()), role=Role.CANDIDATE.name)) == "ok"
+
+    async def test_rejects_other_roles(self):
+        @require_any_role([Role.CANDIDATE])
+        async def endpoint(current_user):
+            return "ok"
+
+        with pytest.raises(AuthorizationError):
+            await endpoint(current_user=TokenData(user_id=str(uuid4()), role=Role.ADMIN.name))
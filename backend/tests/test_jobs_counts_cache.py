@@ -0,0 +1,88 @@
+from uuid import uuid4
+from src.jobs import counts_cache as counts_cache_module
+from src.jobs.counts_cache import FacetCountsCache, cache_key
+from src.jobs.models import JobCountsResponse, JobFilters
+from src.jobs.service import active_jobs_counts_query
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def counts(total):
+    return [JobCountsResponse(type="TOTAL", id="0", name="Total", count=total)]
+
+
+class TestJobsCountsCache:
+    def test_counts_without_query_come_from_the_facet_counts_view(self):
+        for query in (None, "", "   "):
+            stmt, params = active_jobs_counts_query(JobFilters(country_code="CO", query=query))
+
+            assert "FROM job_facet_counts" in str(stmt)
+            assert params["query"] == ""
+
+    def test_counts_with_query_search_active_jobs(self):
+        stmt, params = active_jobs_counts_query(JobFilters(country_code="CO", query=" python "))
+
+        assert "job_facet_counts" not in str(stmt)
+        assert params["query"] == "python"
+
+    def test_cache_key_ignores_order_case_and_paging(self):
+        sector_a, sector_b = uuid4(), uuid4()
+        a = JobFilters(country_code="CO", query="Python  Developer", sector_ids=[sector_a, sector_b], salary_ranges="3,1", page=1)
+        b = JobFilters(country_code="CO", query="python developer", sector_ids=[sector_b, sector_a], salary_ranges=[1, 3], page=7, sort_by="date")
+        assert cache_key(a) == cache_key(b)
+
+    def test_cache_key_keeps_filters_that_change_counts(self):
+        base = JobFilters(country_code="CO", query="")
+        assert cache_key(base) != cache_key(JobFilters(country_code="MX", query=""))
+        assert cache_key(base) != cache_key(JobFilters(country_code="CO", query=None))
+        assert cache_key(base) != cache_key(JobFilters(country_code="CO", query="", salary_ranges="2"))
+
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = FacetCountsCache(ttl=60, clock=clock)
+        filters = JobFilters(country_code="CO", query="")
+
+        cache.put(filters, counts(5))
+        clock.now = 59
+        assert cache.get(filters) == counts(5)
+        clock.now = 60
+        assert cache.get(filters) is None
+        assert len(cache) == 0
+
+    def test_oldest_entry_is_evicted(self):
+        cache = FacetCountsCache(ttl=60, max_size=2, clock=FakeClock())
+        filters = [JobFilters(country_code=code, query="") for code in ("CO", "MX", "PE")]
+        for i, f in enumerate(filters):
+            cache.put(f, counts(i))
+
+        assert cache.get(filters[0]) is None
+        assert cache.get(filters[2]) == counts(2)
+
+    def test_job_event_invalidates_and_schedules_one_refresh(self, monkeypatch):
+        started = []
+
+        class FakeTimer:
+            def __init__(self, delay, function):
+                self.function = function
+                self.daemon = False
+
+            def start(self):
+                started.append(self)
+
+        monkeypatch.setattr(counts_cache_module.threading, "Timer", FakeTimer)
+        monkeypatch.setattr(counts_cache_module, "_refresh_timer", None)
+        filters = JobFilters(country_code="CO", query="")
+        counts_cache_module.counts_cache.put(filters, counts(1))
+
+        counts_cache_module.on_job_event("job.created")
+        counts_cache_module.on_job_event("job.updated")
+
+        assert counts_cache_module.counts_cache.get(filters) is None
+        assert len(started) == 1
+        monkeypatch.setattr(counts_cache_module, "_refresh_timer", None)
@@ -0,0 +1,79 @@
+import struct
+import pytest
+from datetime import datetime
+from uuid import uuid4
+from src.exceptions import InvalidCursorError
+from src.jobs import pagination
+from src.jobs.pagination import decode_cursor, encode_cursor, next_page, page_params
+from src.jobs.service import RANK_SORT_KEY
+
+
+def float4(value):
+    """A real widened to double precision, as ts_rank_cd(...)::float8 returns it."""
+    return struct.unpack("f", struct.pack("f", value))[0]
+
+
+class TestJobsPagination:
+    @pytest.mark.parametrize("sort_by, sort_key", [
+        ("relevance", 0.30000001192092896),
+        ("date", datetime(2025, 3, 1, 12, 30, 15, 123456)),
+        ("salary", -1),
+        ("similarity", 0.8731),
+        ("applied", datetime(2025, 1, 2)),
+    ])
+    def test_cursor_roundtrip(self, sort_by, sort_key):
+        last_id = uuid4()
+        cursor = encode_cursor(sort_by, sort_key, last_id)
+        assert "=" not in cursor
+        assert decode_cursor(cursor, sort_by) == (sort_key, last_id)
+
+    def test_cursor_from_other_ordering_is_rejected(self):
+        cursor = encode_cursor("date", datetime(2025, 1, 1), uuid4())
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(cursor, "salary")
+
+    @pytest.mark.parametrize("cursor", ["", "not a cursor", "W10", encode_cursor("salary", "abc", uuid4())])
+    def test_invalid_cursor(self, cursor):
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(cursor, "salary")
+
+    def test_page_params(self):
+        assert page_params("date", None, 3, 20) == {"limit": 21, "offset": 40}
+        assert page_params("date", None, None, 20) == {"limit": 21, "offset": 0}
+
+        last_id = uuid4()
+        params = page_params("salary", encode_cursor("salary", 5000, last_id), 3, 20)
+        assert params == {"cursor_key": 5000, "cursor_id": last_id, "limit": 21, "offset": 0}
+
+    def test_keyset_filter_only_in_cursor_mode(self):
+        assert pagination.keyset_filter("j.created_at", "j.id", None) == ""
+        assert pagination.keyset_filter("j.created_at", "j.id", "abc") == "AND (j.created_at, j.id) < (:cursor_key, :cursor_id)"
+
+    def test_next_page(self):
+        ids = [uuid4() for _ in range(5)]
+        results = [("job", 10 - i, job_id) for i, job_id in enumerate(ids)]
+
+        rows, cursor = next_page(results, "salary", 4)
+        assert rows == results[:4]
+        assert decode_cursor(cursor, "salary") == (7, ids[3])
+
+        rows, cursor = next_page(results, "salary", 5)
+        assert rows == results
+        assert cursor is None
+
+    def test_relevance_pages_keep_tied_ranks(self):
+        # ts_rank_cd ranks tie a lot; each rank spans a page boundary of 4 rows
+        rows = sorted(((float4(rank), uuid4()) for rank in [0.7] * 5 + [0.3] * 5 + [0.1] * 5), reverse=True)
+        assert RANK_SORT_KEY.endswith("::float8")
+
+        seen, cursor = [], None
+        while True:
+            params = page_params("relevance", cursor, None, 4)
+            # The keyset filter, with the sort key and the cursor key both double precision
+            after = [row for row in rows if not cursor or row < (params["cursor_key"], params["cursor_id"])]
+            page, cursor = next_page([("job", key, job_id) for key, job_id in after[:params["limit"]]], "relevance", 4)
+            seen.extend(job_id for _, _, job_id in page)
+            if cursor is None:
+                break
+
+        assert seen == [job_id for _, job_id in rows]
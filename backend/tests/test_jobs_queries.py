@@ -0,0 +1,83 @@
+from collections import namedtuple
+from datetime import datetime
+from uuid import uuid4
+import pytest
+from src.auth.models import TokenData
+from src.exceptions import JobNotFoundError
+from src.jobs import service as jobs_service
+
+
+JobDetailRow = namedtuple("JobDetailRow", [
+    "id", "job_title", "job_description", "responsibilities", "skills", "benefits", "employment_type", "remote",
+    "salary_min", "salary_max", "code", "experience_min_years", "tags", "created_at", "updated_at", "expires_at",
+    "is_active", "location", "country_code", "company_name", "image_url", "has_applied",
+])
+
+
+class Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchall(self):
+        return self.rows
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+
+class CountingSession:
+    """Stands in for a Session: counts the statements sent and returns canned rows."""
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    def execute(self, stmt, params=None):
+        self.statements.append((str(stmt), params))
+        return Result(self.rows)
+
+    def query(self, *args):
+        raise AssertionError("ORM queries are not expected")
+
+
+def job_row(job_id, has_applied=False):
+    return (job_id, "Backend developer", "Python APIs", True, "FullTime", None, 1000, 2000, 2, "USD",
+            None, datetime(2025, 1, 1), "ACME", "Remote", "CO", None, has_applied)
+
+
+class TestJobsQueries:
+    def test_get_job_by_id_runs_one_query(self):
+        job_id, user = uuid4(), TokenData(user_id=str(uuid4()))
+        row = JobDetailRow(job_id, "Backend developer", "Description", "Responsibilities", "Skills", "Benefits", "FullTime", True,
+                           1000, 2000, "USD", 2, ["python"], datetime(2025, 1, 1), None, None,
+                           True, "Remote", "CO", "ACME", None, True)
+        db = CountingSession([row])
+
+        job = jobs_service.get_job_by_id(user, db, job_id)
+
+        assert len(db.statements) == 1
+        assert db.statements[0][1] == {"job_id": job_id, "user_id": user.get_uuid()}
+        assert job.id == job_id
+        assert job.employment_type == "Full-time"
+        assert job.currency_code == "USD"
+        assert job.has_applied
+
+    def test_get_job_by_id_not_found(self):
+        with pytest.raises(JobNotFoundError):
+            jobs_service.get_job_by_id(None, CountingSession([]), uuid4())
+
+    def test_get_jobs_by_ids_runs_one_query_in_engine_order(self):
+        job_ids = [uuid4() for _ in range(5)]
+        db = CountingSession([job_row(job_id) for job_id in job_ids])
+
+        jobs = jobs_service.get_jobs_by_ids(None, db, job_ids)
+
+        assert len(db.statements) == 1
+        statement, params = db.statements[0]
+        assert "WITH ORDINALITY" in statement and "ORDER BY r.position" in statement
+        assert params == {"job_ids": job_ids, "user_id": None}
+        assert [job.id for job in jobs] == job_ids
+
+    def test_get_jobs_by_ids_without_ids_runs_no_query(self):
+        db = CountingSession([])
+        assert jobs_service.get_jobs_by_ids(None, db, []) == []
+        assert db.statements == []
@@ -0,0 +1,136 @@
+from collections import namedtuple
+from datetime import datetime
+from uuid import uuid4
+import pytest
+from src.entities.currency import Currency  # noqa: F401, Country's relationship needs it when mappers configure
+from src.messaging import outbox
+from src.messaging.outbox import OutboxRelay, latest_events
+from src.messaging.rabbitmq_service import RabbitMQService
+
+
+OutboxRow = namedtuple("OutboxRow", ["id", "event_id", "event_type", "aggregate_id", "payload", "created_at"])
+
+
+def row(id, event_type, aggregate_id):
+    return OutboxRow(id, uuid4(), event_type, aggregate_id, {"n": id}, datetime(2025, 1, 1))
+
+
+class Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalar(self):
+        return self.rows
+
+    def fetchall(self):
+        return self.rows
+
+
+class OutboxSession:
+    """Stands in for a Session of the relay: lock result, pending rows, age of the oldest unpublished
+    row, and what was run."""
+    def __init__(self, rows, locked=True, lag=0.5):
+        self.rows = rows
+        self.locked = locked
+        self.lag = lag
+        self.statements = []
+        self.added = []
+        self.committed = self.rolled_back = self.closed = False
+
+    def execute(self, stmt, params=None):
+        self.statements.append((str(stmt), params))
+        if "pg_try_advisory_xact_lock" in str(stmt):
+            return Result(self.locked)
+        if "min(created_at)" in str(stmt):
+            return Result(self.lag)
+        return Result(self.rows)
+
+    def add(self, entity):
+        self.added.append(entity)
+
+    def flush(self):
+        self.statements.append(("flush", None))
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def relay(monkeypatch):
+    monkeypatch.setattr(OutboxRelay, "published", 0)
+    monkeypatch.setattr(OutboxRelay, "skipped", 0)
+    monkeypatch.setattr(OutboxRelay, "failures", 0)
+    monkeypatch.setattr(OutboxRelay, "lag_seconds", 0.0)
+    monkeypatch.setattr(OutboxRelay, "_last_cleanup", float("inf"))
+    return OutboxRelay
+
+
+class TestOutbox:
+    def test_add_event_stages_in_the_session(self):
+        db, job_id = OutboxSession([]), uuid4()
+        outbox.add_event(db, "job.created", job_id, {"job_id": str(job_id)})
+
+        assert not db.committed
+        assert db.added[0].event_type == "job.created"
+        assert db.added[0].aggregate_id == job_id
+
+    def test_add_event_locks_the_aggregate_after_flushing_it(self):
+        db, job_id = OutboxSession([]), uuid4()
+        outbox.add_event(db, "job.updated", job_id, {"job_id": str(job_id)})
+
+        (flush, _), (lock, params) = db.statements
+        assert flush == "flush"
+        assert "pg_advisory_xact_lock" in lock and params["aggregate_id"] == str(job_id)
+
+    def test_latest_events_skips_superseded_events(self):
+        a, b = uuid4(), uuid4()
+        rows = [row(1, "job.created", a), row(2, "job.updated", a), row(3, "job.updated", b), row(4, "job.updated", a)]
+
+        assert [r.id for r in latest_events(rows)] == [1, 3, 4]
+
+    def test_relay_publishes_in_order_and_marks_every_row(self, relay, monkeypatch):
+        a = uuid4()
+        rows = [row(1, "job.updated", a), row(2, "profile.updated", uuid4()), row(3, "job.updated", a)]
+        db, sent = OutboxSession(rows, lag=2.0), []
+        monkeypatch.setattr(relay, "_session_factory", lambda: db)
+        monkeypatch.setattr(RabbitMQService, "publish_batch", lambda events, timeout: sent.extend(events) or True)
+
+        assert relay.relay_batch() == 3
+
+        assert [(event_type, event_id) for event_type, _, event_id, _ in sent] == [("profile.updated", rows[1].event_id), ("job.updated", rows[2].event_id)]
+        assert db.statements[-1][1] == {"ids": [1, 2, 3]}
+        assert db.committed and db.closed
+        assert relay.published == 2 and relay.skipped == 1
+        assert relay.lag_seconds == 2.0
+
+    def test_unconfirmed_batch_stays_pending(self, relay, monkeypatch):
+        db = OutboxSession([row(1, "job.created", uuid4())])
+        monkeypatch.setattr(relay, "_session_factory", lambda: db)
+        monkeypatch.setattr(RabbitMQService, "publish_batch", lambda events, timeout: False)
+
+        assert relay.relay_batch() == 0
+        assert db.rolled_back and not db.committed
+        assert not any("UPDATE outbox_event" in statement for statement, _ in db.statements)
+        assert relay.failures == 1
+
+    def test_other_relay_holds_the_lock(self, relay, monkeypatch):
+        db = OutboxSession([row(1, "job.created", uuid4())], locked=False)
+        monkeypatch.setattr(relay, "_session_factory", lambda: db)
+
+        assert relay.relay_batch() == 0
+        assert len(db.statements) == 1 and db.rolled_back
+
+    def test_lag_counts_events_held_back_by_open_transactions(self, relay, monkeypatch):
+        # No row is past the xmin filter yet, but one has been waiting for a minute
+        db = OutboxSession([], lag=60.0)
+        monkeypatch.setattr(relay, "_session_factory", lambda: db)
+
+        assert relay.relay_batch() == 0
+        assert relay.lag_seconds == 60.0
+        assert db.committed
@@ -0,0 +1,174 @@
+import asyncio
+from uuid import uuid4
+import httpx
+import pytest
+from src.jobs import service as jobs_service
+from src.jobs.recommendation_engine import CircuitBreaker, RecommendationEngine
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """RecommendationEngine answering through `handler`, with a fresh breaker."""
+    clock = FakeClock()
+    monkeypatch.setattr(RecommendationEngine, "breaker", CircuitBreaker(2, 30, clock=clock))
+    calls = []
+
+    def use(handler):
+        def counting_handler(request):
+            calls.append(request)
+            return handler(request)
+        RecommendationEngine.open(transport=httpx.MockTransport(counting_handler))
+        return calls, clock
+
+    yield use
+    RecommendationEngine._client = None
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(3, 30, clock=clock)
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.allow()
+
+        breaker.record_failure()
+        assert breaker.is_open
+        assert not breaker.allow()
+
+    def test_half_open_lets_one_trial_through(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(1, 30, clock=clock)
+        breaker.record_failure()
+
+        clock.now = 30
+        assert breaker.allow()
+        assert not breaker.allow()
+
+        breaker.record_failure()
+        assert not breaker.allow()
+        clock.now = 60
+        assert breaker.allow()
+        breaker.record_success()
+        assert not breaker.is_open
+        assert breaker.allow()
+
+    def test_released_trial_lets_the_next_call_through(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(1, 30, clock=clock)
+        breaker.record_failure()
+
+        clock.now = 30
+        assert breaker.allow()
+        breaker.release_trial()
+        assert breaker.allow()
+
+
+class TestRecommendationEngine:
+    async def test_returns_ids_in_engine_order(self, engine):
+        job_ids = [str(uuid4()) for _ in range(3)]
+        calls, _ = engine(lambda request: httpx.Response(200, json=[[job_id, 0.9] for job_id in job_ids]))
+
+        assert await RecommendationEngine.related_job_ids(uuid4()) == job_ids
+        assert len(calls) == 1
+
+    async def test_failures_open_the_circuit(self, engine):
+        def timeout(request):
+            raise httpx.ReadTimeout("slow worker", request=request)
+        calls, clock = engine(timeout)
+
+        assert await RecommendationEngine.related_job_ids(uuid4()) is None
+        assert await RecommendationEngine.related_job_ids(uuid4()) is None
+        assert await RecommendationEngine.related_job_ids(uuid4()) is None
+        assert len(calls) == 2
+
+        clock.now = 30
+        assert await RecommendationEngine.related_job_ids(uuid4()) is None
+        assert len(calls) == 3
+
+    async def test_malformed_body_counts_as_failure(self, engine):
+        calls, clock = engine(lambda request: httpx.Response(200, json=[None, 3]))
+
+        assert await RecommendationEngine.related_job_ids(uuid4()) is None
+        assert await RecommendationEngine.related_job_ids(uuid4()) is None
+        assert RecommendationEngine.breaker.is_open
+
+        clock.now = 30
+        assert await RecommendationEngine.related_job_ids(uuid4()) is None
+        clock.now = 60
+        assert await RecommendationEngine.related_job_ids(uuid4()) is None
+        assert len(calls) == 4
+
+    async def test_cancelled_trial_does_not_keep_the_circuit_open(self, engine, monkeypatch):
+        calls, clock = engine(lambda request: httpx.Response(503))
+        await RecommendationEngine.related_job_ids(uuid4())
+        await RecommendationEngine.related_job_ids(uuid4())
+
+        async def cancelled(url):
+            raise asyncio.CancelledError()
+        clock.now = 30
+        monkeypatch.setattr(RecommendationEngine._client, "get", cancelled)
+        with pytest.raises(asyncio.CancelledError):
+            await RecommendationEngine.related_job_ids(uuid4())
+
+        engine(lambda request: httpx.Response(200, json=[]))
+        assert await RecommendationEngine.related_job_ids(uuid4()) == []
+        assert not RecommendationEngine.breaker.is_open
+
+    async def test_client_errors_do_not_open_the_circuit(self, engine):
+        calls, _ = engine(lambda request: httpx.Response(400, json={"error": "Invalid job ID format"}))
+        for _ in range(3):
+            assert await RecommendationEngine.related_job_ids(uuid4()) is None
+        assert len(calls) == 3
+
+    async def test_related_jobs_fall_back_to_pgvector_then_sql(self, engine, monkeypatch):
+        engine(lambda request: httpx.Response(503))
+        job_id, vector_ids, text_ids = uuid4(), [uuid4(), uuid4()], [uuid4()]
+        loaded = []
+        monkeypatch.setattr(jobs_service, "get_related_job_ids_pgvector", lambda db, source_id, k: vector_ids if source_id == job_id else [])
+        monkeypatch.setattr(jobs_service, "get_related_job_ids_fallback", lambda db, source_id, k: text_ids)
+        monkeypatch.setattr(jobs_service, "get_jobs_by_ids", lambda current_user, db, job_ids: loaded.append(job_ids) or [])
+
+        await jobs_service.get_related_jobs(None, None, job_id)
+        await jobs_service.get_related_jobs(None, None, uuid4())
+        assert loaded == [vector_ids, text_ids]
+
+    async def test_fewer_than_k_pgvector_jobs_do_not_fall_back(self, engine, monkeypatch):
+        engine(lambda request: httpx.Response(503))
+        vector_ids = [uuid4()]
+        loaded = []
+        monkeypatch.setattr(jobs_service, "get_related_job_ids_pgvector", lambda db, source_id, k: vector_ids)
+        monkeypatch.setattr(jobs_service, "get_related_job_ids_fallback", lambda db, source_id, k: pytest.fail("fallback called"))
+        monkeypatch.setattr(jobs_service, "get_jobs_by_ids", lambda current_user, db, job_ids: loaded.append(job_ids) or [])
+
+        await jobs_service.get_related_jobs(None, None, uuid4(), k=5)
+        assert loaded == [vector_ids]
+
+    def test_hnsw_scan_covers_the_overfetched_candidates(self):
+        params = jobs_service.related_jobs_pgvector_params(uuid4(), 5)
+
+        assert params["limit"] == 5 and params["candidates"] > 5
+        assert int(jobs_service.hnsw_params(5)["ef_search"]) >= params["candidates"]
+
+    async def test_pgvector_engine_skips_the_http_call(self, engine, monkeypatch):
+        calls, _ = engine(lambda request: httpx.Response(200, json=[]))
+        vector_ids = [uuid4()]
+        loaded = []
+        monkeypatch.setattr(jobs_service, "RELATED_JOBS_ENGINE", "pgvector")
+        monkeypatch.setattr(jobs_service, "get_related_job_ids_pgvector", lambda db, source_id, k: vector_ids)
+        monkeypatch.setattr(jobs_service, "get_jobs_by_ids", lambda current_user, db, job_ids: loaded.append(job_ids) or [])
+
+        await jobs_service.get_related_jobs(None, None, uuid4())
+        assert calls == []
+        assert loaded == [vector_ids]
@@ -13,3 +13,30 @@ $$ LANGUAGE plpgsql;
 CREATE TRIGGER trg_search_vector_update BEFORE INSERT OR UPDATE
 ON job_detail FOR EACH ROW EXECUTE FUNCTION jobs_search_vector_update();
 
+
+-- Keyset pagination: one index per (filter, sort key DESC, id DESC) ordering
+CREATE INDEX IF NOT EXISTS idx_job_entry_country_created ON public.job_entry (country_id, created_at DESC, id DESC) WHERE is_active;
+CREATE INDEX IF NOT EXISTS idx_job_entry_country_salary ON public.job_entry (country_id, (COALESCE(salary_min, -1)) DESC, id DESC) WHERE is_active;
+CREATE INDEX IF NOT EXISTS idx_job_recommendation_user_score ON public.job_recommendation (user_id, similarity_score DESC, job_id DESC);
+CREATE INDEX IF NOT EXISTS idx_job_application_job_applied ON public.job_application (job_id, applied_at DESC, user_id DESC);
+
+-- Salary bucket of each job (job_salary range containing its salary, a missing salary counts as 0).
+-- The API sets it on every write; re-run the backfill after changing the job_salary ranges.
+ALTER TABLE public.job_entry ADD COLUMN IF NOT EXISTS salary_range_id INT;
+UPDATE public.job_entry j SET salary_range_id = (
+	SELECT js.id FROM job_salary js
+	WHERE COALESCE(j.salary_min, 0) >= js.min_salary AND COALESCE(j.salary_max, 0) < js.max_salary
+	ORDER BY js.min_salary DESC
+	LIMIT 1
+);
+CREATE INDEX IF NOT EXISTS idx_job_entry_country_salary_range ON public.job_entry (country_id, salary_range_id) WHERE is_active;
+
+-- Facet counts of /jobs/counts for searches without query, refreshed by the API after job events
+CREATE MATERIALIZED VIEW IF NOT EXISTS public.job_facet_counts AS
+	SELECT j.country_id, c.sector_id, j.salary_range_id, count(1) AS job_count
+	FROM job_entry j
+	JOIN company c ON c.id = j.company_id
+	WHERE j.is_active = true
+	GROUP BY j.country_id, c.sector_id, j.salary_range_id;
+-- Required by REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS idx_job_facet_counts_key ON public.job_facet_counts (country_id, sector_id, salary_range_id);
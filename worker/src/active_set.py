@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+import faiss
+import numpy as np
+
+# Seconds between sweeps that deactivate expired jobs
+EXPIRY_SWEEP_INTERVAL = int(os.getenv("EXPIRY_SWEEP_INTERVAL", 60))
+
+
+def _timestamp(expires_at):
+    """Epoch seconds for a datetime or ISO string; jobs without expiration never expire."""
+    if not expires_at:
+        return np.inf
+    if isinstance(expires_at, str):
+        expires_at = datetime.fromisoformat(expires_at)
+    return expires_at.timestamp()
+
+
+class ActiveSet:
+    """Which FAISS positions hold live jobs, used to filter searches at index level.
+
+    A position is live when its job is active and not expired. Stale positions
+    (deleted, deactivated or re-indexed jobs) stay in the index until the next
+    purge, but are never returned by a filtered search.
+    """
+
+    def __init__(self, size=0):
+        self._active = np.zeros(size, dtype=bool)
+        self._expires = np.full(size, np.inf)
+        self._packed = None
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+
+    def _ensure_size(self, size):
+        if size > len(self._active):
+            grow = max(size, 2 * len(self._active)) - len(self._active)
+            self._active = np.concatenate([self._active, np.zeros(grow, dtype=bool)])
+            self._expires = np.concatenate([self._expires, np.full(grow, np.inf)])
+
+    def set_live(self, position, expires_at=None):
+        with self._lock:
+            self._ensure_size(position + 1)
+            self._active[position] = True
+            self._expires[position] = _timestamp(expires_at)
+            self._packed = None
+
+    def deactivate(self, position):
+        with self._lock:
+            if position < len(self._active):
+                self._active[position] = False
+                self._packed = None
+
+    def is_live(self, position):
+        return 0 <= position < len(self._active) and bool(self._active[position])
+
+    def sweep(self, now=None):
+        """Deactivate expired positions. Returns how many were deactivated."""
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = self._active & (self._expires <= now)
+            count = int(expired.sum())
+            if count:
+                self._active[expired] = False
+                self._packed = None
+            self._last_sweep = now
+        return count
+
+    def live_positions(self, size):
+        self.sweep()
+        return np.flatnonzero(self._active[:size])
+
+    def dead_count(self, size):
+        return size - int(self._active[:size].sum())
+
+    def subset(self, positions):
+        """New ActiveSet where position i is positions[i] of this one, all live."""
+        active = ActiveSet(len(positions))
+        active._active[:] = True
+        active._expires[:] = self._expires[positions]
+        return active
+
+    def selector(self, start, stop):
+        """IDSelectorBitmap for positions [start, stop), ids relative to start.
+
+        The packed bitmap must stay referenced while the selector is used, so it is
+        returned alongside it.
+        """
+        if time.time() - self._last_sweep > EXPIRY_SWEEP_INTERVAL:
+            self.sweep()
+
+        with self._lock:
+            self._ensure_size(stop)
+            if start == 0:
+                if self._packed is None or len(self._packed) * 8 < stop:
+                    self._packed = np.packbits(self._active, bitorder="little")
+                bits = self._packed
+            else:
+                bits = np.packbits(self._active[start:stop], bitorder="little")
+
+        return faiss.IDSelectorBitmap(stop - start, faiss.swig_ptr(bits)), bits
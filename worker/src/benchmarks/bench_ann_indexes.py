@@ -0,0 +1,115 @@
+"""
+Recall vs. QPS and memory benchmark for the FAISS index types supported by index_factory.
+
+Ground truth is the exact top-k of an IndexFlatIP over the same vectors, and
+quality is reported with evaluate_faiss from test.py. bytes/vec is the serialized
+size per vector and x_flat how many times more jobs fit per worker than with flat.
+
+--halfvec adds a flat index over the vectors rounded to half precision, i.e. the
+recall cost of storing job_embeddings as halfvec (db_scripts/halfvec_embeddings.sql).
+
+Uso:
+    python src/benchmarks/bench_ann_indexes.py               # vectores sintéticos
+    python src/benchmarks/bench_ann_indexes.py --source db   # job_embeddings
+    python src/benchmarks/bench_ann_indexes.py --types flat,sq8,fp16,ivf_sq8,ivf_pq --halfvec
+"""
+import argparse
+import os
+import sys
+import time
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from index_factory import FAISS_DIM, INDEX_TYPES, create_index, requires_training, sample_training_vectors
+from test import evaluate_faiss
+
+# Bytes per row of job_embeddings.embedding: 8-byte header plus the components
+STORAGE_BYTES = {"vector": 8 + 4 * FAISS_DIM, "halfvec": 8 + 2 * FAISS_DIM}
+
+
+def synthetic_embeddings(n, dim=FAISS_DIM, n_clusters=200, seed=42):
+    """Normalized vectors drawn around random centroids, roughly like sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, n)
+    vectors = centroids[labels] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def db_embeddings():
+    from faiss_index import load_all_embeddings
+    embeddings, _, _ = load_all_embeddings()
+    return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+
+def exact_ground_truth(base, queries, k):
+    flat = faiss.IndexFlatIP(base.shape[1])
+    flat.add(base)
+    _, positions = flat.search(queries, k)
+    return {q_idx: set(row.tolist()) for q_idx, row in enumerate(positions)}
+
+
+def run(index_type, base, queries, ground_truth, k):
+    start = time.perf_counter()
+    if index_type == "flat_halfvec":
+        base = base.astype(np.float16).astype(np.float32)
+        index = create_index("flat", base.shape[1])
+    else:
+        training_vectors = sample_training_vectors(base) if requires_training(index_type) else None
+        index = create_index(index_type, base.shape[1], training_vectors)
+    index.add(base)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index.search(queries, k)
+    qps = len(queries) / (time.perf_counter() - start)
+
+    metrics = evaluate_faiss(index, queries, ground_truth, ks=[1, k], topn=k, memory=True)
+
+    return {
+        "index": index_type,
+        "build_s": build_time,
+        "qps": qps,
+        "precision@1": metrics["precision@1"],
+        f"recall@{k}": metrics[f"recall@{k}"],
+        "NDCG@10": metrics["NDCG@10"],
+        "size_mb": metrics["bytes_per_vector"] * index.ntotal / 1e6,
+        "bytes/vec": metrics["bytes_per_vector"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", choices=["synthetic", "db"], default="synthetic")
+    parser.add_argument("--size", type=int, default=100_000, help="synthetic vectors in the index")
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", default=",".join(INDEX_TYPES))
+    parser.add_argument("--halfvec", action="store_true", help="also measure halfvec-stored embeddings")
+    args = parser.parse_args()
+
+    vectors = db_embeddings() if args.source == "db" else synthetic_embeddings(args.size + args.queries)
+    base, queries = vectors[:-args.queries], vectors[-args.queries:]
+    ground_truth = exact_ground_truth(base, queries, args.k)
+    print(f"📦 {len(base)} vectors, {len(queries)} queries, k={args.k}\n")
+
+    index_types = args.types.split(",") + (["flat_halfvec"] if args.halfvec else [])
+    rows = [run(index_type, base, queries, ground_truth, args.k) for index_type in index_types]
+    flat_bytes = 4 * FAISS_DIM
+    for row in rows:
+        row["x_flat"] = flat_bytes / row["bytes/vec"]
+
+    header = list(rows[0].keys())
+    print(" | ".join(f"{h:>10}" for h in header))
+    for row in rows:
+        print(" | ".join(f"{v:>10.3f}" if isinstance(v, float) else f"{v:>10}" for v in row.values()))
+
+    print(f"\njob_embeddings storage per job: vector {STORAGE_BYTES['vector']} B, halfvec {STORAGE_BYTES['halfvec']} B")
+
+
+if __name__ == "__main__":
+    main()
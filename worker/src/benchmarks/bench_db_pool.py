@@ -0,0 +1,63 @@
+"""
+Concurrency benchmark for the worker's PostgreSQL connection pool.
+
+Runs the same mix of calls from N threads, the way Flask request threads and
+the RabbitMQ consumer share db.py:
+  - load_faiss_index_updated_at (cheap lookup)
+  - a query that holds the connection for --latency-ms, standing in for
+    network latency and slower statements
+
+With --pool 1 every call serializes on one connection, which is what the old
+module-level connection did. Larger pools should scale close to linearly
+until the database becomes the bottleneck.
+
+Needs DATABASE_URL. Uso: python src/benchmarks/bench_db_pool.py [--threads 16] [--calls 200]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+
+
+def workload(calls, latency):
+    for i in range(calls):
+        if i % 2:
+            db.load_faiss_index_updated_at("jobit_faiss_index")
+        else:
+            with db.cursor() as cur:
+                cur.execute("SELECT pg_sleep(%s)", (latency,))
+
+
+def run(pool_size, threads, calls, latency):
+    db.init_pool(1, pool_size)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        for future in [executor.submit(workload, calls, latency) for _ in range(threads)]:
+            future.result()
+    return threads * calls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--calls", type=int, default=200, help="calls per thread")
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--pools", default="1,4,8,16", help="pool sizes to compare")
+    args = parser.parse_args()
+
+    print(f"{args.threads} threads x {args.calls} calls, {args.latency_ms} ms simulated latency\n")
+    print(f"{'pool':>5} | {'calls/s':>9} | {'speedup':>7}")
+    baseline = None
+    for pool_size in [int(size) for size in args.pools.split(",")]:
+        throughput = run(pool_size, args.threads, args.calls, args.latency_ms / 1000)
+        baseline = baseline or throughput
+        print(f"{pool_size:>5} | {throughput:>9.0f} | {throughput / baseline:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Embedding transport benchmark: pgvector text literals vs the binary codec.
+
+Decode (rebuild path), per row:
+  text     previous path: ast.literal_eval on the '[0.1,0.2,...]' text form
+  binary   vector_codec: vector_send(embedding) bytes -> float32, written into
+           a preallocated array
+
+Encode (upsert path):
+  text     previous path: embedding.tolist() rendered by psycopg2 as an ARRAY literal
+  binary   vector_codec.embeddings_copy_buffer for COPY ... (FORMAT BINARY)
+
+--source synthetic (default) measures the codec alone on random vectors.
+--source db also fetches --size rows both ways from job_embeddings, to include
+the transfer (needs DATABASE_URL).
+
+Uso: python src/benchmarks/bench_embedding_codec.py [--size 20000] [--source synthetic|db]
+"""
+import argparse
+import ast
+import os
+import sys
+import time
+from uuid import uuid4
+
+import numpy as np
+from psycopg2.extensions import adapt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from index_factory import FAISS_DIM
+from vector_codec import decode_vectors_into, embeddings_copy_buffer, encode_vector
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def decode_text(rows, out):
+    for i, (text,) in enumerate(rows):
+        out[i] = np.array(ast.literal_eval(text), dtype=np.float32)
+
+
+def report(label, size, seconds):
+    print(f"{label:>22} | {seconds:>8.2f} | {size / seconds:>10.0f}")
+
+
+def synthetic(size):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((size, FAISS_DIM)).astype(np.float32)
+    # Shortest float4 representation, as pgvector prints it
+    text_rows = [("[" + ",".join(str(x) for x in v) + "]",) for v in vectors]
+    binary_rows = [(encode_vector(v),) for v in vectors]
+    rows = [(uuid4(), None, v) for v in vectors]
+    out = np.empty((size, FAISS_DIM), dtype=np.float32)
+
+    print(f"{'':>22} | {'seconds':>8} | {'rows/s':>10}")
+    report("decode text", size, timed(lambda: decode_text(text_rows, out)))
+    report("decode binary", size, timed(lambda: decode_vectors_into(out, binary_rows)))
+    assert np.array_equal(out, vectors)
+    report("encode text", size, timed(lambda: [adapt(v.tolist()).getquoted() for _, _, v in rows]))
+    report("encode binary", size, timed(lambda: embeddings_copy_buffer(rows)))
+
+
+def from_db(size):
+    import db
+
+    out = np.empty((size, FAISS_DIM), dtype=np.float32)
+    with db.cursor() as cur:
+        def fetch_text():
+            cur.execute("SELECT embedding::text FROM job_embeddings ORDER BY id LIMIT %s", (size,))
+            decode_text(cur.fetchall(), out)
+
+        def fetch_binary():
+            cur.execute("SELECT vector_send(embedding::vector) FROM job_embeddings ORDER BY id LIMIT %s", (size,))
+            decode_vectors_into(out, cur.fetchall())
+
+        cur.execute("SELECT COUNT(*) FROM (SELECT 1 FROM job_embeddings LIMIT %s) t", (size,))
+        size = cur.fetchone()[0]
+        print(f"{'':>22} | {'seconds':>8} | {'rows/s':>10}")
+        report("fetch + decode text", size, timed(fetch_text))
+        report("fetch + decode binary", size, timed(fetch_binary))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=20_000)
+    parser.add_argument("--source", choices=("synthetic", "db"), default="synthetic")
+    args = parser.parse_args()
+
+    print(f"📦 {args.size} vectors of {FAISS_DIM} dimensions\n")
+    synthetic(args.size)
+    if args.source == "db":
+        print()
+        from_db(args.size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Micro-benchmark: job_id -> FAISS position lookup.
+
+Compares the IdRegistry dict lookup against the previous linear scan over a
+list of (job_id, position) tuples.
+
+Uso: python src/benchmarks/bench_id_registry.py
+"""
+import os
+import random
+import sys
+import time
+from uuid import uuid4
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from id_registry import IdRegistry
+
+
+SIZES = [10_000, 100_000, 1_000_000]
+LOOKUPS = 1_000
+SCAN_LOOKUPS = 20
+
+
+def time_per_lookup(fn, keys):
+    start = time.perf_counter()
+    for key in keys:
+        fn(key)
+    return (time.perf_counter() - start) / len(keys)
+
+
+def main():
+    print(f"{'entries':>10} | {'registry (µs)':>14} | {'linear scan (µs)':>17}")
+    for size in SIZES:
+        job_ids = [uuid4() for _ in range(size)]
+        id_map = [(job_id, position) for position, job_id in enumerate(job_ids)]
+        registry = IdRegistry.from_rows(id_map)
+
+        keys = random.choices(job_ids, k=LOOKUPS)
+        registry_time = time_per_lookup(registry.position_of, keys)
+
+        scan_keys = random.choices(job_ids, k=SCAN_LOOKUPS)
+        scan_time = time_per_lookup(
+            lambda job_id: next((pos for jid, pos in id_map if jid == job_id), None),
+            scan_keys,
+        )
+
+        print(f"{size:>10} | {registry_time * 1e6:>14.3f} | {scan_time * 1e6:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
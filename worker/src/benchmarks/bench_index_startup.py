@@ -0,0 +1,100 @@
+"""
+Startup benchmark: loading the FAISS snapshot and id map.
+
+Scenarios, each run in a fresh process so resident memory is comparable:
+  blob    previous path: blob in memory -> np.frombuffer -> deserialize_index,
+          id map as a list of (job_id, position) tuples
+  file    local cache read fully into memory (FAISS_MMAP=0)
+  mmap    local cache opened with IO_FLAG_MMAP (default)
+
+Index load time and the resident memory it adds are reported separately from
+the id map. The blob scenario does not include the PostgreSQL transfer, so
+the real gap is larger than reported.
+
+Uso: python src/benchmarks/bench_index_startup.py [--size 500000]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from uuid import uuid4
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from id_registry import IdRegistry
+from index_factory import FAISS_DIM
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def load(scenario, index_path):
+    import index_cache
+
+    index_cache.FAISS_CACHE_DIR = os.path.dirname(index_path)
+    index_cache.FAISS_MMAP = scenario == "mmap"
+    index_name = os.path.basename(index_path)[:-len(".index")]
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+
+    if scenario == "blob":
+        with open(index_path, "rb") as f:
+            index_bytes = f.read()
+        index = faiss.deserialize_index(np.frombuffer(index_bytes, dtype=np.uint8))
+    else:
+        index, _ = index_cache.open_cached_index(index_name)
+
+    index_seconds = time.perf_counter() - start
+    index_rss = rss_mb() - rss_before
+    start = time.perf_counter()
+
+    rows = index_cache.load_cached_id_rows(index_name)
+    if scenario == "blob":
+        id_map = [(job_id, position) for job_id, position in rows]
+    else:
+        id_map = IdRegistry.from_rows(rows)
+
+    return index_seconds, time.perf_counter() - start, index_rss, len(id_map)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        import index_cache
+        index_cache.FAISS_CACHE_DIR = tmp
+
+        rng = np.random.default_rng(0)
+        index = faiss.IndexFlatIP(FAISS_DIM)
+        for start in range(0, args.size, 100_000):
+            chunk = rng.standard_normal((min(100_000, args.size - start), FAISS_DIM)).astype(np.float32)
+            faiss.normalize_L2(chunk)
+            index.add(chunk)
+        id_map = IdRegistry.from_rows((uuid4(), position) for position in range(args.size))
+
+        from datetime import datetime
+        index_cache.write_cache("bench", faiss.serialize_index(index), id_map, datetime.now())
+        del index, id_map
+        index_path = os.path.join(tmp, "bench.index")
+        print(f"📦 {args.size} vectors, snapshot {os.path.getsize(index_path) / 1e6:.0f} MB\n")
+
+        print(f"{'scenario':>8} | {'index s':>8} | {'id map s':>8} | {'index RSS MB':>12}")
+        ctx = multiprocessing.get_context("spawn")
+        for scenario in ("blob", "file", "mmap"):
+            with ctx.Pool(1) as pool:
+                index_seconds, ids_seconds, index_rss, _ = pool.apply(load, (scenario, index_path))
+            print(f"{scenario:>8} | {index_seconds:>8.2f} | {ids_seconds:>8.2f} | {index_rss:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
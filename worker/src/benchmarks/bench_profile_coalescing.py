@@ -0,0 +1,137 @@
+"""
+Simulation of profile.* event coalescing (worker.ProfileCoalescingConsumer).
+
+--candidates candidates each edit their profile --edits times (one event per edited
+section), with random pauses of --min-gap..--max-gap seconds between edits. Events are
+replayed on a virtual clock through the consumer, with a fake connection and channel,
+so nothing is recomputed for real.
+
+Prints, for each quiet window: recomputes (with 0 every event is recomputed), events
+per recompute, recompute batches, and the delay from a candidate's last edit to its
+recompute (p50/p95).
+
+Uso: python src/benchmarks/bench_profile_coalescing.py [--candidates 1000] [--edits 6] [--windows 0,2,5,10]
+"""
+import argparse
+import contextlib
+import heapq
+import io
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from worker import ProfileCoalescingConsumer
+
+
+class VirtualLoop:
+    """call_later/remove_timeout of a pika connection, on a virtual clock."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.timers = []
+        self.cancelled = set()
+        self.ids = itertools.count()
+
+    def clock(self):
+        return self.now
+
+    def call_later(self, delay, callback):
+        timer = next(self.ids)
+        heapq.heappush(self.timers, (self.now + delay, timer, callback))
+        return timer
+
+    def remove_timeout(self, timer):
+        self.cancelled.add(timer)
+
+    def run_until(self, until):
+        while self.timers and self.timers[0][0] <= until:
+            at, timer, callback = heapq.heappop(self.timers)
+            if timer in self.cancelled:
+                continue
+            self.now = at
+            callback()
+        self.now = until
+
+
+class FakeChannel:
+    def __init__(self):
+        self.acked = 0
+
+    def basic_ack(self, delivery_tag, multiple=False):
+        self.acked += 1
+
+    def basic_nack(self, delivery_tag, multiple=False, requeue=True):
+        pass
+
+
+def edit_stream(args):
+    """(time, user_id, updated_at) of every profile event, in time order."""
+    events = []
+    start = datetime(2025, 1, 1)
+    for candidate in range(args.candidates):
+        at = random.uniform(0, args.duration)
+        for _ in range(args.edits):
+            events.append((at, f"user-{candidate}"))
+            at += random.uniform(args.min_gap, args.max_gap)
+    events.sort()
+    return [(at, user_id, (start + timedelta(seconds=at)).isoformat()) for at, user_id in events]
+
+
+def simulate(events, quiet_window, max_delay):
+    loop, channel = VirtualLoop(), FakeChannel()
+    last_edit = {}
+    delays = []
+    batches = []
+
+    def recompute(profiles):
+        batches.append(len(profiles))
+        for profile in profiles:
+            delays.append(loop.now - last_edit[profile["user_id"]])
+
+    consumer = ProfileCoalescingConsumer(loop, channel, quiet_window * 1000, max_delay * 1000, recompute=recompute, clock=loop.clock)
+    for tag, (at, user_id, updated_at) in enumerate(events, start=1):
+        loop.run_until(at)
+        last_edit[user_id] = at
+        body = json.dumps({"event_type": "profile.updated", "data": {"user_id": user_id, "updated_at": updated_at}})
+        consumer.on_message(channel, SimpleNamespace(delivery_tag=tag), None, body)
+        if quiet_window == 0:
+            consumer.flush(force=True)
+    loop.run_until(float("inf"))
+
+    assert channel.acked == len(events)
+    return sum(batches), len(batches), delays
+
+
+def main(args):
+    random.seed(args.seed)
+    events = edit_stream(args)
+    print(f"{args.candidates} candidates x {args.edits} edits = {len(events)} events")
+    print(f"{'window s':>8} | {'recomputes':>10} | {'events/rec':>10} | {'batches':>8} | {'p50 delay s':>11} | {'p95 delay s':>11}")
+
+    for window in (float(w) for w in args.windows.split(",")):
+        # The consumer prints one line per recompute batch
+        with contextlib.redirect_stdout(io.StringIO()):
+            recomputes, batches, delays = simulate(events, window, args.max_delay)
+        delays.sort()
+        p95 = delays[min(len(delays) - 1, int(len(delays) * 0.95))]
+        print(f"{window:>8.1f} | {recomputes:>10} | {len(events) / recomputes:>10.2f} | {batches:>8} | {statistics.median(delays):>11.2f} | {p95:>11.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=1000)
+    parser.add_argument("--edits", type=int, default=6)
+    parser.add_argument("--duration", type=float, default=600, help="seconds over which candidates start editing")
+    parser.add_argument("--min-gap", type=float, default=2)
+    parser.add_argument("--max-gap", type=float, default=15)
+    parser.add_argument("--windows", default="0,2,5,10,20")
+    parser.add_argument("--max-delay", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
@@ -0,0 +1,103 @@
+"""
+Write benchmark for job recommendations, in rows/s.
+
+Compares three ways of storing k recommendations for each of --users profiles:
+  per-row       previous path: DELETE per user + one INSERT ... ON CONFLICT per row
+  values        one execute_values upsert per batch
+  copy-staging  db.replace_recommendations: COPY into a temp table, then one
+                DELETE + INSERT ... SELECT per batch (replaces the set atomically)
+
+Uses existing user and job ids. Everything runs inside one transaction that is
+rolled back, so job_recommendation is left untouched.
+
+Needs DATABASE_URL. Uso: python src/benchmarks/bench_recommendation_writes.py [--users 2000] [--k 10]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+from psycopg2.extras import execute_values
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+
+
+def write_per_row(cur, user_ids, rows):
+    for user_id in user_ids:
+        cur.execute("DELETE FROM job_recommendation WHERE user_id = %s", (user_id,))
+    for user_id, job_id, score in rows:
+        cur.execute("""
+            INSERT INTO job_recommendation (user_id, job_id, similarity_score, recommended_at)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (user_id, job_id) DO UPDATE
+            SET similarity_score = EXCLUDED.similarity_score,
+                recommended_at = EXCLUDED.recommended_at
+        """, (user_id, job_id, score, datetime.now()))
+
+
+def write_values(cur, user_ids, rows):
+    recommended_at = datetime.now()
+    execute_values(cur, """
+        INSERT INTO job_recommendation (user_id, job_id, similarity_score, recommended_at)
+        VALUES %s
+        ON CONFLICT (user_id, job_id) DO UPDATE
+        SET similarity_score = EXCLUDED.similarity_score,
+            recommended_at = EXCLUDED.recommended_at
+    """, [(user_id, job_id, score, recommended_at) for user_id, job_id, score in rows], page_size=1000)
+
+
+METHODS = {
+    "per-row": write_per_row,
+    "values": write_values,
+    "copy-staging": db._replace_recommendations,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=500, help="users per write call")
+    args = parser.parse_args()
+
+    with db.cursor() as cur:
+        cur.execute("SELECT id FROM users ORDER BY id LIMIT %s", (args.users,))
+        user_ids = [row[0] for row in cur.fetchall()]
+        cur.execute("SELECT id FROM job_entry LIMIT %s", (max(args.k * 20, 1000),))
+        job_ids = [row[0] for row in cur.fetchall()]
+
+    if not user_ids or len(job_ids) < args.k:
+        print("❌ Not enough users or jobs in the database.")
+        return
+
+    rng = random.Random(0)
+    batches = []
+    for start in range(0, len(user_ids), args.batch):
+        batch_users = user_ids[start:start + args.batch]
+        rows = [(user_id, job_id, rng.random()) for user_id in batch_users for job_id in rng.sample(job_ids, args.k)]
+        batches.append((batch_users, rows))
+    total_rows = sum(len(rows) for _, rows in batches)
+    print(f"📦 {len(user_ids)} users x {args.k} recommendations = {total_rows} rows\n")
+
+    print(f"{'method':>13} | {'seconds':>8} | {'rows/s':>9}")
+    with db.connection() as conn:
+        conn.autocommit = False
+        try:
+            with conn.cursor() as cur:
+                for name, write in METHODS.items():
+                    start = time.perf_counter()
+                    for batch_users, rows in batches:
+                        write(cur, batch_users, rows)
+                    seconds = time.perf_counter() - start
+                    print(f"{name:>13} | {seconds:>8.2f} | {total_rows / seconds:>9.0f}")
+        finally:
+            conn.rollback()
+            conn.autocommit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Smoke run of worker.run_worker with its default configuration against an in-process
+stub broker (no RabbitMQ, database or model needed).
+
+--jobs job events and --profiles profile events (--edits per profile) are queued before
+the worker connects, followed by a second copy (same message_id) of the first
+--duplicates job events, as the outbox relay sends after a crash. The stub implements
+the BlockingConnection/BlockingChannel calls the worker uses, including pika's rule that
+channel.start_consuming() only loops while that channel has consumers, and real
+call_later timers. Indexing and recommendation calls are replaced by counters. The run
+ends once every event is acked.
+
+Checks that a single connection is opened, every job event is dispatched once and every
+profile is recomputed after its quiet window, and prints the time it took (at least
+PROFILE_QUIET_WINDOW_MS).
+
+Uso: python src/benchmarks/bench_worker_loop.py [--jobs 500] [--profiles 50] [--edits 4] [--duplicates 50]
+"""
+import argparse
+import heapq
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+for name in ("RABBITMQ_HOST", "RABBITMQ_USER", "RABBITMQ_PASSWORD"):
+    os.environ.setdefault(name, "stub")
+
+import worker
+
+
+class StubChannel:
+    def __init__(self, connection):
+        self.connection = connection
+        self.prefetch = 0  # unlimited
+        self.consumers = {}  # queue -> callback
+        self.unacked = {}  # delivery tag -> (queue, body, properties)
+        self.is_open = True
+
+    def exchange_declare(self, **kwargs):
+        pass
+
+    def queue_declare(self, **kwargs):
+        pass
+
+    def queue_bind(self, **kwargs):
+        pass
+
+    def basic_qos(self, prefetch_count=0):
+        self.prefetch = prefetch_count
+
+    def basic_consume(self, queue, on_message_callback, auto_ack=False):
+        self.consumers[queue] = on_message_callback
+
+    def start_consuming(self):
+        # BlockingChannel.start_consuming() in pika 1.x: returns when the channel has no consumer
+        while self.consumers:
+            self.connection.process_data_events(time_limit=None)
+
+    def stop_consuming(self):
+        self.consumers.clear()
+
+    def basic_ack(self, delivery_tag, multiple=False):
+        for tag in self._settled(delivery_tag, multiple):
+            del self.unacked[tag]
+            self.connection.broker.acked += 1
+
+    def basic_nack(self, delivery_tag, multiple=False, requeue=True):
+        for tag in self._settled(delivery_tag, multiple):
+            queue, body, properties = self.unacked.pop(tag)
+            if requeue:
+                self.connection.broker.queues[queue].appendleft((body, properties))
+            else:
+                self.connection.broker.acked += 1
+
+    def _settled(self, delivery_tag, multiple):
+        return [tag for tag in list(self.unacked) if tag <= delivery_tag] if multiple else [delivery_tag]
+
+    def deliver(self):
+        """Push one message to a consumer of this channel. Returns False when none can be sent."""
+        if self.prefetch and len(self.unacked) >= self.prefetch:
+            return False
+        for queue, callback in self.consumers.items():
+            messages = self.connection.broker.queues[queue]
+            if messages:
+                body, properties = messages.popleft()
+                tag = next(self.connection.tags)
+                self.unacked[tag] = (queue, body, properties)
+                callback(self, SimpleNamespace(delivery_tag=tag), properties, body)
+                return True
+        return False
+
+
+class StubConnection:
+    def __init__(self, broker):
+        self.broker = broker
+        self.channels = []
+        self.timers = []
+        self.cancelled = set()
+        self.ids = itertools.count()
+        self.tags = itertools.count(1)
+        self.is_open = True
+
+    def channel(self):
+        channel = StubChannel(self)
+        self.channels.append(channel)
+        return channel
+
+    def call_later(self, delay, callback):
+        timer = next(self.ids)
+        heapq.heappush(self.timers, (time.monotonic() + delay, timer, callback))
+        return timer
+
+    def remove_timeout(self, timer):
+        self.cancelled.add(timer)
+
+    def close(self):
+        self.is_open = False
+
+    def process_data_events(self, time_limit=0):
+        """Deliver what is queued and fire due timers; with time_limit=None block until something happened."""
+        while True:
+            delivered = False
+            for channel in self.channels:
+                while channel.deliver():
+                    delivered = True
+
+            fired = False
+            while self.timers and self.timers[0][0] <= time.monotonic():
+                _, timer, callback = heapq.heappop(self.timers)
+                if timer not in self.cancelled:
+                    callback()
+                    fired = True
+
+            if self.broker.done():
+                raise KeyboardInterrupt  # Ends run_worker
+            if delivered or fired or time_limit is not None:
+                return
+            live = [at for at, timer, _ in self.timers if timer not in self.cancelled]
+            if not live:
+                raise RuntimeError("Worker is stuck: unacked events and no timer pending")
+            time.sleep(max(min(live) - time.monotonic(), 0))
+
+
+class StubBroker:
+    def __init__(self, jobs, profiles, edits, duplicates):
+        self.queues = {"job_events_queue": deque(), "profiles_events_queue": deque()}
+        self.connections = 0
+        self.acked = 0
+        event_ids = itertools.count()
+
+        for i in range(jobs):
+            event = {"event_type": "job.updated", "data": {"job_id": f"job-{i}", "job_detail": "text"}}
+            self.queues["job_events_queue"].append((json.dumps(event), SimpleNamespace(message_id=str(next(event_ids)))))
+        for edit in range(edits):
+            for i in range(profiles):
+                event = {"event_type": "profile.updated", "data": {"user_id": f"user-{i}", "updated_at": f"2025-01-01T00:00:0{edit}"}}
+                self.queues["profiles_events_queue"].append((json.dumps(event), SimpleNamespace(message_id=str(next(event_ids)))))
+        self.queues["job_events_queue"].extend(list(self.queues["job_events_queue"])[:duplicates])
+        self.total = jobs + profiles * edits + min(duplicates, jobs)
+
+    def connect(self, parameters):
+        self.connections += 1
+        if self.connections > 3:
+            raise KeyboardInterrupt  # Reconnecting in a loop; ends run_worker so the check below fails
+        return StubConnection(self)
+
+    def done(self):
+        return self.acked == self.total
+
+
+def main(args):
+    broker = StubBroker(args.jobs, args.profiles, args.edits, args.duplicates)
+    jobs, profiles = [], []
+
+    worker.init_db = worker.prune_cache = worker.init_embedding = lambda: None
+    worker.process_jobs_batch = jobs.extend
+    worker.deactivate_jobs = jobs.extend
+    worker.recommend_profiles_batch = profiles.extend
+    worker.pika.BlockingConnection = broker.connect
+
+    print(f"JOB_BATCH_SIZE={worker.JOB_BATCH_SIZE} PROFILE_QUIET_WINDOW_MS={worker.PROFILE_QUIET_WINDOW_MS}: "
+          f"{args.jobs} job events, {args.profiles} profiles x {args.edits} edits")
+    start = time.perf_counter()
+    try:
+        worker.run_worker()
+    except SystemExit:
+        pass
+    elapsed = time.perf_counter() - start
+
+    print(f"connections={broker.connections} acked={broker.acked}/{broker.total} "
+          f"jobs_dispatched={len(jobs)} profiles_recomputed={len(profiles)} elapsed={elapsed:.2f}s")
+    assert broker.connections == 1, "run_worker reconnected"
+    assert len(jobs) == args.jobs
+    assert len(profiles) == args.profiles
+    print("OK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--profiles", type=int, default=50)
+    parser.add_argument("--edits", type=int, default=4)
+    parser.add_argument("--duplicates", type=int, default=50)
+    main(parser.parse_args())
@@ -0,0 +1,137 @@
+"""
+Check of db.connection() nesting with DB_POOL_MAX=1, against an in-process fake pool (no
+PostgreSQL needed).
+
+A cursor() or transaction() opened inside a transaction() of the same thread must reuse the
+connection it holds: with a single slot, waiting for a second one would block forever. Runs
+that nesting in one thread, then from --threads threads at once, and fails if any of them
+has not finished after --timeout seconds, if two connections were ever checked out together,
+or if a nested transaction committed on its own.
+
+Uso: python src/benchmarks/check_db_pool_nesting.py [--threads 8] [--calls 50] [--timeout 5]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DB_POOL_MAX"] = "1"
+
+import psycopg2.pool
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.statements += 1
+        time.sleep(0.0005)  # Holds the connection a little, so threads contend for it
+
+    def fetchone(self):
+        return None
+
+
+class FakeConnection:
+    closed = 0
+
+    def __init__(self):
+        self.autocommit = True
+        self.statements = 0
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commits += 1
+        return False
+
+
+class FakePool:
+    """ThreadedConnectionPool with a single connection, counting concurrent checkouts."""
+
+    def __init__(self, minconn, maxconn, dsn):
+        self.conn = FakeConnection()
+        self.lock = threading.Lock()
+        self.checked_out = 0
+        self.max_checked_out = 0
+
+    def getconn(self):
+        with self.lock:
+            if self.checked_out:
+                raise psycopg2.pool.PoolError("connection pool exhausted")
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+            return self.conn
+
+    def putconn(self, conn, close=False):
+        with self.lock:
+            self.checked_out -= 1
+
+    def closeall(self):
+        pass
+
+
+psycopg2.pool.ThreadedConnectionPool = FakePool
+
+import db
+
+
+def nested_calls(calls):
+    for _ in range(calls):
+        with db.transaction() as cur:
+            cur.execute("UPDATE faiss_index SET updated_at = NOW()")
+            db.load_faiss_index_updated_at("jobit_faiss_index")  # cursor() inside the transaction
+            with db.transaction() as inner:
+                inner.execute("DELETE FROM faiss_index_segment")
+
+
+def run_threads(threads, calls, timeout):
+    workers = [threading.Thread(target=nested_calls, args=(calls,), daemon=True) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(max(timeout - (time.perf_counter() - start), 0))
+    return sum(worker.is_alive() for worker in workers), time.perf_counter() - start
+
+
+def main(args):
+    print(f"DB_POOL_MAX={db.DB_POOL_MAX}")
+    conn = db.pool.conn
+
+    stuck, elapsed = run_threads(1, 1, args.timeout)
+    print(f"single thread: stuck={stuck} elapsed={elapsed:.3f}s")
+    assert not stuck, "nested cursor()/transaction() blocked waiting for a second connection"
+    assert conn.commits == 1, "the nested transaction committed on its own"
+    assert conn.autocommit
+
+    stuck, elapsed = run_threads(args.threads, args.calls, args.timeout)
+    print(f"{args.threads} threads x {args.calls} calls: stuck={stuck} elapsed={elapsed:.3f}s "
+          f"commits={conn.commits} max_checked_out={db.pool.max_checked_out}")
+    assert not stuck, f"{stuck} threads did not finish"
+    assert conn.commits == 1 + args.threads * args.calls
+    assert db.pool.max_checked_out == 1
+    print("OK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=5)
+    main(parser.parse_args())
@@ -1,109 +1,454 @@
+from contextlib import contextmanager
 from datetime import datetime
+import io
 import os
+import threading
+import time
 import psycopg2
-from psycopg2.extras import register_uuid
+from psycopg2.extras import execute_values, register_uuid
+from psycopg2.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
+import numpy as np
+
+from index_factory import FAISS_DIM
+from vector_codec import decode_vector, decode_vectors_into, embeddings_copy_buffer, hashed_vectors_copy_buffer
 
 load_dotenv()
 register_uuid()
 
 DB_CONNECTION = os.getenv("DATABASE_URL")
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 1))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 10))
+# Connections idle for longer than this are pinged before being handed out
+DB_POOL_PING_AFTER = float(os.getenv("DB_POOL_PING_AFTER", 30))
+DB_CONNECT_RETRIES = int(os.getenv("DB_CONNECT_RETRIES", 3))
+
+pool = None
+_slots = None
+_last_used = {}
+# Connection borrowed by the current thread, handed to nested connection() blocks
+_held = threading.local()
+
+
+def init_pool(minconn=DB_POOL_MIN, maxconn=DB_POOL_MAX):
+    """(Re)create the connection pool. Each process needs its own pool."""
+    global pool, _slots
+
+    if pool is not None:
+        pool.closeall()
+    pool = ThreadedConnectionPool(minconn, maxconn, DB_CONNECTION)
+    # getconn() raises when the pool is exhausted; callers wait for a free slot instead
+    _slots = threading.BoundedSemaphore(maxconn)
+    _last_used.clear()
+
+
+def _is_healthy(conn):
+    if conn.closed:
+        return False
+    try:
+        conn.autocommit = True
+        if time.monotonic() - _last_used.get(id(conn), 0) > DB_POOL_PING_AFTER:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def _checkout():
+    """Take a healthy connection from the pool, replacing broken ones."""
+    for attempt in range(1, DB_CONNECT_RETRIES + 1):
+        try:
+            conn = pool.getconn()
+        except psycopg2.OperationalError as e:
+            if attempt == DB_CONNECT_RETRIES:
+                raise
+            print(f"⚠️ Database connection failed: {e}. Retrying ({attempt}/{DB_CONNECT_RETRIES})...")
+            time.sleep(2**attempt)
+            continue
+
+        if _is_healthy(conn):
+            return conn
+        print("⚠️ Discarding broken database connection.")
+        _last_used.pop(id(conn), None)
+        pool.putconn(conn, close=True)
+
+    raise psycopg2.OperationalError("No healthy database connection available")
+
+
+@contextmanager
+def connection():
+    """Borrow an autocommit connection from the pool for the duration of the block.
+
+    A block nested in another one of the same thread (e.g. a helper called inside
+    transaction()) gets the connection already held instead of a second slot: with every
+    slot held by outer blocks, waiting for one would deadlock.
+    """
+    held = getattr(_held, "conn", None)
+    if held is not None:
+        yield held
+        return
+
+    _slots.acquire()
+    try:
+        conn = _checkout()
+        _held.conn = conn
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            _held.conn = None
+            broken = broken or bool(conn.closed)
+            if broken:
+                _last_used.pop(id(conn), None)
+            else:
+                _last_used[id(conn)] = time.monotonic()
+            pool.putconn(conn, close=broken)
+    finally:
+        _slots.release()
+
+
+@contextmanager
+def cursor():
+    with connection() as conn:
+        with conn.cursor() as cur:
+            yield cur
+
+
+@contextmanager
+def transaction():
+    """Run several statements atomically on one pooled connection.
+    Nested in another transaction of the thread, its statements join the outer one."""
+    with connection() as conn:
+        if not conn.autocommit:
+            with conn.cursor() as cur:
+                yield cur
+            return
+
+        conn.autocommit = False
+        try:
+            with conn:
+                with conn.cursor() as cur:
+                    yield cur
+        finally:
+            if not conn.closed:
+                conn.autocommit = True
+
+
+init_pool()
 
-conn = psycopg2.connect(DB_CONNECTION)
-conn.autocommit = True
 
 def init_db():
     # read init_db.sql and execute it
     with open("src/db_scripts/init_db.sql", "r") as f:
         schema = f.read()
-    with conn.cursor() as cur:
+    with cursor() as cur:
         cur.execute(schema)
     print("✅ Database initialized.")
 
 
 # Functions related to embeddings
 
-def upsert_embedding(job_id, expires_at, embedding):
-    with conn.cursor() as cur:
+def copy_embeddings(cur, rows):
+    """Upsert (job_id, expires_at, embedding) rows through a binary COPY into a temp table,
+    so embeddings travel as float4 instead of text literals."""
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS job_embeddings_staging (
+            id UUID NOT NULL,
+            expires_at TEXT,
+            embedding VECTOR(384) NOT NULL
+        ) ON COMMIT DELETE ROWS
+    """)
+    cur.copy_expert("COPY job_embeddings_staging (id, expires_at, embedding) FROM STDIN WITH (FORMAT BINARY)",
+                    embeddings_copy_buffer(rows))
+    cur.execute("""
+        INSERT INTO job_embeddings (id, expires_at, embedding)
+        SELECT DISTINCT ON (id) id, expires_at::timestamptz, embedding
+        FROM job_embeddings_staging
+        ON CONFLICT (id) DO UPDATE 
+        SET expires_at = EXCLUDED.expires_at,
+            embedding = EXCLUDED.embedding;
+    """)
+
+
+def upsert_embeddings(rows, content_hashes=None):
+    """Upsert (job_id, expires_at, embedding) rows, with the content hash of each job text."""
+    rows = list(rows)
+    with transaction() as cur:
+        copy_embeddings(cur, rows)
+        if content_hashes is not None:
+            execute_values(cur, """
+                UPDATE job_embeddings e SET content_hash = v.content_hash
+                FROM (VALUES %s) AS v(id, content_hash)
+                WHERE e.id = v.id::uuid
+            """, [(str(job_id), psycopg2.Binary(content_hash)) for (job_id, _, _), content_hash in zip(rows, content_hashes)])
+
+
+def load_embedding_hashes(job_ids):
+    """{job_id: content_hash} of the text each stored job embedding was encoded from."""
+    with cursor() as cur:
+        cur.execute("SELECT id, content_hash FROM job_embeddings WHERE id = ANY(%s::uuid[]) AND content_hash IS NOT NULL",
+                    ([str(job_id) for job_id in job_ids],))
+        return {job_id: bytes(content_hash) for job_id, content_hash in cur.fetchall()}
+
+
+def update_embedding_expirations(rows):
+    """Set expires_at of (job_id, expires_at) rows whose embedding did not change."""
+    with cursor() as cur:
+        execute_values(cur, """
+            UPDATE job_embeddings e SET expires_at = v.expires_at::timestamptz
+            FROM (VALUES %s) AS v(id, expires_at)
+            WHERE e.id = v.id::uuid
+        """, [(str(job_id), expires_at or None) for job_id, expires_at in rows])
+
+
+def load_cached_embeddings(content_hashes):
+    """{content_hash: embedding} from embedding_cache, for the hashes that are stored.
+    Hits older than a day get used_at = NOW(), so rows in use are not pruned."""
+    hashes = [psycopg2.Binary(content_hash) for content_hash in content_hashes]
+    with cursor() as cur:
+        cur.execute("SELECT content_hash, vector_send(embedding::vector) FROM embedding_cache WHERE content_hash = ANY(%s)", (hashes,))
+        embeddings = {bytes(content_hash): decode_vector(data) for content_hash, data in cur.fetchall()}
+        if embeddings:
+            cur.execute("""
+                UPDATE embedding_cache SET used_at = NOW()
+                WHERE content_hash = ANY(%s) AND used_at < NOW() - INTERVAL '1 day'
+            """, (hashes,))
+        return embeddings
+
+
+def store_cached_embeddings(rows):
+    """Insert (content_hash, embedding) rows into embedding_cache, through a binary COPY."""
+    with transaction() as cur:
         cur.execute("""
-            INSERT INTO job_embeddings (id, expires_at, embedding)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (id) DO UPDATE 
-            SET expires_at = EXCLUDED.expires_at,
-                embedding = EXCLUDED.embedding;
-        """, (job_id, expires_at, embedding.tolist()))
+            CREATE TEMP TABLE IF NOT EXISTS embedding_cache_staging (
+                content_hash BYTEA NOT NULL,
+                embedding VECTOR(384) NOT NULL
+            ) ON COMMIT DELETE ROWS
+        """)
+        cur.copy_expert("COPY embedding_cache_staging (content_hash, embedding) FROM STDIN WITH (FORMAT BINARY)",
+                        hashed_vectors_copy_buffer(rows))
+        cur.execute("""
+            INSERT INTO embedding_cache (content_hash, embedding)
+            SELECT DISTINCT ON (content_hash) content_hash, embedding
+            FROM embedding_cache_staging
+            ON CONFLICT (content_hash) DO NOTHING
+        """)
+
+
+def prune_embedding_cache(max_age_days):
+    """Delete cached embeddings not used for max_age_days. Returns the number deleted."""
+    with cursor() as cur:
+        cur.execute("DELETE FROM embedding_cache WHERE used_at < NOW() - make_interval(days => %s)", (max_age_days,))
+        return cur.rowcount
+
+
+def load_embedding_sample(limit: int):
+    """Random sample of stored embeddings, used to train IVF indexes."""
+    with cursor() as cur:
+        cur.execute("""
+            SELECT vector_send(embedding::vector)
+            FROM job_embeddings
+            ORDER BY random()
+            LIMIT %s
+        """, (limit,))
+        rows = cur.fetchall()
+        sample = np.empty((len(rows), FAISS_DIM), dtype=np.float32)
+        decode_vectors_into(sample, rows)
+        return sample
 
 
 # Functions related to FAISS index
 
-def persist_faiss_index(faiss_bytes, index_name):
-    with conn.cursor() as cur:
+def compact_faiss_index(faiss_bytes, index_name, ntotal):
+    """Write a new base snapshot and drop the delta segments it already contains."""
+    with transaction() as cur:
         cur.execute("""
             INSERT INTO faiss_index ("name", index_data, updated_at)
             VALUES (%s, %s, NOW())
             ON CONFLICT (name) DO UPDATE
             SET index_data = EXCLUDED.index_data,
                 updated_at = NOW()
-        """, (index_name, faiss_bytes))
+            RETURNING updated_at
+        """, (index_name, psycopg2.Binary(faiss_bytes)))
+        updated_at = cur.fetchone()[0]
+        cur.execute("""
+            DELETE FROM faiss_index_segment
+            WHERE index_name = %s AND start_position < %s
+        """, (index_name, ntotal))
+        return updated_at
 
 
 def load_faiss_index(index_name):
-    with conn.cursor() as cur:
+    """Returns (index_data, updated_at) of the snapshot, or (None, None)."""
+    with cursor() as cur:
         cur.execute("""
-            SELECT index_data
+            SELECT index_data, updated_at
             FROM faiss_index
-            WHERE name = 'jobit_faiss_index'
-        """)
+            WHERE name = %s
+        """, (index_name,))
+        row = cur.fetchone()
+        if row:
+            return row
+        return None, None
+
+
+def load_faiss_index_names(prefix):
+    """Names of the stored indexes starting with `prefix`, i.e. the existing shards."""
+    with cursor() as cur:
+        cur.execute("SELECT name FROM faiss_index WHERE starts_with(name, %s) ORDER BY name", (prefix,))
+        return [row[0] for row in cur.fetchall()]
+
+
+def load_faiss_index_updated_at(index_name):
+    """Snapshot version, used to validate the local index cache without fetching the blob."""
+    with cursor() as cur:
+        cur.execute("SELECT updated_at FROM faiss_index WHERE name = %s", (index_name,))
         row = cur.fetchone()
         if row:
             return row[0]
         return None
 
 
-# Functions related to FAISS index map
+# Functions related to FAISS index segments and map
 
-def insert_faiss_index_map(job_id, position, index_name):
-    # Get the next position
-    with conn.cursor() as cur:
+def _insert_faiss_index_map(cur, rows, index_name):
+    """Insert (job_id, position) rows; a job that is re-indexed moves to its new position."""
+    execute_values(cur, """
+        INSERT INTO faiss_index_map (position, job_id, index_name)
+        VALUES %s
+        ON CONFLICT (job_id) DO UPDATE
+        SET position = EXCLUDED.position,
+            index_name = EXCLUDED.index_name
+    """, [(position, job_id, index_name) for job_id, position in rows])
+
+
+def persist_faiss_segment(index_name, start_position, vectors_bytes, rows):
+    """Append a delta segment and its (job_id, position) rows in one transaction."""
+    with transaction() as cur:
         cur.execute("""
-            INSERT INTO faiss_index_map (position, job_id, index_name)
+            INSERT INTO faiss_index_segment (index_name, start_position, vectors)
             VALUES (%s, %s, %s)
-        """, (position, job_id, index_name))
+        """, (index_name, start_position, psycopg2.Binary(vectors_bytes)))
+        _insert_faiss_index_map(cur, rows, index_name)
+
+
+def load_faiss_segments(index_name, from_position):
+    """Delta segments not yet contained in the snapshot, ordered by position."""
+    with cursor() as cur:
+        cur.execute("""
+            SELECT start_position, vectors
+            FROM faiss_index_segment
+            WHERE index_name = %s AND start_position >= %s
+            ORDER BY start_position
+        """, (index_name, from_position))
+        return cur.fetchall()
 
 
-def load_faiss_index_map(index_name):
-    with conn.cursor() as cur:
+def replace_faiss_index(faiss_bytes, index_name, rows):
+    """Replace snapshot, id map and segments at once, after positions were renumbered."""
+    with transaction() as cur:
+        cur.execute("""
+            INSERT INTO faiss_index ("name", index_data, updated_at)
+            VALUES (%s, %s, NOW())
+            ON CONFLICT (name) DO UPDATE
+            SET index_data = EXCLUDED.index_data,
+                updated_at = NOW()
+            RETURNING updated_at
+        """, (index_name, psycopg2.Binary(faiss_bytes)))
+        updated_at = cur.fetchone()[0]
+        cur.execute("DELETE FROM faiss_index_segment WHERE index_name = %s", (index_name,))
+        cur.execute("DELETE FROM faiss_index_map WHERE index_name = %s", (index_name,))
+        _insert_faiss_index_map(cur, rows, index_name)
+        return updated_at
+
+
+def load_job_states(index_name):
+    """(position, expires_at, is_active) for every mapped job; deleted jobs come back inactive."""
+    with cursor() as cur:
+        cur.execute("""
+            SELECT m.position, jb.expires_at, COALESCE(je.is_active, false)
+            FROM faiss_index_map m
+            JOIN job_embeddings jb ON jb.id = m.job_id
+            LEFT JOIN job_entry je ON je.id = m.job_id
+            WHERE m.index_name = %s
+        """, (index_name,))
+        return cur.fetchall()
+
+
+def load_faiss_index_map(index_name, from_position=0):
+    with cursor() as cur:
         cur.execute("""
             SELECT position, job_id
             FROM faiss_index_map
-            WHERE index_name = 'jobit_faiss_index'
+            WHERE index_name = %s AND position >= %s
             ORDER BY position
-        """)
+        """, (index_name, from_position))
         rows = cur.fetchall()
 
         return [(job_id, position) for position, job_id in rows]
     return []
 
-def clear_recommendations(user_id):
-    with conn.cursor() as cur:
-        cur.execute("DELETE FROM job_recommendation WHERE user_id = %s", (user_id,))
-    pass
-
-def insert_recommendation(user_id, recommended_job_id, score):
-    with conn.cursor() as cur:
-        cur.execute("""
-            INSERT INTO job_recommendation (user_id, job_id, similarity_score, recommended_at) 
-            VALUES (%s, %s, %s, %s)
-            ON CONFLICT (user_id, job_id) DO UPDATE 
-            SET similarity_score = EXCLUDED.similarity_score,
-                recommended_at = EXCLUDED.recommended_at;
-        """,
-         (user_id, recommended_job_id, score, datetime.now()))
-    pass
+# Functions related to recommendations
+
+def _replace_recommendations(cur, user_ids, rows):
+    """Make (user_id, job_id, similarity_score) rows the full recommendation set of
+    `user_ids`. Rows are COPYed into a session temp table, then merged with one
+    DELETE and one INSERT ... ON CONFLICT, which keeps relevance_score of pairs
+    that are recommended again."""
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS job_recommendation_staging (
+            user_id UUID NOT NULL,
+            job_id UUID NOT NULL,
+            similarity_score DOUBLE PRECISION NOT NULL
+        ) ON COMMIT DELETE ROWS
+    """)
+    data = io.StringIO("".join(f"{user_id}\t{job_id}\t{score!r}\n" for user_id, job_id, score in rows))
+    cur.copy_expert("COPY job_recommendation_staging (user_id, job_id, similarity_score) FROM STDIN", data)
+
+    cur.execute("""
+        DELETE FROM job_recommendation jr
+        WHERE jr.user_id = ANY(%s::uuid[])
+          AND NOT EXISTS (
+              SELECT 1 FROM job_recommendation_staging s
+              WHERE s.user_id = jr.user_id AND s.job_id = jr.job_id
+          )
+    """, (list(user_ids),))
+    cur.execute("""
+        INSERT INTO job_recommendation (user_id, job_id, similarity_score, recommended_at)
+        SELECT DISTINCT ON (user_id, job_id) user_id, job_id, similarity_score, %s
+        FROM job_recommendation_staging
+        ON CONFLICT (user_id, job_id) DO UPDATE
+        SET similarity_score = EXCLUDED.similarity_score,
+            recommended_at = EXCLUDED.recommended_at
+    """, (datetime.now(),))
+
+
+def replace_recommendations(user_ids, rows):
+    """Atomically replace the recommendations of `user_ids` with (user_id, job_id, score) rows."""
+    with transaction() as cur:
+        _replace_recommendations(cur, user_ids, rows)
+
+
+def load_job_countries(job_ids):
+    """{job_id: country_id} for the given jobs; unknown jobs are left out."""
+    with cursor() as cur:
+        cur.execute("SELECT id, country_id FROM job_entry WHERE id = ANY(%s::uuid[])", (list(job_ids),))
+        return dict(cur.fetchall())
+
+
+def load_profile_countries(user_ids):
+    """{user_id: country_id} for the given profiles; unknown profiles are left out."""
+    with cursor() as cur:
+        cur.execute("SELECT id, country_id FROM user_profile WHERE id = ANY(%s::uuid[])", (list(user_ids),))
+        return dict(cur.fetchall())
 
 
 def count_jobs_without_embedding():
-    with conn.cursor() as cur:
+    with cursor() as cur:
         cur.execute("""
             SELECT COUNT(1)
             FROM job_entry je
@@ -118,7 +463,7 @@ def count_jobs_without_embedding():
 
 
 def load_jobs(batch_size: int):
-    with conn.cursor() as cur:
+    with cursor() as cur:
         cur.execute("""
             SELECT 
                 je.id AS job_id, 
@@ -145,7 +490,7 @@ def load_jobs(batch_size: int):
         return jobs
     
 def count_profiles():
-    with conn.cursor() as cur:
+    with cursor() as cur:
         cur.execute("""
             SELECT COUNT(1)
             FROM user_profile up
@@ -155,17 +500,37 @@ def count_profiles():
             return row[0]
         return None
 
-def load_profiles(batch_size: int):
-    with conn.cursor() as cur:
+def load_profile_id_bounds(partitions: int):
+    """Last profile id of each of `partitions` ranges of roughly equal size, in order."""
+    with cursor() as cur:
+        cur.execute("""
+            SELECT MAX(id)
+            FROM (
+                SELECT id, NTILE(%s) OVER (ORDER BY id) AS bucket
+                FROM user_profile
+            ) t
+            GROUP BY bucket
+            ORDER BY 1
+        """, (partitions,))
+        return [row[0] for row in cur.fetchall()]
+
+
+def load_profiles(batch_size: int, after_id=None, until_id=None):
+    """Next page of profiles ordered by id, after `after_id` and up to `until_id`
+    inclusive (keyset pagination)."""
+    with cursor() as cur:
         cur.execute("""
             SELECT 
                 up.id AS user_id,
+                up.country_id,
                 up.title as profile_title,
                 up.description as profile_detail
             FROM user_profile up
+            WHERE (%s IS NULL OR up.id > %s)
+              AND (%s IS NULL OR up.id <= %s)
             ORDER BY up.id
             LIMIT %s
-        """, (batch_size,)) 
+        """, (after_id, after_id, until_id, until_id, batch_size)) 
 
         rows = cur.fetchall()
 
@@ -177,7 +542,7 @@ def load_profiles(batch_size: int):
     
 
 def load_recommendations(batch_size: int):
-    with conn.cursor() as cur:
+    with cursor() as cur:
         cur.execute("""
             SELECT 
                     jr.user_id, 
@@ -203,6 +568,6 @@ def load_recommendations(batch_size: int):
     
 
 def update_recommendation_relevance(job_id, user_id, relevance_score):
-    with conn.cursor() as cur:
+    with cursor() as cur:
         cur.execute("UPDATE job_recommendation SET relevance_score = %s WHERE user_id = %s AND job_id = %s", (relevance_score, user_id, job_id))
     pass
\ No newline at end of file
@@ -0,0 +1,16 @@
+-- Optional: store job embeddings in half precision (pgvector >= 0.7.0).
+-- halfvec(384) takes 776 bytes per row instead of 1544 for vector(384), and the HNSW
+-- index shrinks by about the same. The worker reads embeddings as embedding::vector and
+-- writes float4 vectors (cast on insert), so it works with either column type.
+-- Check the recall first: python src/benchmarks/bench_ann_indexes.py --source db
+-- Run once with the worker stopped: psql "$DATABASE_URL" -f src/db_scripts/halfvec_embeddings.sql
+
+BEGIN;
+
+DROP INDEX IF EXISTS job_embeddings_embedding_hnsw;
+ALTER TABLE job_embeddings ALTER COLUMN embedding TYPE halfvec(384);
+ALTER TABLE embedding_cache ALTER COLUMN embedding TYPE halfvec(384);
+-- Same name as in init_db.sql, so its CREATE INDEX IF NOT EXISTS keeps this one
+CREATE INDEX job_embeddings_embedding_hnsw ON job_embeddings USING hnsw (embedding halfvec_ip_ops);
+
+COMMIT;
@@ -5,16 +5,53 @@ CREATE TABLE IF NOT EXISTS job_embeddings (
     expires_at TIMESTAMP,
     embedding VECTOR(384)
 );
+-- sha256 of the model name and the text the embedding was encoded from (embedding_cache.content_hash)
+ALTER TABLE job_embeddings ADD COLUMN IF NOT EXISTS content_hash BYTEA;
 
+-- Embeddings of job and profile texts by content hash, so unchanged texts are not encoded again.
+-- Timestamps are timestamptz set with NOW(), so eviction by age does not depend on the session time zone
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    content_hash BYTEA PRIMARY KEY,
+    embedding VECTOR(384) NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'embedding_cache' AND column_name = 'created_at' AND data_type = 'timestamp without time zone'
+    ) THEN
+        ALTER TABLE embedding_cache ALTER COLUMN created_at TYPE TIMESTAMPTZ USING created_at AT TIME ZONE 'UTC';
+    END IF;
+END $$;
+-- Last time the row was read or written; old unused rows are pruned
+ALTER TABLE embedding_cache ADD COLUMN IF NOT EXISTS used_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+-- One FAISS index per country (index_name = shard); positions are local to each shard
 CREATE TABLE IF NOT EXISTS faiss_index_map (
-    index_name TEXT,
-    position INT PRIMARY KEY,
+    index_name TEXT NOT NULL,
+    position INT NOT NULL,
     job_id UUID REFERENCES job_embeddings(id),
     CONSTRAINT unique_job_id UNIQUE (job_id)
 );
+ALTER TABLE faiss_index_map DROP CONSTRAINT IF EXISTS faiss_index_map_pkey;
+CREATE UNIQUE INDEX IF NOT EXISTS faiss_index_map_shard_position ON faiss_index_map (index_name, position);
 
 CREATE TABLE IF NOT EXISTS faiss_index (
     "name" TEXT PRIMARY KEY,
     index_data BYTEA,
     updated_at TIMESTAMP
-);
\ No newline at end of file
+);
+
+-- Delta segments appended since the last faiss_index snapshot (raw float32 vectors)
+CREATE TABLE IF NOT EXISTS faiss_index_segment (
+    index_name TEXT NOT NULL,
+    start_position INT NOT NULL,
+    vectors BYTEA NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (index_name, start_position)
+);
+
+-- Nearest-neighbour search in PostgreSQL (backend related jobs with RELATED_JOBS_ENGINE=pgvector
+-- or when the worker is unavailable). Embeddings are normalized: inner product = cosine.
+CREATE INDEX IF NOT EXISTS job_embeddings_embedding_hnsw ON job_embeddings USING hnsw (embedding vector_ip_ops);
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from db import load_cached_embeddings, prune_embedding_cache, store_cached_embeddings
+from index_factory import FAISS_DIM
+
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 20000))  # vectors kept in memory (~1.5 KB each)
+# Lookups between two hit-rate reports
+EMBEDDING_CACHE_REPORT_EVERY = int(os.getenv("EMBEDDING_CACHE_REPORT_EVERY", 1000))
+# Rows of embedding_cache not used for this long are deleted when the worker starts
+EMBEDDING_CACHE_MAX_AGE_DAYS = int(os.getenv("EMBEDDING_CACHE_MAX_AGE_DAYS", 30))
+
+
+def content_hash(model_name, text):
+    """sha256 of the model and the exact text, so another model never reuses a vector."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode()).digest()
+
+
+def prune_cache(max_age_days=EMBEDDING_CACHE_MAX_AGE_DAYS):
+    deleted = prune_embedding_cache(max_age_days)
+    if deleted:
+        print(f"🧹 Deleted {deleted} cached embeddings unused for {max_age_days} days.")
+
+
+class EmbeddingCache:
+    """Embeddings by content hash: an in-process LRU in front of the embedding_cache table.
+    Only the texts found in neither are encoded, and then stored in both."""
+
+    def __init__(self, model, model_name, size=EMBEDDING_CACHE_SIZE, report_every=EMBEDDING_CACHE_REPORT_EVERY):
+        self.model = model
+        self.model_name = model_name
+        self.size = size
+        self.report_every = report_every
+        self._vectors = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.encoded = 0
+        self.metadata_only = 0  # job events whose text did not change
+        self._next_report = report_every
+
+    def hashes(self, texts):
+        return [content_hash(self.model_name, text) for text in texts]
+
+    def encode(self, texts, hashes=None):
+        """Normalized embeddings of `texts`, as a (len(texts), FAISS_DIM) float32 array."""
+        hashes = hashes or self.hashes(texts)
+        embeddings = np.empty((len(texts), FAISS_DIM), dtype=np.float32)
+
+        # hash -> positions in texts; identical texts of one batch are encoded once
+        missing = {}
+        with self._lock:
+            for i, key in enumerate(hashes):
+                vector = self._vectors.get(key)
+                if vector is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    self._vectors.move_to_end(key)
+                    embeddings[i] = vector
+        memory_hits = len(texts) - sum(len(positions) for positions in missing.values())
+
+        db_hits = 0
+        if missing:
+            for key, vector in load_cached_embeddings(list(missing)).items():
+                positions = missing.pop(key)
+                embeddings[positions] = vector
+                db_hits += len(positions)
+                self._remember(key, vector)
+
+        if missing:
+            keys = list(missing)
+            vectors = self.model.encode([texts[missing[key][0]] for key in keys], batch_size=64, normalize_embeddings=True)
+            store_cached_embeddings(zip(keys, vectors))
+            for key, vector in zip(keys, vectors):
+                embeddings[missing[key]] = vector
+                self._remember(key, vector)
+
+        self._count(len(texts), memory_hits, db_hits, len(missing))
+        return embeddings
+
+    def _remember(self, key, vector):
+        with self._lock:
+            self._vectors[key] = np.asarray(vector, dtype=np.float32)
+            self._vectors.move_to_end(key)
+            while len(self._vectors) > self.size:
+                self._vectors.popitem(last=False)
+
+    def _count(self, lookups, memory_hits, db_hits, encoded):
+        with self._lock:
+            self.lookups += lookups
+            self.memory_hits += memory_hits
+            self.db_hits += db_hits
+            self.encoded += encoded
+            report = self.lookups >= self._next_report
+            if report:
+                self._next_report = self.lookups + self.report_every
+        if report:
+            print(f"📊 Embedding cache: {self.stats()}")
+
+    def hit_rate(self):
+        # Repeated texts of one batch are encoded once, so they count as hits too
+        return 1 - self.encoded / self.lookups if self.lookups else 0.0
+
+    def stats(self):
+        return {
+            "lookups": self.lookups,
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "encoded": self.encoded,
+            "hit_rate": round(self.hit_rate(), 3),
+            "metadata_only": self.metadata_only,
+            "cached": len(self._vectors),
+        }
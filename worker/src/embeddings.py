@@ -1,4 +1,4 @@
-from db import init_db, count_jobs_without_embedding, load_jobs
+from db import copy_embeddings, init_db, count_jobs_without_embedding, load_jobs
 
 
 
@@ -37,17 +37,7 @@ def save_embeddings_to_db(batch):
     conn = db_pool.getconn()
     try:
         with conn.cursor() as cur:
-            args_str = ",".join(
-                cur.mogrify("(%s, %s, %s)", (job_id, embedding.tolist(), job_exp)).decode("utf-8")
-                for job_id, embedding, job_exp in batch
-            )
-            cur.execute(f"""
-                INSERT INTO job_embeddings (id, embedding, expires_at)
-                VALUES {args_str}
-                ON CONFLICT (id) DO UPDATE 
-                SET embedding = EXCLUDED.embedding,
-                    expires_at = EXCLUDED.expires_at
-            """)
+            copy_embeddings(cur, ((job_id, job_exp, embedding) for job_id, embedding, job_exp in batch))
         conn.commit()
     finally:
         db_pool.putconn(conn)
@@ -1,4 +1,4 @@
-import ast
+import itertools
 import os
 import faiss
 import psycopg2
@@ -8,10 +8,11 @@ from psycopg2.extras import RealDictCursor, execute_batch
 from dotenv import load_dotenv
 from tqdm import tqdm
 from datetime import datetime
+from id_registry import IdRegistry
+from index_factory import FAISS_DIM, FAISS_INDEX_NAME, FAISS_INDEX_TYPE, FAISS_TRAIN_SIZE, create_index, requires_training, shard_name
+from vector_codec import decode_vectors_into
 
 # --- Configuración ---
-FAISS_INDEX_NAME = "jobit_faiss_index"
-FAISS_DIM = 384  # para MiniLM-L12-v2
 BATCH_SIZE = 2000
 
 load_dotenv()
@@ -25,74 +26,98 @@ def get_db_connection():
     return psycopg2.connect(os.getenv("DATABASE_URL"), cursor_factory=RealDictCursor)
 
 
-def load_all_embeddings():
-    """Carga todos los embeddings desde la tabla job_embeddings."""
-    conn = get_db_connection()
-    embeddings = []
+LIVE_JOBS = """
+    FROM job_entry je
+    JOIN job_embeddings jb ON jb.id = je.id
+    WHERE je.is_active = true
+      AND (jb.expires_at IS NULL OR jb.expires_at > NOW())
+"""
+
+
+def load_countries(conn):
+    """Países con al menos un empleo activo; cada uno tiene su propio índice."""
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT DISTINCT je.country_id {LIVE_JOBS} AND je.country_id IS NOT NULL")
+        return [row["country_id"] for row in cur.fetchall()]
+
+
+def stream_embeddings(conn, country_id):
+    """Recorre los embeddings con un cursor del lado del servidor.
+
+    Yields (job_ids, vectors) chunks of up to BATCH_SIZE rows. `vectors` is a view of a
+    buffer that is reused for the next chunk, so consume it before advancing.
+    """
+    buffer = np.empty((BATCH_SIZE, FAISS_DIM), dtype=np.float32)
+
+    # A named cursor keeps the result set in PostgreSQL and fetches it in chunks
+    with conn.cursor(name="faiss_rebuild") as cur:
+        cur.itersize = BATCH_SIZE
+        cur.execute(f"""
+            SELECT jb.id, vector_send(jb.embedding::vector) AS embedding
+            {LIVE_JOBS}
+              AND je.country_id = %s
+            ORDER BY jb.id
+        """, (country_id,))
+        while True:
+            rows = cur.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            count = decode_vectors_into(buffer, rows, column="embedding")
+            yield [row["id"] for row in rows], buffer[:count]
+
+
+def rebuild_faiss_index(conn, country_id):
+    """Crea el índice FAISS de un país leyendo los embeddings en streaming.
+
+    Vectors are added to the index chunk by chunk, so memory stays at the size of the
+    index itself plus one chunk (and the training sample for IVF indexes).
+    Returns (index, job_ids) with job_ids in position order.
+    """
     job_ids = []
-    expirations = []
 
     with conn.cursor() as cur:
-        cur.execute("""
-            SELECT COUNT(*)
-            FROM job_entry je
-            JOIN job_embeddings jb ON jb.id = je.id
-            WHERE je.country_id = 'c7e69a65-f1b8-4390-b71b-ad43424794de'
-        """)
+        cur.execute(f"SELECT COUNT(*) {LIVE_JOBS} AND je.country_id = %s", (country_id,))
         total = cur.fetchone()["count"]
-
-        print(f"📦 Total embeddings a procesar: {total}")
-        offset = 0
-
-        with tqdm(total=total, desc="Cargando embeddings", dynamic_ncols=True) as pbar:
-            while True:
-                cur.execute("""
-                    SELECT jb.id, jb.expires_at, jb.embedding
-                    FROM job_entry je
-                    JOIN job_embeddings jb ON jb.id = je.id
-                    WHERE je.country_id = 'c7e69a65-f1b8-4390-b71b-ad43424794de'
-                    ORDER BY id
-                    LIMIT %s OFFSET %s
-                """, (BATCH_SIZE, offset))
-
-                rows = cur.fetchall()
-                if not rows:
+    print(f"\n🧱 Creando índice FAISS ({FAISS_INDEX_TYPE}) del país {country_id}: {total} embeddings")
+
+    chunks = stream_embeddings(conn, country_id)
+    index = None
+    with tqdm(total=total, desc="Indexando embeddings", dynamic_ncols=True) as pbar:
+        if requires_training(FAISS_INDEX_TYPE):
+            # Ids are random UUIDs, so the first rows by id are an unbiased training sample
+            training_vectors = np.empty((min(total, FAISS_TRAIN_SIZE), FAISS_DIM), dtype=np.float32)
+            filled = 0
+            while filled < len(training_vectors):
+                chunk = next(chunks, None)
+                if chunk is None:
                     break
+                chunk_ids, vectors = chunk
+                take = min(len(vectors), len(training_vectors) - filled)
+                training_vectors[filled:filled + take] = vectors[:take]
+                filled += take
+                job_ids.extend(chunk_ids[:take])
+                if take < len(vectors):
+                    # Keep the remainder for after training
+                    chunks = itertools.chain([(chunk_ids[take:], vectors[take:].copy())], chunks)
+
+            index = create_index(FAISS_INDEX_TYPE, FAISS_DIM, training_vectors[:filled])
+            index.add(training_vectors[:filled])
+            pbar.update(filled)
+            del training_vectors
+        else:
+            index = create_index(FAISS_INDEX_TYPE, FAISS_DIM)
+
+        for chunk_ids, vectors in chunks:
+            index.add(vectors)
+            job_ids.extend(chunk_ids)
+            pbar.update(len(chunk_ids))
 
-                for row in rows:
-                    
-                    try:
-                        emb = np.array(ast.literal_eval(row["embedding"]), dtype=np.float32)
-                        embeddings.append(emb)
-                        job_ids.append(row["id"])
-                        expirations.append(row["expires_at"])
-                    except (ValueError, SyntaxError):
-                        print(f"Skipping row with bad embedding: {row['id']}")
-                    
-
-                offset += BATCH_SIZE
-                pbar.update(len(rows))
-
-    conn.close()
-    return np.vstack(embeddings), job_ids, expirations
-
-
-# --------------------------------------------------------
-# 🧱 Funciones para reconstruir y guardar el índice FAISS
-# --------------------------------------------------------
-
-def rebuild_faiss_index(embeddings):
-    """Crea un índice FAISS nuevo desde todos los embeddings."""
-    print("\n🧱 Creando nuevo índice FAISS...")
-    index = faiss.IndexFlatIP(FAISS_DIM)
-    index.add(embeddings)
     print(f"✅ Índice FAISS construido con {index.ntotal} vectores.")
-    return index
+    return index, job_ids
 
 
-def save_faiss_index_to_db(index_bytes):
-    """Guarda el índice FAISS serializado en la base de datos."""
-    conn = get_db_connection()
+def save_faiss_index_to_db(conn, index_name, index_bytes, id_map):
+    """Guarda el índice serializado y su mapa id → posición en una sola transacción."""
     with conn.cursor() as cur:
         cur.execute("""
             INSERT INTO faiss_index (name, index_data, updated_at)
@@ -100,25 +125,37 @@ def save_faiss_index_to_db(index_bytes):
             ON CONFLICT (name) DO UPDATE
             SET index_data = EXCLUDED.index_data,
                 updated_at = NOW()
-        """, (FAISS_INDEX_NAME, psycopg2.Binary(index_bytes)))
-        conn.commit()
-    conn.close()
-    print(f"💾 Índice FAISS '{FAISS_INDEX_NAME}' guardado en la base de datos.")
-
-
-def save_faiss_map_to_db(job_ids):
-    """Guarda el mapa id → posición en la base de datos."""
-    conn = get_db_connection()
-    with conn.cursor() as cur:
-        cur.execute("DELETE FROM faiss_index_map WHERE index_name = %s", (FAISS_INDEX_NAME,))
-        data = [(FAISS_INDEX_NAME, job_id, i) for i, job_id in enumerate(job_ids)]
+        """, (index_name, psycopg2.Binary(index_bytes)))
+        # El snapshot reconstruido reemplaza todos los segmentos delta
+        cur.execute("DELETE FROM faiss_index_segment WHERE index_name = %s", (index_name,))
+        cur.execute("DELETE FROM faiss_index_map WHERE index_name = %s", (index_name,))
+        data = [(index_name, job_id, position) for job_id, position in id_map.items()]
+        # A job that changed country moves here from the shard of its previous country
         execute_batch(cur, """
             INSERT INTO faiss_index_map (index_name, job_id, position)
             VALUES (%s, %s, %s)
+            ON CONFLICT (job_id) DO UPDATE
+            SET index_name = EXCLUDED.index_name,
+                position = EXCLUDED.position
         """, data, page_size=5000)
-        conn.commit()
-    conn.close()
-    print(f"🗺️ Mapa de {len(job_ids)} IDs guardado en faiss_index_map.")
+    conn.commit()
+    print(f"💾 Índice FAISS '{index_name}' y mapa de {len(id_map)} IDs guardados en la base de datos.")
+
+
+def delete_stale_indexes(conn, index_names):
+    """Borra los índices que no se reconstruyeron: países sin empleos activos y el
+    índice único anterior a los shards por país."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT name FROM faiss_index
+            WHERE (name = %s OR starts_with(name, %s)) AND NOT (name = ANY(%s))
+        """, (FAISS_INDEX_NAME, shard_name(""), list(index_names)))
+        stale = [row["name"] for row in cur.fetchall()]
+        for table, column in (("faiss_index_map", "index_name"), ("faiss_index_segment", "index_name"), ("faiss_index", "name")):
+            cur.execute(f"DELETE FROM {table} WHERE {column} = ANY(%s)", (stale,))
+    conn.commit()
+    if stale:
+        print(f"🗑️ Índices eliminados: {', '.join(stale)}")
 
 
 # --------------------------------------------------------
@@ -127,17 +164,24 @@ def save_faiss_map_to_db(job_ids):
 
 def main():
     start = datetime.now()
-    print("🚀 Iniciando reconstrucción completa del índice FAISS...\n")
+    print("🚀 Iniciando reconstrucción completa de los índices FAISS por país...\n")
 
-    embeddings, job_ids, expirations = load_all_embeddings()
-    index = rebuild_faiss_index(embeddings)
-
-    # Serializar y guardar
-    faiss_bytes = faiss.serialize_index(index).tobytes()
-    save_faiss_index_to_db(faiss_bytes)
-    save_faiss_map_to_db(job_ids)
+    conn = get_db_connection()
+    index_names = []
+    for country_id in load_countries(conn):
+        index, job_ids = rebuild_faiss_index(conn, country_id)
+        id_map = IdRegistry.from_rows((job_id, i) for i, job_id in enumerate(job_ids))
+
+        # Serializar y guardar
+        index_name = shard_name(country_id)
+        save_faiss_index_to_db(conn, index_name, faiss.serialize_index(index), id_map)
+        index_names.append(index_name)
+        del index, id_map
+
+    delete_stale_indexes(conn, index_names)
+    conn.close()
 
-    print(f"\n✅ Reconstrucción completa en {datetime.now() - start}.\n")
+    print(f"\n✅ Reconstrucción de {len(index_names)} índices completa en {datetime.now() - start}.\n")
 
 
 if __name__ == "__main__":
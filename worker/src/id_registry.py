@@ -0,0 +1,61 @@
+from uuid import UUID
+
+
+class IdRegistry:
+    """Bidirectional map between job ids and FAISS positions.
+
+    Lookups by job id go through a dict and lookups by position through a
+    dense list indexed by position, so both directions are O(1).
+    """
+
+    def __init__(self):
+        self._positions = {}   # job_id -> position
+        self._job_ids = []     # position -> job_id (None for free slots)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build a registry from (job_id, position) rows."""
+        registry = cls()
+        for job_id, position in rows:
+            registry.add(job_id, position)
+        return registry
+
+    @staticmethod
+    def _key(job_id):
+        return job_id if isinstance(job_id, UUID) else UUID(str(job_id))
+
+    def add(self, job_id, position):
+        """Register job_id at position. Returns the previous position of the job, if any."""
+        job_id = self._key(job_id)
+        previous = self._positions.get(job_id)
+        if previous is not None and previous != position:
+            self._job_ids[previous] = None
+
+        if position >= len(self._job_ids):
+            self._job_ids.extend([None] * (position + 1 - len(self._job_ids)))
+        self._job_ids[position] = job_id
+        self._positions[job_id] = position
+        return previous
+
+    def position_of(self, job_id):
+        try:
+            return self._positions.get(self._key(job_id))
+        except ValueError:
+            return None
+
+    def job_id_at(self, position):
+        if 0 <= position < len(self._job_ids):
+            return self._job_ids[position]
+        return None
+
+    def __contains__(self, job_id):
+        return self.position_of(job_id) is not None
+
+    def __len__(self):
+        return len(self._positions)
+
+    def items(self):
+        """Yield (job_id, position) pairs ordered by position."""
+        for position, job_id in enumerate(self._job_ids):
+            if job_id is not None:
+                yield job_id, position
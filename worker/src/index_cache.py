@@ -0,0 +1,143 @@
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from uuid import UUID
+
+try:
+    import fcntl
+except ImportError:  # Windows: unique temp files and the meta check still apply
+    fcntl = None
+
+import faiss
+import numpy as np
+from dotenv import load_dotenv
+
+from index_factory import configure_index
+
+load_dotenv()
+
+# Local copy of the FAISS snapshot, written next to the worker and opened with mmap
+FAISS_CACHE_DIR = os.getenv(
+    "FAISS_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "faiss_cache"),
+)
+FAISS_MMAP = os.getenv("FAISS_MMAP", "1") == "1"
+# IO_FLAG_MMAP_IFC (faiss >= 1.10) maps the vector storage itself instead of copying it
+FAISS_MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+
+
+def _paths(index_name):
+    base = os.path.join(FAISS_CACHE_DIR, index_name)
+    return base + ".index", base + ".ids.npy", base + ".json"
+
+
+@contextmanager
+def _cache_lock(index_name, exclusive):
+    """Lock file of one cached index, shared by the worker and its spawned processes:
+    writers hold it exclusively for the whole snapshot, readers shared while validating."""
+    with open(os.path.join(FAISS_CACHE_DIR, index_name + ".lock"), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _atomic_write(path, write):
+    # A temp file per writer, so concurrent writers never write into the same file
+    fd, tmp_path = tempfile.mkstemp(dir=FAISS_CACHE_DIR, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_cache(index_name, index_bytes, id_map, updated_at):
+    """Store a serialized snapshot and its id map under the cache lock. The metadata is
+    the commit marker: it is cleared first and written last with the size of the other
+    two files, so a partially written cache is never considered valid."""
+    os.makedirs(FAISS_CACHE_DIR, exist_ok=True)
+    index_path, ids_path, meta_path = _paths(index_name)
+
+    with _cache_lock(index_name, exclusive=True):
+        _atomic_write(meta_path, lambda f: f.write(b"{}"))
+        _atomic_write(index_path, lambda f: f.write(index_bytes))
+        _atomic_write(ids_path, lambda f: np.save(f, id_map_to_array(id_map)))
+        meta = {
+            "updated_at": updated_at.isoformat(),
+            "index_size": os.path.getsize(index_path),
+            "ids_size": os.path.getsize(ids_path),
+        }
+        _atomic_write(meta_path, lambda f: f.write(json.dumps(meta).encode()))
+
+
+def read_cache(index_name, updated_at):
+    """Open the cached snapshot of version `updated_at` with its (job_id, position) rows.
+    Returns (index, path, rows), or None when the cache is missing, of another version or
+    its files do not match the metadata."""
+    index_path, ids_path, meta_path = _paths(index_name)
+    if not os.path.exists(meta_path):
+        return None
+
+    with _cache_lock(index_name, exclusive=False):
+        meta = _read_meta(meta_path)
+        try:
+            valid = (
+                meta.get("updated_at") == updated_at.isoformat()
+                and meta.get("index_size") == os.path.getsize(index_path)
+                and meta.get("ids_size") == os.path.getsize(ids_path)
+            )
+        except OSError:
+            valid = False
+        if not valid:
+            return None
+        # Both stay readable once the lock is released: a later write replaces the files
+        # instead of modifying them, and an mmap keeps the replaced one alive
+        index, path = open_cached_index(index_name)
+        rows = load_cached_id_rows(index_name)
+    return index, path, rows
+
+
+def open_cached_index(index_name):
+    """Open the cached snapshot, memory-mapped unless FAISS_MMAP=0. Returns (index, path).
+
+    A memory-mapped index is read-only; wrap it in a LayeredIndex before adding vectors.
+    """
+    index_path, _, _ = _paths(index_name)
+    flags = FAISS_MMAP_FLAGS if FAISS_MMAP else 0
+    return configure_index(faiss.read_index(index_path, flags)), index_path
+
+
+def load_cached_id_rows(index_name):
+    """(job_id, position) rows of the cached id map."""
+    _, ids_path, _ = _paths(index_name)
+    ids = np.load(ids_path)
+    occupied = np.flatnonzero(ids.any(axis=1))
+    return [(UUID(bytes=ids[position].tobytes()), int(position)) for position in occupied]
+
+
+def id_map_to_array(id_map):
+    """Dense (n, 16) uint8 array of job UUIDs by position; free slots are zero."""
+    rows = list(id_map.items())
+    size = max((position for _, position in rows), default=-1) + 1
+    ids = np.zeros((size, 16), dtype=np.uint8)
+    for job_id, position in rows:
+        ids[position] = np.frombuffer(job_id.bytes, dtype=np.uint8)
+    return ids
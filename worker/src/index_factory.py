@@ -0,0 +1,132 @@
+import os
+import faiss
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Configuración ---
+FAISS_DIM = 384  # para MiniLM-L12-v2
+# Prefix of the per-country shard names in faiss_index / faiss_index_map
+FAISS_INDEX_NAME = "jobit_faiss_index"
+# sq8 / fp16: scalar-quantized codes (1 / 2 bytes per dimension instead of 4)
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw", "sq8", "fp16", "ivf_sq8", "hnsw_sq8")
+
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat")
+FAISS_NLIST = int(os.getenv("FAISS_NLIST", 1024))
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", 16))
+FAISS_PQ_M = int(os.getenv("FAISS_PQ_M", 48))  # 384 / 48 = 8 dims per sub-quantizer
+FAISS_PQ_NBITS = int(os.getenv("FAISS_PQ_NBITS", 8))
+FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", 32))
+FAISS_EF_CONSTRUCTION = int(os.getenv("FAISS_EF_CONSTRUCTION", 200))
+FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", 64))
+
+# IVF variants are trained on a sample of job_embeddings; below this size a flat index is used
+FAISS_TRAIN_SIZE = int(os.getenv("FAISS_TRAIN_SIZE", 100_000))
+FAISS_MIN_TRAIN_SIZE = int(os.getenv("FAISS_MIN_TRAIN_SIZE", 10_000))
+# Scalar quantizers only learn a value range per dimension, so they need far fewer vectors
+FAISS_MIN_SQ_TRAIN_SIZE = int(os.getenv("FAISS_MIN_SQ_TRAIN_SIZE", 1_000))
+
+SCALAR_QUANTIZERS = {
+    "sq8": faiss.ScalarQuantizer.QT_8bit,
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "ivf_sq8": faiss.ScalarQuantizer.QT_8bit,
+    "hnsw_sq8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+
+def shard_name(country_id):
+    """Index name of a country's shard in faiss_index / faiss_index_map."""
+    return f"{FAISS_INDEX_NAME}_{country_id}"
+
+
+def requires_training(index_type=FAISS_INDEX_TYPE):
+    return index_type in ("ivf_flat", "ivf_pq", "ivf_sq8", "sq8", "hnsw_sq8")
+
+
+def min_training_size(index_type):
+    return FAISS_MIN_TRAIN_SIZE if index_type.startswith("ivf") else FAISS_MIN_SQ_TRAIN_SIZE
+
+
+def create_index(index_type=FAISS_INDEX_TYPE, dim=FAISS_DIM, training_vectors=None):
+    """Create an empty inner-product index of the given type, training it if needed."""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS index type '{index_type}', expected one of {INDEX_TYPES}")
+
+    if requires_training(index_type):
+        if training_vectors is None or len(training_vectors) < min_training_size(index_type):
+            available = 0 if training_vectors is None else len(training_vectors)
+            print(f"⚠️ Only {available} training vectors for '{index_type}', using 'flat' index instead.")
+            index_type = "flat"
+
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dim)
+
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = FAISS_EF_CONSTRUCTION
+
+    elif index_type in ("sq8", "fp16"):
+        index = faiss.IndexScalarQuantizer(dim, SCALAR_QUANTIZERS[index_type], faiss.METRIC_INNER_PRODUCT)
+        # fp16 needs no training
+        if not index.is_trained:
+            index.train(np.ascontiguousarray(training_vectors, dtype=np.float32))
+
+    elif index_type == "hnsw_sq8":
+        index = faiss.IndexHNSWSQ(dim, SCALAR_QUANTIZERS[index_type], FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = FAISS_EF_CONSTRUCTION
+        index.train(np.ascontiguousarray(training_vectors, dtype=np.float32))
+
+    else:
+        training_vectors = np.ascontiguousarray(training_vectors, dtype=np.float32)
+        nlist = max(1, min(FAISS_NLIST, len(training_vectors) // 39))
+        quantizer = faiss.IndexFlatIP(dim)
+
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        elif index_type == "ivf_sq8":
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dim, nlist, SCALAR_QUANTIZERS[index_type], faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, FAISS_PQ_M, FAISS_PQ_NBITS, faiss.METRIC_INNER_PRODUCT)
+
+        index.train(training_vectors)
+
+    configure_index(index)
+    return index
+
+
+def configure_index(index):
+    """Apply search-time settings. Must also be called on deserialized indexes."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = FAISS_NPROBE
+        # Needed by reconstruct() in get_related_jobs
+        if ivf.direct_map.type == faiss.DirectMap.NoMap:
+            ivf.make_direct_map()
+
+    hnsw = getattr(index, "hnsw", None)
+    if hnsw is not None:
+        hnsw.efSearch = FAISS_EF_SEARCH
+
+    return index
+
+
+def search_parameters(index, selector):
+    """Search parameters restricting results to `selector`, keeping the configured nprobe / efSearch."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+
+    hnsw = getattr(index, "hnsw", None)
+    if hnsw is not None:
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=hnsw.efSearch)
+
+    return faiss.SearchParameters(sel=selector)
+
+
+def sample_training_vectors(embeddings, size=FAISS_TRAIN_SIZE, seed=1234):
+    """Random subset of an embeddings matrix used to train IVF indexes."""
+    if len(embeddings) <= size:
+        return embeddings
+    rng = np.random.default_rng(seed)
+    return embeddings[rng.choice(len(embeddings), size, replace=False)]
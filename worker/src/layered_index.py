@@ -0,0 +1,89 @@
+import faiss
+import numpy as np
+
+from index_factory import configure_index, search_parameters
+
+
+class LayeredIndex:
+    """Read-only base index plus an in-memory delta index for new vectors.
+
+    The base is usually memory-mapped from the local cache and cannot be
+    modified (IVF lists opened with IO_FLAG_MMAP are read-only), so vectors
+    added after the snapshot go to a flat delta index. Positions
+    [0, base.ntotal) live in the base and the rest in the delta, so callers
+    see one contiguous index.
+    """
+
+    def __init__(self, base, base_path=None):
+        self.base = base
+        self.base_path = base_path
+        self.delta = faiss.IndexFlat(base.d, base.metric_type)
+
+    @property
+    def d(self):
+        return self.base.d
+
+    @property
+    def ntotal(self):
+        return self.base.ntotal + self.delta.ntotal
+
+    def add(self, vectors):
+        self.delta.add(vectors)
+
+    def reconstruct(self, position):
+        if position < self.base.ntotal:
+            return self.base.reconstruct(position)
+        return self.delta.reconstruct(position - self.base.ntotal)
+
+    def search(self, queries, k, active_set=None):
+        """Top-k over base and delta. With an ActiveSet only live positions are returned."""
+        if self.delta.ntotal == 0:
+            return self._search(self.base, queries, k, active_set, 0)
+
+        delta_scores, delta_positions = self._search(self.delta, queries, k, active_set, self.base.ntotal)
+        delta_positions = np.where(delta_positions >= 0, delta_positions + self.base.ntotal, -1)
+        if self.base.ntotal == 0:
+            return delta_scores, delta_positions
+
+        base_scores, base_positions = self._search(self.base, queries, k, active_set, 0)
+        return merge_results(
+            np.hstack([base_scores, delta_scores]),
+            np.hstack([base_positions, delta_positions]),
+            k,
+            self.base.metric_type,
+        )
+
+    @staticmethod
+    def _search(index, queries, k, active_set, start):
+        if active_set is None:
+            return index.search(queries, k)
+        # `bits` backs the selector and must stay alive during the search
+        selector, bits = active_set.selector(start, start + index.ntotal)
+        return index.search(queries, k, params=search_parameters(index, selector))
+
+    def merged(self, keep=None):
+        """In-memory copy of the base with the delta vectors added, ready to be serialized.
+
+        When `keep` is given only those positions are kept, renumbered in that order.
+        """
+        if self.base_path is not None:
+            index = configure_index(faiss.read_index(self.base_path))
+        else:
+            index = configure_index(faiss.clone_index(self.base))
+        if self.delta.ntotal:
+            index.add(self.delta.reconstruct_n(0, self.delta.ntotal))
+        if keep is not None:
+            vectors = index.reconstruct_batch(np.asarray(keep, dtype=np.int64))
+            # reset() keeps the trained quantizers, so IVF indexes need no retraining
+            index.reset()
+            index.add(vectors)
+        return index
+
+
+def merge_results(scores, positions, k, metric_type=faiss.METRIC_INNER_PRODUCT):
+    """Keep the best k of several concatenated (scores, positions) result sets."""
+    if metric_type == faiss.METRIC_INNER_PRODUCT:
+        order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    else:
+        order = np.argsort(scores, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(positions, order, axis=1)
@@ -1,113 +1,184 @@
-from datetime import datetime, timedelta
+from datetime import datetime
+import threading
 from uuid import UUID
-import numpy as np
 from sentence_transformers import SentenceTransformer
-from db import insert_faiss_index_map, insert_recommendation, load_faiss_index, load_faiss_index_map, persist_faiss_index, upsert_embedding
-import faiss
+from db import load_embedding_hashes, load_faiss_index_names, load_job_countries, load_profile_countries, replace_recommendations, update_embedding_expirations, upsert_embeddings
+from embedding_cache import EmbeddingCache
+from index_factory import shard_name
+from shard import Shard
 
 
-FAISS_INDEX_NAME = "jobit_faiss_index"
+MODEL_NAME = 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
 
 model = None
-id_map = None
-faiss_index = None
+embedding_cache = None
 
-persist_interval = 60  # seconds
-last_persist_time = datetime.now() - timedelta(seconds=persist_interval)
+# One FAISS index per country, loaded on first use
+shards = {}
+shards_lock = threading.Lock()
 
 def init_embedding():
-    global model
-    global id_map
-    global faiss_index
-    
-    model = SentenceTransformer('sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
+    global model, embedding_cache
+
+    model = SentenceTransformer(MODEL_NAME)
     #model = SentenceTransformer('all-MiniLM-L6-v2')
-    
-    index_bytes = load_faiss_index(FAISS_INDEX_NAME)
+    embedding_cache = EmbeddingCache(model, MODEL_NAME)
+
+
+def init_index():
+    """Load every country shard. Also refreshes their local cache, so processes started
+    afterwards memory-map the same snapshot files."""
+    for name in load_faiss_index_names(shard_name("")):
+        get_shard_by_name(name)
+
+
+def get_shard(country_id):
+    return get_shard_by_name(shard_name(country_id))
+
 
-    # Check if FAISS index exists or create a new one
-    if index_bytes:
-        faiss_index = faiss.deserialize_index(np.frombuffer(index_bytes, dtype=np.uint8))
-        id_map = load_faiss_index_map(FAISS_INDEX_NAME)
-        
-        print("FAISS index loaded.")
-    else:
-        faiss_index = faiss.IndexFlatIP(384)
-        id_map = []
-        print("New FAISS index created.")
+def get_shard_by_name(name):
+    shard = shards.get(name)
+    if shard is None:
+        with shards_lock:
+            shard = shards.get(name)
+            if shard is None:
+                shard = shards[name] = Shard(name)
+    return shard
+
+
+def _countries(items, id_key, load_countries):
+    """country_id of each item, from the event when present, otherwise from the database."""
+    countries = {str(item.get(id_key, "")): str(item.get("country_id") or "") for item in items}
+    missing = [item_id for item_id, country_id in countries.items() if item_id and not country_id]
+    if missing:
+        for item_id, country_id in load_countries(missing).items():
+            countries[str(item_id)] = str(country_id or "")
+    return [countries[str(item.get(id_key, ""))] for item in items]
 
 
 def process_job_data(job_data):
-    job_id = job_data.get("job_id", "")
-    job_expiration = job_data.get("job_expiration", "")
-    job_detail = job_data.get("job_detail", "")
+    process_jobs_batch([job_data])
+
+
+def process_jobs_batch(jobs_data):
+    # Keep only the latest event per job so a batch never indexes a job twice
+    jobs_data = list({str(job_data.get("job_id", "")): job_data for job_data in jobs_data}.values())
+
+    job_ids = [job_data.get("job_id", "") for job_data in jobs_data]
+    job_expirations = [job_data.get("job_expiration", "") for job_data in jobs_data]
+    job_details = [job_data.get("job_detail", "") for job_data in jobs_data]
+    job_countries = _countries(jobs_data, "job_id", load_job_countries)
+    job_hashes = embedding_cache.hashes(job_details)
 
-    embedding = generate_embedding(job_id, job_expiration, job_detail)
-    position = add_faiss_index_entry(embedding)
-    add_faiss_index_map_entry(job_id, position)
+    # Same text as the stored embedding (e.g. only salary, tags or expiry changed) and
+    # already in its shard: keep the vector, only the expiration is updated
+    unchanged = _unchanged_jobs(job_ids, job_countries, job_hashes)
+    if unchanged:
+        refresh_jobs([job_ids[i] for i in unchanged], [job_countries[i] for i in unchanged], [job_expirations[i] for i in unchanged])
+        unchanged = set(unchanged)
+        changed = [i for i in range(len(job_ids)) if i not in unchanged]
+        job_ids, job_expirations, job_details, job_countries, job_hashes = (
+            [values[i] for i in changed] for values in (job_ids, job_expirations, job_details, job_countries, job_hashes)
+        )
+        if not job_ids:
+            return
 
-    update_faiss_index()
+    embeddings = generate_embeddings(job_ids, job_expirations, job_details, job_hashes)
 
+    for country_id in set(job_countries):
+        batch = [i for i, job_country in enumerate(job_countries) if job_country == country_id]
+        if not country_id:
+            print(f"⚠️ Skipping {len(batch)} jobs without country.")
+            continue
 
-def generate_embedding(id: UUID, expires_at: datetime, input_text: str):
-    embedding = model.encode(input_text, normalize_embeddings=True)
-    upsert_embedding(id, expires_at, embedding)
-    return embedding
+        shard = get_shard(country_id)
+        batch_job_ids = [job_ids[i] for i in batch]
 
+        # A job that changed country stays in its previous shard until compaction
+        for other in list(shards.values()):
+            if other is not shard:
+                other.deactivate(batch_job_ids)
 
-def add_faiss_index_entry(embedding):
-    faiss_index.add(embedding.reshape(1, -1))
-    return faiss_index.ntotal - 1
+        shard.add(batch_job_ids, embeddings[batch], [job_expirations[i] for i in batch])
 
 
-def add_faiss_index_map_entry(job_id, position):
-    id_map.append((job_id, position))
-    insert_faiss_index_map(job_id, position, FAISS_INDEX_NAME)
+def _unchanged_jobs(job_ids, job_countries, job_hashes):
+    """Positions of the jobs whose text hash matches their stored embedding and that are
+    already in the shard of their country."""
+    stored = load_embedding_hashes(job_ids)
+    unchanged = []
+    for i, (job_id, country_id, content_hash) in enumerate(zip(job_ids, job_countries, job_hashes)):
+        if country_id and stored.get(UUID(str(job_id))) == content_hash and get_shard(country_id).id_map.position_of(job_id) is not None:
+            unchanged.append(i)
+    return unchanged
 
 
-def update_faiss_index():
-    global last_persist_time
-    if datetime.now() - last_persist_time > timedelta(seconds=persist_interval):
-        faiss_bytes = faiss.serialize_index(faiss_index).tobytes()
-        persist_faiss_index(faiss_bytes, FAISS_INDEX_NAME)
-        last_persist_time = datetime.now()
-        print("FAISS index persisted.")
+def refresh_jobs(job_ids, job_countries, job_expirations):
+    update_embedding_expirations(zip(job_ids, job_expirations))
+    for country_id in set(job_countries):
+        batch = [i for i, job_country in enumerate(job_countries) if job_country == country_id]
+        get_shard(country_id).refresh([job_ids[i] for i in batch], [job_expirations[i] for i in batch])
+    embedding_cache.metadata_only += len(job_ids)
+    print(f"Updated the expiration of {len(job_ids)} jobs without re-encoding.")
+
+
+def deactivate_jobs(job_ids):
+    """Exclude deleted or deactivated jobs from searches; compaction removes their vectors.
+    Shards that are not loaded yet read the job state from the database when loading."""
+    for shard in list(shards.values()):
+        shard.deactivate(job_ids)
+
+
+def update_faiss_index(force=False):
+    """Compact every loaded shard that has enough pending segments."""
+    for shard in list(shards.values()):
+        with shard.lock:
+            shard.update(force)
+
+
+def generate_embeddings(ids: list[UUID], expires_at: list[datetime], input_texts: list[str], content_hashes: list[bytes] = None):
+    content_hashes = content_hashes or embedding_cache.hashes(input_texts)
+    embeddings = embedding_cache.encode(input_texts, content_hashes)
+    upsert_embeddings(zip(ids, expires_at, embeddings), content_hashes)
+    return embeddings
 
 
 def recommend_jobs(profile_data, k=10):
-    user_id = profile_data.get("user_id", "")
-    updated_at = profile_data.get("updated_at", "")
-    profile_detail = profile_data.get("profile_detail", "")
+    recommend_profiles_batch([profile_data], k)
 
-    profile_embedding = model.encode([profile_detail], normalize_embeddings=True)
-    scores, positions = faiss_index.search(profile_embedding, k)
-    
-    for position, score in zip(positions[0], scores[0]):
-        # Insert only if score is above a threshold
 
-        job_id = id_map[position]
-        # "job_id" is of type uuid but expression is of type record
-        job_id = job_id[0]
-        #print(f"Job ID: {job_id}, Score: {score}")
-        insert_recommendation(user_id, job_id, float(score))
+def recommend_profiles_batch(profiles, k=10):
+    """Encode a batch of profiles, search each country's shard once with all of its
+    profiles and replace their recommendations in one transaction.
+    Returns the number of rows written."""
+    if not profiles:
+        return 0
 
+    user_ids = [profile_data.get("user_id", "") for profile_data in profiles]
+    profile_details = [profile_data.get("profile_detail", "") or "" for profile_data in profiles]
+    profile_countries = _countries(profiles, "user_id", load_profile_countries)
 
-def get_related_jobs(job_id, k=5):
-    # Find the position of the job_id in the id_map
-    position = next((pos for jid, pos in id_map if jid == job_id), None)
-    if position is None:
-        return []
+    profile_embeddings = embedding_cache.encode(profile_details)
 
-    # Get the embedding of the job at that position
-    job_embedding = faiss_index.reconstruct(position).reshape(1, -1)
+    rows = []
+    # Profiles without country get no recommendations
+    for country_id in set(country_id for country_id in profile_countries if country_id):
+        batch = [i for i, profile_country in enumerate(profile_countries) if profile_country == country_id]
+        results = get_shard(country_id).search(profile_embeddings[batch], k)
+        for i, hits in zip(batch, results):
+            rows.extend((user_ids[i], job_id, score) for job_id, score in hits)
 
-    # Search for similar jobs
-    scores, positions = faiss_index.search(job_embedding, k + 1)  # +1 to exclude itself
+    replace_recommendations(user_ids, rows)
+    return len(rows)
 
-    related_jobs = []
-    for pos, score in zip(positions[0], scores[0]):
-        if pos != position:  # Exclude the original job
-            related_job_id = id_map[pos][0]
-            related_jobs.append((related_job_id, float(score)))
 
-    return related_jobs
\ No newline at end of file
+def get_related_jobs(job_id, k=5):
+    # Loaded shards first; fall back to the job's country when it is not live in any of them
+    for shard in list(shards.values()):
+        if shard.live_position_of(job_id) is not None:
+            return shard.related_jobs(job_id, k)
+
+    country_id = load_job_countries([job_id]).get(UUID(str(job_id)))
+    if country_id is None:
+        return []
+    return get_shard(country_id).related_jobs(job_id, k)
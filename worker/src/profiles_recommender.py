@@ -1,44 +1,107 @@
-from db import count_profiles, init_db, load_profiles
+import multiprocessing
+import os
+import time
+
+from db import count_profiles, init_db, load_profile_id_bounds, load_profiles
 
 from concurrent.futures import ProcessPoolExecutor, as_completed
-from model import init_embedding, recommend_jobs
+from model import init_embedding, init_index, recommend_profiles_batch
 from dotenv import load_dotenv
 from tqdm import tqdm
+import faiss
+import torch
 
 
-
-def process_chunk(chunk):
-    for profile_data in chunk:
-        recommend_jobs(profile_data)
+BATCH_SIZE = int(os.getenv("PROFILE_BATCH_SIZE", 2000))
+TOP_K = int(os.getenv("RECOMMENDATIONS_PER_PROFILE", 10))
+NUM_WORKERS = int(os.getenv("PROFILE_WORKERS", 4))  # Ajusta según CPU
+# Ranges per worker; more ranges give finer progress and better load balance
+RANGES_PER_WORKER = int(os.getenv("PROFILE_RANGES_PER_WORKER", 8))
 
 
-def main():
+def init_worker(num_threads):
+    """Runs once in each worker process. Spawned workers re-import db and open their own
+    connection; the FAISS index is memory-mapped from the shared local cache."""
     load_dotenv()
-    init_db()
+    faiss.omp_set_num_threads(num_threads)
+    torch.set_num_threads(num_threads)
     init_embedding()
-    # init_db() # si tienes una función para inicializar la DB
-    BATCH_SIZE = 2000
-    NUM_WORKERS = 4  # Ajusta según CPU
 
-    total = count_profiles()
-    print(f"Total a procesar: {total}")
 
+def recommend_range(after_id, until_id):
+    """Recommend every profile with after_id < id <= until_id. Returns (profiles, rows)."""
+    processed = 0
+    written = 0
+    while True:
+        rows = load_profiles(BATCH_SIZE, after_id, until_id)
+        if not rows:
+            return processed, written
+
+        written += recommend_profiles_batch(rows, TOP_K)
+        processed += len(rows)
+        after_id = rows[-1]["user_id"]
+
+
+def run_serial(pbar):
+    init_embedding()
+
+    processed = 0
+    written = 0
+    last_id = None
+    while True:
+        # Keyset pagination: each page starts after the last profile id of the previous one
+        rows = load_profiles(BATCH_SIZE, last_id)
+        if not rows:
+            return processed, written
+
+        written += recommend_profiles_batch(rows, TOP_K)
+        processed += len(rows)
+        last_id = rows[-1]["user_id"]
+        pbar.update(len(rows))
 
-    with tqdm(total=total, desc="Procesando documentos", dynamic_ncols=True) as pbar:
-        while True:
-            rows = load_profiles(BATCH_SIZE)
-            if not rows:
-                break
 
-            # Dividir en sub-batches para multiprocessing
-            chunk_size = 100  # puedes ajustar
-            chunks = [rows[i:i+chunk_size] for i in range(0, len(rows), chunk_size)]
+def run_parallel(pbar, num_workers):
+    # Refresh the local snapshot cache once so every worker maps the same file
+    init_index()
+
+    bounds = load_profile_id_bounds(num_workers * RANGES_PER_WORKER)
+    ranges = list(zip([None] + bounds[:-1], bounds))
+    num_threads = max(1, (os.cpu_count() or 1) // num_workers)
+
+    processed = 0
+    written = 0
+    # spawn: workers must not inherit the parent's PostgreSQL connection
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(num_workers, mp_context=ctx, initializer=init_worker, initargs=(num_threads,)) as executor:
+        futures = [executor.submit(recommend_range, after_id, until_id) for after_id, until_id in ranges]
+        for future in as_completed(futures):
+            range_processed, range_written = future.result()
+            processed += range_processed
+            written += range_written
+            pbar.update(range_processed)
+
+    return processed, written
+
+
+def main():
+    load_dotenv()
+
+    init_db()
+
+    total = count_profiles()
+    print(f"Total a procesar: {total} ({NUM_WORKERS} procesos)")
 
-            for chunk in chunks:
-                process_chunk(chunk)
-                pbar.update(len(chunk))
+    start = time.perf_counter()
+    with tqdm(total=total, desc="Procesando perfiles", dynamic_ncols=True) as pbar:
+        if NUM_WORKERS > 1:
+            processed, written = run_parallel(pbar, NUM_WORKERS)
+        else:
+            processed, written = run_serial(pbar)
 
-    print("\n✅ Procesamiento completado con éxito.")
+    elapsed = time.perf_counter() - start
+    elapsed = max(elapsed, 1e-9)
+    print(f"\n✅ {processed} perfiles, {written} recomendaciones en {elapsed:.1f}s "
+          f"({processed / elapsed:.0f} perfiles/s, {written / elapsed:.0f} filas/s).")
 
 if __name__ == "__main__":
     main()
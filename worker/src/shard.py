@@ -0,0 +1,215 @@
+from datetime import datetime, timedelta
+import os
+import threading
+import numpy as np
+from active_set import ActiveSet
+from db import compact_faiss_index, load_embedding_sample, load_faiss_index, load_faiss_index_map, load_faiss_index_updated_at, load_faiss_segments, load_job_states, persist_faiss_segment, replace_faiss_index
+from id_registry import IdRegistry
+from index_cache import open_cached_index, read_cache, write_cache
+from index_factory import FAISS_DIM, FAISS_INDEX_TYPE, FAISS_TRAIN_SIZE, configure_index, create_index, requires_training
+from layered_index import LayeredIndex
+import faiss
+
+
+# New vectors are persisted right away as small delta segments; the full
+# snapshot is only rewritten when compacting.
+persist_interval = int(os.getenv("FAISS_COMPACT_INTERVAL", 3600))  # seconds
+max_segments = int(os.getenv("FAISS_COMPACT_SEGMENTS", 1000))
+# Compaction also drops stale vectors once they exceed this fraction of the index
+purge_ratio = float(os.getenv("FAISS_PURGE_RATIO", 0.2))
+
+
+class Shard:
+    """FAISS index, id map and active set of one country.
+
+    Positions are local to the shard. Writes (new vectors, compaction) are serialized
+    with `lock`; compaction replaces index, id_map and active_set in one assignment.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.last_persist_time = datetime.now()
+        self.segments_since_snapshot = 0
+
+        self.index, self.id_map = load_index(name)
+        self.apply_segments()
+        self.active_set = load_active_set(name, self.id_map, self.index.ntotal)
+
+    def apply_segments(self):
+        """Replay the delta segments written after the snapshot."""
+        for start_position, vectors in load_faiss_segments(self.name, self.index.ntotal):
+            if start_position != self.index.ntotal:
+                print(f"⚠️ Gap in FAISS segments of '{self.name}' at position {self.index.ntotal}, ignoring the rest.")
+                break
+            self.index.add(np.frombuffer(vectors, dtype=np.float32).reshape(-1, FAISS_DIM))
+            self.segments_since_snapshot += 1
+
+        if self.segments_since_snapshot:
+            print(f"Applied {self.segments_since_snapshot} FAISS segments to '{self.name}' ({self.index.ntotal} vectors).")
+
+    def add(self, job_ids, embeddings, expirations):
+        with self.lock:
+            positions = self._add_vectors(job_ids, embeddings)
+            for job_id, position, expires_at in zip(job_ids, positions, expirations):
+                previous = self.id_map.add(job_id, position)
+                if previous is not None:
+                    self.active_set.deactivate(previous)
+                self.active_set.set_live(position, expires_at)
+
+            self.update(force=False)
+
+    def _add_vectors(self, job_ids, embeddings):
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        start = self.index.ntotal
+        positions = list(range(start, start + len(embeddings)))
+
+        # Persist the delta segment and its id mappings before touching the in-memory index,
+        # so a failed write leaves no gap in the positions
+        persist_faiss_segment(self.name, start, embeddings.tobytes(), zip(job_ids, positions))
+        self.index.add(embeddings)
+        self.segments_since_snapshot += 1
+        return positions
+
+    def refresh(self, job_ids, expirations):
+        """Update the expiration of jobs whose vector did not change (reactivates them if needed)."""
+        with self.lock:
+            for job_id, expires_at in zip(job_ids, expirations):
+                position = self.id_map.position_of(job_id)
+                if position is not None:
+                    self.active_set.set_live(position, expires_at)
+
+    def deactivate(self, job_ids):
+        for job_id in job_ids:
+            position = self.id_map.position_of(job_id)
+            if position is not None:
+                self.active_set.deactivate(position)
+
+    def live_position_of(self, job_id):
+        position = self.id_map.position_of(job_id)
+        if position is not None and self.active_set.is_live(position):
+            return position
+        return None
+
+    def search(self, queries, k):
+        """Top-k live jobs per query, as one list of (job_id, score) per query."""
+        index, id_map, active_set = self.index, self.id_map, self.active_set
+        scores, positions = index.search(np.ascontiguousarray(queries, dtype=np.float32), k, active_set)
+
+        results = []
+        for query_positions, query_scores in zip(positions, scores):
+            hits = [(id_map.job_id_at(position), float(score)) for position, score in zip(query_positions, query_scores)]
+            results.append([(job_id, score) for job_id, score in hits if job_id is not None])
+        return results
+
+    def related_jobs(self, job_id, k=5):
+        index, id_map, active_set = self.index, self.id_map, self.active_set
+
+        # Find the position of the job_id in the id_map
+        position = id_map.position_of(job_id)
+        if position is None or position >= index.ntotal:
+            return []
+
+        # Get the embedding of the job at that position
+        job_embedding = index.reconstruct(position).reshape(1, -1)
+
+        # Search for similar jobs
+        scores, positions = index.search(job_embedding, k + 1, active_set)  # +1 to exclude itself
+
+        related_jobs = []
+        for pos, score in zip(positions[0], scores[0]):
+            if pos != position:  # Exclude the original job
+                related_job_id = id_map.job_id_at(pos)
+                if related_job_id is not None:
+                    related_jobs.append((related_job_id, float(score)))
+
+        return related_jobs[:k]
+
+    def update(self, force=False):
+        """Compact the delta segments into a new snapshot when enough have accumulated.
+        Callers must hold `lock`."""
+        if self.segments_since_snapshot == 0:
+            return
+
+        interval_elapsed = datetime.now() - self.last_persist_time > timedelta(seconds=persist_interval)
+        if force or interval_elapsed or self.segments_since_snapshot >= max_segments:
+            self.index, self.id_map, self.active_set = self.compact()
+            self.last_persist_time = datetime.now()
+            self.segments_since_snapshot = 0
+            print(f"FAISS index '{self.name}' compacted ({self.index.ntotal} vectors).")
+
+    def compact(self):
+        """Write base + delta as the new snapshot and reopen it from the local cache.
+
+        When too many positions are stale, only live vectors are kept and positions are
+        renumbered, which rewrites faiss_index_map as well.
+        Returns (index, id_map, active_set).
+        """
+        index, registry, active = self.index, self.id_map, self.active_set
+
+        if active.dead_count(index.ntotal) > purge_ratio * index.ntotal:
+            live = active.live_positions(index.ntotal)
+            merged = index.merged(keep=live)
+            faiss_bytes = faiss.serialize_index(merged)
+
+            registry = IdRegistry.from_rows((self.id_map.job_id_at(int(position)), i) for i, position in enumerate(live))
+            active = self.active_set.subset(live)
+            updated_at = replace_faiss_index(faiss_bytes, self.name, registry.items())
+            print(f"Removed {index.ntotal - len(live)} stale vectors from '{self.name}'.")
+        else:
+            merged = index.merged()
+            faiss_bytes = faiss.serialize_index(merged)
+            updated_at = compact_faiss_index(faiss_bytes, self.name, merged.ntotal)
+
+        try:
+            write_cache(self.name, faiss_bytes, registry, updated_at)
+            return LayeredIndex(*open_cached_index(self.name)), registry, active
+        except OSError as e:
+            print(f"⚠️ Could not write the local FAISS cache: {e}")
+            return LayeredIndex(merged), registry, active
+
+
+def load_index(index_name):
+    """Open the snapshot from the local cache when it matches the database, otherwise
+    download it once into the cache. Returns (LayeredIndex, IdRegistry)."""
+    updated_at = load_faiss_index_updated_at(index_name)
+
+    if updated_at is None:
+        training_vectors = None
+        if requires_training(FAISS_INDEX_TYPE):
+            training_vectors = load_embedding_sample(FAISS_TRAIN_SIZE)
+        index = LayeredIndex(create_index(FAISS_INDEX_TYPE, FAISS_DIM, training_vectors))
+        print(f"New FAISS index '{index_name}' created ({type(index.base).__name__}).")
+        return index, IdRegistry.from_rows(load_faiss_index_map(index_name))
+
+    cached = read_cache(index_name, updated_at)
+    if cached is not None:
+        base, path, rows = cached
+        registry = IdRegistry.from_rows(rows)
+        # Mappings written with the segments after the snapshot
+        for job_id, position in load_faiss_index_map(index_name, base.ntotal):
+            registry.add(job_id, position)
+        print(f"FAISS index '{index_name}' loaded from local cache.")
+    else:
+        index_bytes, updated_at = load_faiss_index(index_name)
+        registry = IdRegistry.from_rows(load_faiss_index_map(index_name))
+        try:
+            write_cache(index_name, index_bytes, registry, updated_at)
+            base, path = open_cached_index(index_name)
+            print(f"FAISS index '{index_name}' loaded from database and cached locally.")
+        except OSError as e:
+            print(f"⚠️ Could not write the local FAISS cache: {e}")
+            base, path = configure_index(faiss.deserialize_index(np.frombuffer(index_bytes, dtype=np.uint8))), None
+            print(f"FAISS index '{index_name}' loaded from database.")
+
+    return LayeredIndex(base, path), registry
+
+
+def load_active_set(index_name, registry, size):
+    active = ActiveSet(size)
+    for position, expires_at, is_active in load_job_states(index_name):
+        if is_active and position < size and registry.job_id_at(position) is not None:
+            active.set_live(position, expires_at)
+    expired = active.sweep()
+    print(f"{len(active.live_positions(size))} live jobs in '{index_name}' ({expired} expired).")
+    return active
@@ -1,3 +1,4 @@
+import faiss
 import numpy as np
 
 def precision_at_k(retrieved, relevant, k):
@@ -47,8 +48,12 @@ def mrr_single(retrieved, relevant):
             return 1.0 / i
     return 0.0
 
+def bytes_per_vector(faiss_index):
+    """Serialized size per vector; for flat-code indexes this is also their RAM."""
+    return faiss.serialize_index(faiss_index).nbytes / max(faiss_index.ntotal, 1)
+
 # evaluación global
-def evaluate_faiss(faiss_index, queries_emb, ground_truth, ks=[1,5,10,20], topn=100):
+def evaluate_faiss(faiss_index, queries_emb, ground_truth, ks=[1,5,10,20], topn=100, memory=False):
     # ejecutar búsqueda
     D, I = faiss_index.search(queries_emb.astype(np.float32), topn)  # I shape (Q, topn)
     results = {}
@@ -84,8 +89,37 @@ def evaluate_faiss(faiss_index, queries_emb, ground_truth, ks=[1,5,10,20], topn=
     for key in list(results.keys()):
         results[key] = results[key] / Q
 
+    if memory:
+        results['bytes_per_vector'] = bytes_per_vector(faiss_index)
+
     return results
 
 # Uso:
 # metrics = evaluate_faiss(faiss_index, queries_emb, ground_truth, ks=[1,5,10], topn=100)
 # print(metrics)
+
+
+def recall_vs_memory(indexes, queries_emb, ground_truth, k=10, baseline="flat"):
+    """Recall-vs-memory report of several indexes over the same vectors.
+
+    indexes: {name: faiss index}, ground_truth: exact top-k per query (as for evaluate_faiss).
+    Returns one row per index with recall@k, bytes per vector and how many times more
+    vectors fit in the memory of `baseline`.
+    """
+    rows = []
+    for name, faiss_index in indexes.items():
+        metrics = evaluate_faiss(faiss_index, queries_emb, ground_truth, ks=[k], topn=k, memory=True)
+        rows.append({
+            "index": name,
+            f"recall@{k}": metrics[f'recall@{k}'],
+            "NDCG@10": metrics['NDCG@10'],
+            "bytes_per_vector": metrics['bytes_per_vector'],
+        })
+
+    baseline_bytes = next((row["bytes_per_vector"] for row in rows if row["index"] == baseline), None)
+    for row in rows:
+        row["x_per_worker"] = baseline_bytes / row["bytes_per_vector"] if baseline_bytes else float("nan")
+    return rows
+
+# Uso:
+# rows = recall_vs_memory({"flat": flat, "sq8": sq8, "fp16": fp16}, queries_emb, ground_truth, k=10)
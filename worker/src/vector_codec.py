@@ -0,0 +1,96 @@
+import io
+import struct
+from datetime import datetime
+from uuid import UUID
+
+import numpy as np
+
+# pgvector binary format (vector_send / vector_recv): int16 dim, int16 unused,
+# then dim big-endian float4
+VECTOR_HEADER = struct.Struct(">hh")
+VECTOR_DTYPE = np.dtype(">f4")
+
+COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+COPY_TRAILER = struct.pack(">h", -1)
+_FIELD_COUNT = struct.Struct(">h")
+_FIELD_LENGTH = struct.Struct(">i")
+_NULL_FIELD = _FIELD_LENGTH.pack(-1)
+
+
+def decode_vector(data):
+    """float32 array from the bytes returned by vector_send(embedding)."""
+    return np.frombuffer(data, dtype=VECTOR_DTYPE, offset=VECTOR_HEADER.size).astype(np.float32)
+
+
+def decode_vectors_into(out, rows, column=0):
+    """Decode vector_send bytes of `rows[i][column]` into out[i] without intermediate lists.
+
+    All vectors must have out.shape[1] dimensions. Returns the number of rows written.
+    """
+    dim = out.shape[1]
+    for i, row in enumerate(rows):
+        data = row[column]
+        if len(data) != VECTOR_HEADER.size + 4 * dim:
+            raise ValueError(f"Expected a {dim}-dimensional vector, got {len(data)} bytes")
+        out[i] = np.frombuffer(data, dtype=VECTOR_DTYPE, offset=VECTOR_HEADER.size)
+    return len(rows)
+
+
+def encode_vector(vector):
+    vector = np.asarray(vector, dtype=VECTOR_DTYPE)
+    return VECTOR_HEADER.pack(len(vector), 0) + vector.tobytes()
+
+
+def _text_field(value):
+    if value is None or value == "":
+        return _NULL_FIELD
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    data = str(value).encode()
+    return _FIELD_LENGTH.pack(len(data)) + data
+
+
+def embeddings_copy_buffer(rows):
+    """Binary COPY payload for (job_id, expires_at, embedding) rows.
+
+    Columns are uuid, text (expires_at, cast by the caller) and vector. The embeddings
+    are converted to big-endian in one pass instead of one float at a time.
+    """
+    rows = list(rows)
+    buffer = io.BytesIO()
+    buffer.write(COPY_SIGNATURE)
+    if rows:
+        embeddings = np.asarray([embedding for _, _, embedding in rows], dtype=VECTOR_DTYPE)
+        vector_field = _FIELD_LENGTH.pack(VECTOR_HEADER.size + 4 * embeddings.shape[1])
+        vector_header = VECTOR_HEADER.pack(embeddings.shape[1], 0)
+        uuid_field = _FIELD_LENGTH.pack(16)
+
+        for (job_id, expires_at, _), embedding in zip(rows, embeddings):
+            buffer.write(_FIELD_COUNT.pack(3))
+            job_id = job_id if isinstance(job_id, UUID) else UUID(str(job_id))
+            buffer.write(uuid_field + job_id.bytes)
+            buffer.write(_text_field(expires_at))
+            buffer.write(vector_field + vector_header + embedding.tobytes())
+    buffer.write(COPY_TRAILER)
+    buffer.seek(0)
+    return buffer
+
+
+
+def hashed_vectors_copy_buffer(rows):
+    """Binary COPY payload for (content_hash, embedding) rows: bytea and vector columns."""
+    rows = list(rows)
+    buffer = io.BytesIO()
+    buffer.write(COPY_SIGNATURE)
+    if rows:
+        embeddings = np.asarray([embedding for _, embedding in rows], dtype=VECTOR_DTYPE)
+        vector_field = _FIELD_LENGTH.pack(VECTOR_HEADER.size + 4 * embeddings.shape[1])
+        vector_header = VECTOR_HEADER.pack(embeddings.shape[1], 0)
+
+        for (content_hash, _), embedding in zip(rows, embeddings):
+            buffer.write(_FIELD_COUNT.pack(2))
+            buffer.write(_FIELD_LENGTH.pack(len(content_hash)) + bytes(content_hash))
+            buffer.write(vector_field + vector_header + embedding.tobytes())
+    buffer.write(COPY_TRAILER)
+    buffer.seek(0)
+    return buffer
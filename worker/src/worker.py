@@ -1,15 +1,45 @@
-import pika, json, os, time
+import pika, json, os, sys, time
+from collections import OrderedDict
+from datetime import datetime
 from dotenv import load_dotenv
 from db import init_db
-from model import init_embedding, process_job_data, recommend_jobs
+from embedding_cache import prune_cache
+from model import deactivate_jobs, init_embedding, process_jobs_batch, recommend_jobs, recommend_profiles_batch
 
 
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", 64))
+JOB_BATCH_TIMEOUT_MS = int(os.getenv("JOB_BATCH_TIMEOUT_MS", 500))
+# A profile is recomputed once it gets no new event for this long (0 recomputes on every event)
+PROFILE_QUIET_WINDOW_MS = int(os.getenv("PROFILE_QUIET_WINDOW_MS", 10000))
+# ...or this long after its first pending event, if the candidate keeps editing
+PROFILE_MAX_DELAY_MS = int(os.getenv("PROFILE_MAX_DELAY_MS", 60000))
+# Unacked profile events held while waiting; must cover the events of one quiet window
+PROFILE_PREFETCH = int(os.getenv("PROFILE_PREFETCH", 500))
+# message_ids of processed events remembered per consumer, to skip redeliveries
+PROCESSED_EVENTS_MEMORY = int(os.getenv("PROCESSED_EVENTS_MEMORY", 100000))
+
+
+def is_job_removed(message):
+    """job.deleted, or a job.created/job.updated event of a job that is no longer active."""
+    return message.get("event_type") == "job.deleted" or message.get("data", {}).get("is_active") is False
+
+
+def handle_job_events(messages):
+    # Latest event of each job, so a job deactivated and reactivated in one batch ends live
+    latest = {str(m.get("data", {}).get("job_id", "")): m for m in messages}.values()
+    removed = [m.get("data", {}).get("job_id") for m in latest if is_job_removed(m)]
+    changed = [m.get("data", {}) for m in latest if not is_job_removed(m)]
+
+    if changed:
+        process_jobs_batch(changed)
+    if removed:
+        deactivate_jobs(removed)
+
 
 def jobs_callback(ch, method, properties, body):
     try:
         message = json.loads(body)
-        job_data = message.get("data", {})
-        process_job_data(job_data)
+        handle_job_events([message])
         ch.basic_ack(delivery_tag=method.delivery_tag)
 
     except Exception as e:
@@ -18,6 +48,117 @@ def jobs_callback(ch, method, properties, body):
 
 
 
+def message_id(properties, message):
+    """Id of an event: the AMQP message_id set by the outbox relay, or event_id in the body."""
+    return getattr(properties, "message_id", None) or message.get("event_id")
+
+
+class ProcessedEvents:
+    """message_ids of the last `size` processed events.
+
+    The outbox relay publishes at least once, e.g. again after a crash between the broker
+    confirm and marking the rows published; copies of an event processed before are acked
+    without processing them again.
+    """
+
+    def __init__(self, size=PROCESSED_EVENTS_MEMORY):
+        self.size = size
+        self._ids = OrderedDict()
+        self.skipped = 0
+
+    def seen(self, event_id):
+        return event_id is not None and event_id in self._ids
+
+    def add(self, event_ids):
+        for event_id in event_ids:
+            if event_id is not None:
+                self._ids[event_id] = None
+                self._ids.move_to_end(event_id)
+        while len(self._ids) > self.size:
+            self._ids.popitem(last=False)
+
+    def skip(self, ch, method, event_id):
+        self.skipped += 1
+        print(f"Skipping already processed event {event_id}.")
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+
+
+
+class JobBatchConsumer:
+    """Drains up to `max_batch` job events or waits `max_wait_ms`, then processes them together."""
+
+    def __init__(self, connection, channel, max_batch=JOB_BATCH_SIZE, max_wait_ms=JOB_BATCH_TIMEOUT_MS, processed=None):
+        self.connection = connection
+        self.channel = channel
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.processed = processed or ProcessedEvents()
+        self.buffer = []
+        self.timer = None
+
+    def on_message(self, ch, method, properties, body):
+        try:
+            message = json.loads(body)
+        except ValueError as e:
+            print(f"Discarding malformed message: {e}")
+            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+            return
+
+        event_id = message_id(properties, message)
+        if self.processed.seen(event_id):
+            self.processed.skip(ch, method, event_id)
+            return
+
+        self.buffer.append((method.delivery_tag, message, event_id))
+
+        if len(self.buffer) >= self.max_batch:
+            self.flush()
+        elif self.timer is None:
+            self.timer = self.connection.call_later(self.max_wait, self.on_timeout)
+
+    def on_timeout(self):
+        self.timer = None
+        self.flush()
+
+    def flush(self):
+        if self.timer is not None:
+            self.connection.remove_timeout(self.timer)
+            self.timer = None
+
+        if not self.buffer:
+            return
+
+        batch, self.buffer = self.buffer, []
+        last_delivery_tag = batch[-1][0]
+
+        try:
+            handle_job_events([message for _, message, _ in batch])
+            self.channel.basic_ack(delivery_tag=last_delivery_tag, multiple=True)
+            self.processed.add(event_id for _, _, event_id in batch)
+            print(f"Processed batch of {len(batch)} job events.")
+
+        except Exception as e:
+            print(f"Error processing batch of {len(batch)} messages: {e}, retrying them one by one")
+            self.flush_one_by_one(batch)
+
+    def flush_one_by_one(self, batch):
+        """Ack the events that go through alone and reject, without requeueing, the ones that still fail.
+
+        Requeueing the whole batch would redeliver the same poison message forever and hold back
+        every event batched with it.
+        """
+        for delivery_tag, message, event_id in batch:
+            try:
+                handle_job_events([message])
+            except Exception as e:
+                print(f"Discarding job event {event_id}: {e}")
+                self.channel.basic_nack(delivery_tag=delivery_tag, requeue=False)
+                continue
+            self.channel.basic_ack(delivery_tag=delivery_tag)
+            self.processed.add([event_id])
+
+
+
 def profiles_callback(ch, method, properties, body):
     try:
         message = json.loads(body)
@@ -31,6 +172,132 @@ def profiles_callback(ch, method, properties, body):
 
 
 
+def _updated_at(message):
+    try:
+        return datetime.fromisoformat(message.get("data", {}).get("updated_at") or "")
+    except (TypeError, ValueError):
+        return None
+
+
+def is_newer(message, current):
+    """Compare by the profile's updated_at; arrival order when either one has none."""
+    updated_at, current_updated_at = _updated_at(message), _updated_at(current)
+    if updated_at is None or current_updated_at is None:
+        return True
+    return updated_at >= current_updated_at
+
+
+class ProfileCoalescingConsumer:
+    """Debounces profile.* events by user_id.
+
+    Events of the same profile are held (unacked) until it has had no new event for
+    `quiet_window_ms`, or `max_delay_ms` since the first one. Then only the latest event
+    (by updated_at) is used, the profiles ready at that moment are recomputed in one batch
+    and all their events are acked.
+    """
+
+    def __init__(self, connection, channel, quiet_window_ms=PROFILE_QUIET_WINDOW_MS, max_delay_ms=PROFILE_MAX_DELAY_MS,
+                 recompute=None, clock=time.monotonic, processed=None):
+        self.connection = connection
+        self.channel = channel
+        self.quiet_window = quiet_window_ms / 1000
+        self.max_delay = max_delay_ms / 1000
+        self.recompute = recompute or recommend_profiles_batch
+        self.clock = clock
+        self.processed = processed or ProcessedEvents()
+        self.pending = {}  # user_id -> {"message", "delivery_tags", "event_ids", "first_seen", "last_seen"}
+        self.timer = None
+        self.received = 0
+        self.recomputed = 0
+
+    def on_message(self, ch, method, properties, body):
+        try:
+            message = json.loads(body)
+        except ValueError as e:
+            print(f"Discarding malformed message: {e}")
+            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+            return
+
+        user_id = str(message.get("data", {}).get("user_id") or "")
+        if not user_id:
+            print(f"Discarding profile event without user_id: {message.get('event_type')}")
+            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+            return
+
+        event_id = message_id(properties, message)
+        if self.processed.seen(event_id):
+            self.processed.skip(ch, method, event_id)
+            return
+
+        now = self.clock()
+        self.received += 1
+        pending = self.pending.get(user_id)
+        if pending is None:
+            pending = self.pending[user_id] = {"message": message, "delivery_tags": [], "event_ids": [], "first_seen": now}
+        elif is_newer(message, pending["message"]):
+            pending["message"] = message
+        pending["delivery_tags"].append(method.delivery_tag)
+        pending["event_ids"].append(event_id)
+        pending["last_seen"] = now
+
+        self.schedule()
+
+    def deadline(self, pending):
+        return min(pending["last_seen"] + self.quiet_window, pending["first_seen"] + self.max_delay)
+
+    def schedule(self):
+        """Keep one timer, at the earliest deadline of the pending profiles."""
+        if self.timer is not None:
+            self.connection.remove_timeout(self.timer)
+            self.timer = None
+        if self.pending:
+            delay = min(self.deadline(pending) for pending in self.pending.values()) - self.clock()
+            self.timer = self.connection.call_later(max(delay, 0), self.on_timeout)
+
+    def on_timeout(self):
+        self.timer = None
+        self.flush()
+        self.schedule()
+
+    def flush(self, force=False):
+        now = self.clock()
+        ready = [user_id for user_id, pending in self.pending.items() if force or self.deadline(pending) <= now]
+        if not ready:
+            return
+
+        batch = [self.pending.pop(user_id) for user_id in ready]
+        delivery_tags = [tag for pending in batch for tag in pending["delivery_tags"]]
+
+        try:
+            self.recompute([pending["message"].get("data", {}) for pending in batch])
+            for tag in delivery_tags:
+                self.channel.basic_ack(delivery_tag=tag)
+            self.processed.add(event_id for pending in batch for event_id in pending["event_ids"])
+            self.recomputed += len(batch)
+            print(f"Recomputed {len(batch)} profiles from {len(delivery_tags)} events.")
+
+        except Exception as e:
+            print(f"Error processing batch of {len(batch)} profiles: {e}, retrying them one by one")
+            self.flush_one_by_one(batch)
+
+    def flush_one_by_one(self, batch):
+        """Recompute each profile alone, rejecting without requeue the events of the ones that still fail."""
+        for pending in batch:
+            try:
+                self.recompute([pending["message"].get("data", {})])
+            except Exception as e:
+                user_id = pending["message"].get("data", {}).get("user_id")
+                print(f"Discarding {len(pending['delivery_tags'])} events of profile {user_id}: {e}")
+                for tag in pending["delivery_tags"]:
+                    self.channel.basic_nack(delivery_tag=tag, requeue=False)
+                continue
+            for tag in pending["delivery_tags"]:
+                self.channel.basic_ack(delivery_tag=tag)
+            self.processed.add(pending["event_ids"])
+            self.recomputed += 1
+
+
+
 def connect_to_rabbitmq(RABBITMQ_HOST, RABBITMQ_USER, RABBITMQ_PASSWORD):
 
     """Attempt to connect and return a channel"""
@@ -49,6 +316,7 @@ def connect_to_rabbitmq(RABBITMQ_HOST, RABBITMQ_USER, RABBITMQ_PASSWORD):
 
 def run_worker():
     init_db()
+    prune_cache()
     init_embedding()
     load_dotenv()
 
@@ -71,11 +339,29 @@ def run_worker():
             channel.queue_declare(queue="profiles_events_queue", durable=True)
             channel.queue_bind(queue="profiles_events_queue", exchange='events', routing_key='profile.*')
 
-            channel.basic_consume(queue="job_events_queue", on_message_callback=jobs_callback, auto_ack=False)
-            channel.basic_consume(queue="profiles_events_queue", on_message_callback=profiles_callback, auto_ack=False)
+            if JOB_BATCH_SIZE > 1:
+                # Dedicated channel so multiple=True acks only cover job events
+                jobs_channel = connection.channel()
+                jobs_channel.basic_qos(prefetch_count=JOB_BATCH_SIZE)
+                jobs_consumer = JobBatchConsumer(connection, jobs_channel)
+                jobs_channel.basic_consume(queue="job_events_queue", on_message_callback=jobs_consumer.on_message, auto_ack=False)
+            else:
+                channel.basic_consume(queue="job_events_queue", on_message_callback=jobs_callback, auto_ack=False)
+            if PROFILE_QUIET_WINDOW_MS > 0:
+                # Dedicated channel: coalesced events stay unacked for the quiet window
+                profiles_channel = connection.channel()
+                profiles_channel.basic_qos(prefetch_count=PROFILE_PREFETCH)
+                profiles_consumer = ProfileCoalescingConsumer(connection, profiles_channel)
+                profiles_channel.basic_consume(queue="profiles_events_queue", on_message_callback=profiles_consumer.on_message, auto_ack=False)
+            else:
+                channel.basic_consume(queue="profiles_events_queue", on_message_callback=profiles_callback, auto_ack=False)
 
             print(f"✅ Connected to RabbitMQ. Waiting for messages in 'job_events_queue' and 'profiles_events_queue'...")
-            channel.start_consuming()
+            # Drive the connection rather than one channel: the consumers may live on their own
+            # channels, and channel.start_consuming() returns at once when its channel has none.
+            # This also fires the call_later timers of the batching consumers.
+            while True:
+                connection.process_data_events(time_limit=None)
 
         except pika.exceptions.AMQPConnectionError:
             print("❌ Connection to RabbitMQ failed. Retrying in 5 seconds...")